@@ -1,4 +1,5 @@
 from ..transverse_lib import bpm_plots
+from ...pandas.dataframe.vector_array import column_to_matrix
 import matplotlib.pyplot as plt
 import numpy as np
 import logging
@@ -51,7 +52,7 @@ def process_quadrupoles(df, target_file_name, plot_dir=None):
         return vals/I_max
 
     def dataframe_column_to_array(col):
-        r = np.array(col.tolist(), np.float_)
+        r = column_to_matrix(col, np.float_)
         return r
 
     df_2_a = dataframe_column_to_array
@@ -29,6 +29,16 @@ def pickle_file_name():
     return t_path
 
 
+def store_name():
+    '''directory of the column store of the processed data
+    '''
+    t_path = commons.store_name()
+    t_dir = to_bba_dir(t_path)
+    store_dir = 'bba_test'
+    t_path = os.path.join(t_dir, store_dir)
+    return t_path
+
+
 def makefile_name():
     t_path = commons.makefile_name()
     t_dir = to_bba_dir(t_path)
@@ -9,20 +9,46 @@ logger = logging.getLogger('bact2')
 
 
 class OrbitOffsetProcessor(OrbitOffsetProcessor):
+    '''
+
+    Args:
+        reuse_response_matrix: correct the orbit of the changed
+                               quadrupole with the response matrix of
+                               the reference lattice. The k1 changes
+                               are small (below 10 %): the response
+                               barely differs and computing it
+                               dominates the time of each model
+
+    The lattices of the changed quadrupoles are derived incrementally
+    from the reference one (see
+    :meth:`reference_orbit.OrbitCalculator.initLattice`).
+    '''
+    def __init__(self, *args, reuse_response_matrix=True, **kws):
+        super().__init__(*args, **kws)
+        self.reuse_response_matrix = reuse_response_matrix
 
     # @functools.lru_cache(maxsize=None)
     def compute_quadrupole_reference_model(self, magnet_name=None, scale=None,
                                            dx=None, dy=None):
 
-        logger.info(
-            f'Computing model for relative scale change of k1 {scale} dx {dx} dy {dy}'
-            f' and magnet {magnet_name}'
-        )
-
-        od = self.orbit.orbitCalculatorForChangedQuadrupole(name=magnet_name,
-                                                            rk1=scale, dx=dx, dy=dy)
-        off_orbit = od.orbitData()
-        offset = self.orbit_offset_filter(off_orbit)
+        def compute():
+            logger.info(
+                f'Computing model for relative scale change of k1 {scale} dx {dx} dy {dy}'
+                f' and magnet {magnet_name}'
+            )
+
+            od = self.orbit.orbitCalculatorForChangedQuadrupole(
+                name=magnet_name, rk1=scale, dx=dx, dy=dy, incremental=True,
+                reuse_response_matrix=self.reuse_response_matrix)
+            off_orbit = od.orbitData()
+            return self.orbit_offset_filter(off_orbit)
+
+        kws = {}
+        if self.reuse_response_matrix:
+            # approximation: not the same model
+            kws['reuse_response_matrix'] = True
+        offset = self.cached_model(compute, 'quadrupole', magnet_name,
+                                   scale=scale, dx=dx, dy=dy, **kws)
 
         ox = offset.bpm.x.max()
         oy = offset.bpm.y.max()
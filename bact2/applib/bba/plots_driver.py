@@ -0,0 +1,29 @@
+'''Creates all plots within one process
+
+Use instead of the make file generated by :mod:`plots_makefile`, e.g.::
+
+    python3 plots_driver.py --jobs 8
+'''
+import logging
+import sys
+
+from bact2.applib.bba import commons
+from bact2.applib.bba.bpm_plots import process_quadrupoles
+from bact2.applib.bba.process_model_fits import process_quadrupole
+from bact2.applib.transverse_lib.plots_driver import main_func
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    n_failed = main_func(pickle_file_name=commons.store_name(),
+                         column_with_kicker_name='mux_selector_selected',
+                         plots_dir='plots_bba',
+                         process_kicker_func=process_quadrupoles,
+                         process_fit_func=process_quadrupole)
+    if n_failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,7 +5,7 @@ from bact2.applib.transverse_lib.plots_makefile import main_func
 
 
 def main():
-    pickle_file_name = commons.pickle_file_name()
+    pickle_file_name = commons.store_name()
     main_func(makefile_name=commons.makefile_name(),
               pickle_file_name=pickle_file_name,
               column_with_kicker_name='mux_selector_selected',
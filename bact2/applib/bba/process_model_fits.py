@@ -111,7 +111,8 @@ def process_quadrupole(df, quadrupole_name, coordinate=None, savename=None,
 
 
 def main():
-    process_model_fits.main_func(process_quadrupole)
+    process_model_fits.main_func(process_quadrupole,
+                                 column_with_kicker_name='mux_selector_selected')
 
 
 if __name__ == '__main__':
@@ -22,5 +22,14 @@ def pickle_file_name():
     return pickle_file_name
 
 
+def store_name():
+    '''directory of the column store of the processed data
+    '''
+    d_dir = data_dir()
+    store_name = 'preprocessed_steerer_response_data'
+    store_name = os.path.join(d_dir, store_name)
+    return store_name
+
+
 def makefile_name():
     return os.path.join(data_dir(), 'plots.mk')
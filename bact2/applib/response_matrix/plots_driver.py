@@ -0,0 +1,30 @@
+'''Creates all plots within one process
+
+Use instead of the make file generated by :mod:`plots_makefile`, e.g.::
+
+    python3 plots_driver.py --jobs 8
+'''
+import logging
+import sys
+
+from bact2.applib.response_matrix import commons
+from bact2.applib.response_matrix.bpm_plots import process_steerer
+from bact2.applib.response_matrix.process_model_fits import \
+    process_steerer as fit_steerer
+from bact2.applib.transverse_lib.plots_driver import main_func
+
+logging.basicConfig(level=logging.INFO)
+
+
+def main():
+    n_failed = main_func(pickle_file_name=commons.store_name(),
+                         column_with_kicker_name='sc_selected',
+                         plots_dir='plots_response_matrix',
+                         process_kicker_func=process_steerer,
+                         process_fit_func=fit_steerer)
+    if n_failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -31,7 +31,11 @@ def process_steerer(df, steerer_ps_name, coordinate=None, savename=None,
                                          magnet_length=1)
     logger.info(f'Maximum angle found {angle_max} guessed')
 
-    op = model_fits.OrbitOffsetProcessor(cell=reference_orbit.ncell)
+    # orbits for the different currents derived from the response to
+    # +/- angle_max instead of computing the model for each of them
+    op = model_fits.OrbitOffsetProcessor(cell=reference_orbit.ncell,
+                                         linear_response=True,
+                                         second_order=True)
     op.reference_angle = angle_max
 
     steerer_type = None
@@ -105,7 +109,8 @@ def process_steerer(df, steerer_ps_name, coordinate=None, savename=None,
 
 
 def main():
-    process_model_fits.main_func(process_func=process_steerer)
+    process_model_fits.main_func(process_func=process_steerer,
+                                 column_with_kicker_name='sc_selected')
 
 
 if __name__ == '__main__':
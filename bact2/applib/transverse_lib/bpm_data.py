@@ -1,4 +1,5 @@
 from ...pandas.dataframe import df_aggregate as dfg
+from ...pandas.dataframe.vector_array import column_to_matrix
 import pandas as pd
 import numpy as np
 import logging
@@ -45,7 +46,7 @@ def calculate_bpm_one_corr(df_sel, coor=None,
     else:
         raise AssertionError('coor {} unknown'.format(coor))
 
-    bpm = np.array(bpm.values.tolist(), np.float_)
+    bpm = column_to_matrix(bpm, np.float_)
 
     # Critical for rcond determination
     dI = np.array(dI.values, np.float_)
@@ -110,7 +111,7 @@ def calc_bpm_gains(df, column_name=None, indep_column=None,
         'bpm_p2_y_i', 'bpm_p2_y_s', 'bpm_p2_y_c',
     ]
 
-    ncols = set(list(tdf.columns) + columns)
+    ncols = list(tdf.columns) + [col for col in columns if col not in tdf.columns]
     df_ref = pd.DataFrame(index=tdf.index, columns=ncols, dtype=np.object_)
 
     group = df.groupby(by=column_name)
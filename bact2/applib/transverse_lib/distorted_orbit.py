@@ -55,3 +55,57 @@ def closed_orbit_distortion(beta, mu,  *, tune, beta_i, theta_i, mu_i):
     r = devisor * sq_beta
     r *= cok
     return r
+
+
+def closed_orbit_response_matrix(beta, mu, *, tune, beta_k, mu_k,
+                                 chunk_size=None):
+    '''Orbit response at all observation points to a unit kick of each kicker
+
+    Args:
+        beta:       betatron function at the observation points
+        mu:         phase advance at the observation points
+        tune:       tune of the machine
+        beta_k:     betatron function at the kickers
+        mu_k:       phase advance at the kickers
+        chunk_size: number of observation points processed at once.
+                    If None all are processed in one go
+
+    Returns:
+        matrix of shape (n_observation, n_kicker)
+
+    .. math::
+        R_{ij} = \\frac{\\sqrt{\\beta_i \\beta_j}}{2 \\sin{\\pi Q}}
+                 \\cos{\\left(\\pi Q - \\left|\\mu_i - \\mu_j\\right|\\right)}
+
+    Equivalent to :func:`closed_orbit_distortion` for each kicker with
+    theta_i = 1, but evaluated for all kickers at once. Use chunk_size
+    for fine grids of observation points to limit the size of the
+    intermediate arrays.
+    '''
+    beta = np.atleast_1d(np.asarray(beta, dtype=np.float_))
+    mu = np.atleast_1d(np.asarray(mu, dtype=np.float_))
+    beta_k = np.atleast_1d(np.asarray(beta_k, dtype=np.float_))
+    mu_k = np.atleast_1d(np.asarray(mu_k, dtype=np.float_))
+
+    qp = tune * np.pi
+    devisor = 1. / (2. * np.sin(qp))
+    sq_beta = np.sqrt(beta)
+    scale_k = np.sqrt(beta_k) * devisor
+
+    n_obs = len(mu)
+    if chunk_size is None:
+        chunk_size = max(n_obs, 1)
+    chunk_size = int(chunk_size)
+    assert(chunk_size > 0)
+
+    r = np.empty((n_obs, len(mu_k)), dtype=np.float_)
+    for start in range(0, n_obs, chunk_size):
+        sl = slice(start, start + chunk_size)
+        t_r = r[sl]
+        np.subtract(mu[sl, np.newaxis], mu_k[np.newaxis, :], out=t_r)
+        np.absolute(t_r, out=t_r)
+        np.subtract(qp, t_r, out=t_r)
+        np.cos(t_r, out=t_r)
+        t_r *= sq_beta[sl, np.newaxis]
+        t_r *= scale_k[np.newaxis, :]
+    return r
@@ -3,10 +3,15 @@
 
 from . import distorted_orbit
 import numpy as np
+import pandas as pd
 from  dataclasses import dataclass
 
 pi2 = np.pi * 2
 
+#: Ocelot naming conventions
+twiss_columns_x = ['beta_x', 'mux']
+twiss_columns_y = ['beta_y', 'muy']
+
 
 @dataclass
 class KickParameters:
@@ -73,3 +78,75 @@ def orbit_distortion_for_kicker(machine_description, kick_parameters):
     f = distorted_orbit.closed_orbit_distortion
     co = f(beta, mu, tune=Q, beta_i=beta_i, theta_i=theta_i, mu_i=mu_i)
     return co
+
+
+@dataclass
+class ResponseMatrixXY:
+    '''Closed orbit response to a unit kick (1 rad)
+    '''
+    #: horizontal response, shape (n_bpm, n_kicker)
+    x : np.ndarray
+    #: vertical response, shape (n_bpm, n_kicker)
+    y : np.ndarray
+    #: position of the bpms
+    s : np.ndarray
+    #: kickers: one per column
+    kicker_names : list
+
+
+def _kicker_rows(twiss_df, kicker_names, name_column):
+    '''row of the first occurrence of each kicker
+    '''
+    names = twiss_df.loc[:, name_column]
+    first = ~names.duplicated().values
+    lookup = pd.Series(np.flatnonzero(first), index=names.values[first])
+    try:
+        rows = lookup.loc[list(kicker_names)].values
+    except KeyError:
+        missing = set(kicker_names) - set(lookup.index)
+        txt = f'Kickers {sorted(missing)} not found in column {name_column}'
+        raise AssertionError(txt)
+    return rows
+
+
+def _plane_response(twiss_df, columns, rows, bpm_s, chunk_size):
+    s = twiss_df.loc[:, 's'].values
+    beta, mu = twiss_df.loc[:, columns].values.T
+    Q = mu[-1] / pi2
+
+    beta_bpm = np.interp(bpm_s, s, beta)
+    mu_bpm = np.interp(bpm_s, s, mu)
+
+    f = distorted_orbit.closed_orbit_response_matrix
+    r = f(beta_bpm, mu_bpm, tune=Q, beta_k=beta[rows], mu_k=mu[rows],
+          chunk_size=chunk_size)
+    return r
+
+
+def response_matrix(twiss_df, kicker_names, bpm_s, *, name_column='id',
+                    chunk_size=None):
+    '''Analytic orbit response matrix for both planes
+
+    Args:
+        twiss_df:     twiss parameters along the ring (sorted by s),
+                      columns following :class:`ocelot.cpbd.beam.Twiss`
+        kicker_names: names of the kickers as found in name_column
+        bpm_s:        positions of the beam position monitors
+        name_column:  column containing the element names
+        chunk_size:   see
+                      :func:`distorted_orbit.closed_orbit_response_matrix`
+
+    The machine functions at the bpms are interpolated linearly from
+    the twiss table. Multiply with the kick angles to obtain the orbit
+    distortion.
+
+    Returns:
+        :class:`ResponseMatrixXY`
+    '''
+    kicker_names = list(kicker_names)
+    bpm_s = np.asarray(bpm_s, dtype=np.float_)
+    rows = _kicker_rows(twiss_df, kicker_names, name_column)
+
+    rx = _plane_response(twiss_df, twiss_columns_x, rows, bpm_s, chunk_size)
+    ry = _plane_response(twiss_df, twiss_columns_y, rows, bpm_s, chunk_size)
+    return ResponseMatrixXY(x=rx, y=ry, s=bpm_s, kicker_names=kicker_names)
@@ -1,4 +1,5 @@
 import bact2.pandas.dataframe.df_aggregate as dfg
+from bact2.applib.transverse_lib import json_stream, processed_store
 
 
 import pandas as pd
@@ -11,7 +12,7 @@ logging.basicConfig(level=logging.INFO)
 
 def preprocess_table(t_table):
     t_table = t_table.infer_objects().sort_index()
-    nt = dfg.df_vectors_convert(t_table).sort_index()
+    nt = dfg.df_vectors_convert(t_table, vector_array=True).sort_index()
     return nt
 
 def main_func(dataframe_filter_sink, json_file_name, pickle_file_name):
@@ -26,3 +27,36 @@ def main_func(dataframe_filter_sink, json_file_name, pickle_file_name):
 
     with gzip.open(pickle_file_name, 'w') as fp:
         pickle.dump(p, fp)
+
+
+def main_func_chunked(dataframe_filter_sink, json_file_name, pickle_file_name,
+                      lines=None):
+    '''Process the measurement device by device
+
+    Args:
+        dataframe_filter_sink: class processing the data (e.g.
+                               :class:`ProcessedBPMData`)
+        json_file_name:        file containing the measured data
+        pickle_file_name:      file to store the processed data to. If
+                               it ends with '.gz' a gzip pickle stream
+                               is written, otherwise a column store
+                               directory
+        lines:                 json lines file? If None derived from
+                               the file extension
+
+    The json file is read incrementally into typed columns. The data of
+    each device (column :attr:`column_for_selected_device` of the
+    dataframe_filter_sink) is processed separately and written to the
+    store before the next one is processed. Load the data using
+    :func:`bact2.applib.transverse_lib.processed_store.load`.
+    '''
+    column = dataframe_filter_sink.column_for_selected_device
+    assert(column is not None)
+
+    chunks = json_stream.iter_device_chunks(json_file_name, column,
+                                            lines=lines)
+    processed = (dataframe_filter_sink(chunk) for chunk in chunks)
+    if pickle_file_name.endswith('.gz'):
+        processed_store.write_chunks(pickle_file_name, processed)
+    else:
+        processed_store.write_store(pickle_file_name, processed, column)
@@ -0,0 +1,482 @@
+'''Read measurement data stored as json incrementally
+
+:func:`pandas.read_json` loads the whole file into python objects before
+the dataframe is built. For the larger measurement runs these python
+objects (one list per beam position monitor reading) dominate the memory
+consumption.
+
+The functions here parse the file value by value and store each value
+directly in preallocated typed arrays. Vectors of equal length are
+stored as :class:`bact2.pandas.dataframe.vector_array.VectorArray`.
+
+Two layouts are supported:
+    * the default layout of :meth:`pandas.DataFrame.to_json`
+      (orient='columns'): {"column": {"index": value, ...}, ...}
+    * json lines: one record per line as written by
+      :meth:`pandas.DataFrame.to_json` (orient='records', lines=True)
+
+Main entry points:
+   * :func:`read_json_table`
+   * :func:`iter_device_chunks`
+'''
+import bz2
+import gzip
+import json
+import logging
+import re
+
+import numpy as np
+import pandas as pd
+
+from ...pandas.dataframe.vector_array import VectorArray
+
+logger = logging.getLogger('bact2')
+
+_whitespace = re.compile(r'[ \t\n\r]*')
+#: characters a number could be continued with
+_number_tail = re.compile(r'[-+.eE0-9]*')
+
+
+def open_text(file_name):
+    '''Open a (possibly compressed) text file for reading
+    '''
+    if file_name.endswith('.bz2'):
+        return bz2.open(file_name, 'rt')
+    elif file_name.endswith('.gz'):
+        return gzip.open(file_name, 'rt')
+    return open(file_name, 'rt')
+
+
+class _JSONStreamReader:
+    '''Decode json values one by one from a text stream
+
+    Only a block of the stream is kept in memory.
+    '''
+    def __init__(self, fp, block_size=2**20):
+        self._fp = fp
+        self._block_size = block_size
+        self._buf = ''
+        self._pos = 0
+        self._eof = False
+        self._decoder = json.JSONDecoder()
+
+    def _fill(self):
+        if self._eof:
+            return False
+        chunk = self._fp.read(self._block_size)
+        if not chunk:
+            self._eof = True
+            return False
+        self._buf = self._buf[self._pos:] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self):
+        '''next non white space character or '' at the end of the stream
+        '''
+        while True:
+            self._pos = _whitespace.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ''
+
+    def expect(self, char):
+        c = self.peek()
+        if c != char:
+            txt = f'Expected "{char}" but found "{c}" in json stream'
+            raise ValueError(txt)
+        self._pos += 1
+
+    def value(self):
+        '''decode the next value
+        '''
+        self.peek()
+        while True:
+            try:
+                obj, end = self._decoder.raw_decode(self._buf, self._pos)
+            except json.JSONDecodeError:
+                # value not yet complete in the buffer
+                if self._fill():
+                    continue
+                raise
+            tail = _number_tail.match(self._buf, end).end()
+            if tail == len(self._buf) and self._fill():
+                # a number could continue in the next block
+                continue
+            self._pos = end
+            return obj
+
+
+def _iter_object_keys(reader):
+    '''Iterate over the keys of the next json object
+
+    The caller has to consume the value following each key
+    '''
+    reader.expect('{')
+    if reader.peek() == '}':
+        reader.expect('}')
+        return
+
+    while True:
+        key = reader.value()
+        reader.expect(':')
+        yield key
+
+        c = reader.peek()
+        if c == ',':
+            reader.expect(',')
+            continue
+        reader.expect('}')
+        return
+
+
+def _is_number(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool)
+
+
+class ColumnBuilder:
+    '''Collect the values of one column in a typed array
+
+    Args:
+        n_rows: number of rows if known in advance. Otherwise the
+                storage is grown as required
+
+    The type is derived from the values:
+        * numbers: int64 or float64 (float64 if null values are found)
+        * booleans
+        * lists of numbers of equal length: a matrix
+        * anything else: objects
+
+    Vectors are stored as float64 and converted back to int64 if the
+    first vector contained only integers (as done by
+    :func:`bact2.pandas.dataframe.df_aggregate.df_vectors_convert`, which
+    only checks the first element of a column).
+    '''
+    def __init__(self, n_rows=None):
+        self._n_rows = n_rows
+        self._size = 0
+        self._kind = None
+        self._data = None
+        self._nulls = []
+        self._vector_is_int = False
+
+    def __len__(self):
+        return self._size
+
+    def _allocate(self, n, shape=(), dtype=np.float_):
+        if self._n_rows is not None:
+            n = max(n, self._n_rows)
+        if dtype == np.object_:
+            return np.empty((n,) + shape, dtype=dtype)
+        elif dtype == np.float_:
+            return np.full((n,) + shape, np.nan)
+        return np.zeros((n,) + shape, dtype=dtype)
+
+    def _ensure_capacity(self, pos):
+        cap = len(self._data)
+        if pos < cap:
+            return
+        n = max(pos + 1, 2 * cap)
+        data = self._allocate(n, self._data.shape[1:], self._data.dtype)
+        data[:cap] = self._data
+        self._data = data
+
+    def _start(self, value):
+        '''Derive the storage from the first value which is not null
+        '''
+        n = max(64, self._size)
+        if isinstance(value, bool):
+            self._kind = 'bool'
+            self._data = self._allocate(n, dtype=np.bool_)
+        elif isinstance(value, int):
+            self._kind = 'int'
+            self._data = self._allocate(n, dtype=np.int64)
+        elif isinstance(value, float):
+            self._kind = 'float'
+            self._data = self._allocate(n)
+        elif (isinstance(value, list) and len(value) > 0
+              and all(_is_number(v) for v in value)):
+            self._kind = 'vector'
+            self._vector_is_int = all(isinstance(v, int) for v in value)
+            self._data = self._allocate(n, shape=(len(value),))
+        else:
+            self._kind = 'object'
+            self._data = self._allocate(n, dtype=np.object_)
+
+    def _fits(self, value):
+        kind = self._kind
+        if kind == 'object':
+            return True
+        elif kind == 'bool':
+            return isinstance(value, bool)
+        elif kind == 'int':
+            return isinstance(value, int) and not isinstance(value, bool)
+        elif kind == 'float':
+            return _is_number(value)
+        elif kind == 'vector':
+            return (isinstance(value, list)
+                    and len(value) == self._data.shape[1])
+        raise AssertionError(f'Unknown kind {kind}')
+
+    def _to_object(self):
+        data = np.empty(len(self._data), dtype=np.object_)
+        for i, v in enumerate(self._data):
+            data[i] = v
+        self._kind = 'object'
+        self._data = data
+
+    def _promote(self, value):
+        '''Change the storage type e.g. int -> float
+        '''
+        if self._kind == 'int' and isinstance(value, float):
+            self._kind = 'float'
+            self._data = self._data.astype(np.float_)
+            return
+        self._to_object()
+
+    def set(self, pos, value):
+        '''store value at position pos
+        '''
+        self._size = max(self._size, pos + 1)
+        if value is None:
+            self._nulls.append(pos)
+            return
+
+        if self._kind is None:
+            self._start(value)
+        elif not self._fits(value):
+            self._promote(value)
+
+        if (self._kind == 'object' and isinstance(value, list)
+                and len(value) > 0 and all(_is_number(v) for v in value)):
+            value = np.array(value)
+
+        self._ensure_capacity(pos)
+        self._data[pos] = value
+
+    def append(self, value):
+        self.set(self._size, value)
+
+    def finish(self):
+        '''Values as typed array (or VectorArray for vectors)
+        '''
+        n = self._size
+        if self._n_rows is not None:
+            n = max(n, self._n_rows)
+
+        if self._kind is None:
+            return np.full(n, np.nan)
+
+        nulls = np.asarray(self._nulls, dtype=np.int_)
+        if len(nulls):
+            if self._kind == 'int':
+                self._promote(np.nan)
+            elif self._kind == 'bool':
+                self._to_object()
+
+        if n > 0:
+            self._ensure_capacity(n - 1)
+        data = self._data[:n]
+
+        if self._kind == 'object':
+            data[nulls] = None
+        elif self._kind in ('float', 'vector'):
+            data[nulls] = np.nan
+
+        if self._kind == 'vector':
+            if self._vector_is_int and len(nulls) == 0:
+                data = data.astype(np.int64)
+            return VectorArray(data)
+        return data
+
+
+_default_date_prefix = ('timestamp',)
+_default_date_suffix = ('_at', '_time')
+_default_date_names = ('modified', 'date', 'datetime')
+
+
+def _is_default_date_column(name):
+    '''Columns converted to dates by :func:`pandas.read_json`
+    '''
+    if not isinstance(name, str):
+        return False
+    name = name.lower()
+    return (name.endswith(_default_date_suffix)
+            or name.startswith(_default_date_prefix)
+            or name in _default_date_names)
+
+
+def _to_date(values):
+    if not np.issubdtype(values.dtype, np.number):
+        return values
+    for unit in ('s', 'ms', 'us', 'ns'):
+        try:
+            return pd.to_datetime(values, unit=unit).values
+        except (ValueError, OverflowError, TypeError):
+            continue
+    return values
+
+
+def _index_from_keys(keys):
+    try:
+        return pd.Index([int(k) for k in keys])
+    except ValueError:
+        return pd.Index(keys)
+
+
+def _table_from_columns(columns, index):
+    data = {}
+    for name, values in columns.items():
+        if _is_default_date_column(name) and not isinstance(values, VectorArray):
+            values = _to_date(values)
+        data[name] = pd.Series(values, index=index, name=name)
+    df = pd.DataFrame(data, index=index, columns=list(columns.keys()))
+    return df
+
+
+def read_json_columns(fp, block_size=2**20):
+    '''Read the default layout of :meth:`pandas.DataFrame.to_json`
+
+    Args:
+        fp: a text stream
+
+    Returns:
+        a dataframe with typed columns sorted by its index
+    '''
+    reader = _JSONStreamReader(fp, block_size=block_size)
+    keys = None
+    positions = None
+    columns = {}
+
+    for name in _iter_object_keys(reader):
+        logger.debug(f'Reading column {name}')
+        if keys is None:
+            builder = ColumnBuilder()
+            keys = []
+            for key in _iter_object_keys(reader):
+                keys.append(key)
+                builder.append(reader.value())
+            positions = {key: pos for pos, key in enumerate(keys)}
+        else:
+            builder = ColumnBuilder(n_rows=len(keys))
+            for key in _iter_object_keys(reader):
+                builder.set(positions[key], reader.value())
+
+        columns[name] = builder.finish()
+
+    if keys is None:
+        keys = []
+    index = _index_from_keys(keys)
+    df = _table_from_columns(columns, index)
+    return df.sort_index()
+
+
+def _table_from_records(records, first_row=0):
+    builders = {}
+    for pos, record in enumerate(records):
+        for name, value in record.items():
+            try:
+                builder = builders[name]
+            except KeyError:
+                builder = ColumnBuilder(n_rows=len(records))
+                builders[name] = builder
+            builder.set(pos, value)
+
+    columns = {name: b.finish() for name, b in builders.items()}
+    index = pd.RangeIndex(first_row, first_row + len(records))
+    return _table_from_columns(columns, index)
+
+
+def iter_json_lines_chunks(fp, column):
+    '''Dataframes for each block of records measured for the same device
+
+    Args:
+        fp:     a text stream containing one json record per line
+        column: name of the column containing the device name
+
+    Only the records of the current block are kept in memory.
+    '''
+    block = []
+    device = None
+    n_rows = 0
+    for line in fp:
+        line = line.strip()
+        if not line:
+            continue
+        record = json.loads(line)
+        t_device = record.get(column)
+        if block and t_device != device:
+            yield _table_from_records(block, first_row=n_rows)
+            n_rows += len(block)
+            block = []
+        device = t_device
+        block.append(record)
+
+    if block:
+        yield _table_from_records(block, first_row=n_rows)
+
+
+def _is_json_lines(file_name):
+    name = file_name
+    for ext in ('.bz2', '.gz'):
+        if name.endswith(ext):
+            name = name[:-len(ext)]
+    return name.endswith(('.jsonl', '.ndjson'))
+
+
+def read_json_table(file_name, lines=None):
+    '''Read a json file to a dataframe with typed columns
+
+    Args:
+        file_name: name of the file; bz2 or gzip compression is derived
+                   from the extension
+        lines:     json lines file? If None derived from the extension
+                   (.jsonl or .ndjson)
+
+    Equivalent to :func:`pandas.read_json` followed by
+    :func:`bact2.pandas.dataframe.df_aggregate.df_vectors_convert` with
+    vector_array=True.
+    '''
+    if lines is None:
+        lines = _is_json_lines(file_name)
+
+    with open_text(file_name) as fp:
+        if lines:
+            chunks = list(iter_json_lines_chunks(fp, column=None))
+            if not chunks:
+                return pd.DataFrame()
+            return pd.concat(chunks)
+        return read_json_columns(fp)
+
+
+def iter_device_chunks(file_name, column, lines=None):
+    '''Dataframes containing the measurement for one device each
+
+    Args:
+        file_name: name of the file
+        column:    name of the column containing the device name
+                   (e.g. the selected steerer)
+        lines:     json lines file? If None derived from the extension
+
+    For json lines files only the records of the current device are
+    kept in memory. The default layout of
+    :meth:`pandas.DataFrame.to_json` stores the data column by column.
+    Thus all columns are read (into typed arrays) before the chunks can
+    be split off.
+    '''
+    if lines is None:
+        lines = _is_json_lines(file_name)
+
+    if lines:
+        with open_text(file_name) as fp:
+            yield from iter_json_lines_chunks(fp, column)
+        return
+
+    df = read_json_table(file_name, lines=False)
+    grp = df.groupby(column, sort=False)
+    names = list(grp.groups.keys())
+    indices = grp.indices
+    del grp
+    for name in names:
+        yield df.iloc[indices[name]]
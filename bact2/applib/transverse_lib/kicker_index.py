@@ -0,0 +1,130 @@
+'''Row positions of the measurements of each kicker
+
+The plot and fit scripts process one kicker at a time. Selecting the
+kicker by comparing the kicker column scans the whole dataframe for each
+kicker. :class:`KickerIndex` is built once for the processed dataframe
+and returns the rows of one kicker directly.
+'''
+import numpy as np
+
+
+def _compress(positions):
+    '''Rows as slice if they are contiguous
+    '''
+    if len(positions) == 0:
+        return slice(0, 0)
+    start = int(positions[0])
+    stop = int(positions[-1]) + 1
+    if stop - start == len(positions):
+        return slice(start, stop)
+    return np.asarray(positions, dtype=np.int_)
+
+
+def _shift(rows, offset):
+    if isinstance(rows, slice):
+        return slice(rows.start + offset, rows.stop + offset)
+    return rows + offset
+
+
+class KickerIndex:
+    '''Rows of each kicker
+
+    Args:
+        rows: dictionary kicker name -> rows (a slice or an array of
+              row positions)
+
+    The names are kept in the order the kickers were measured.
+    '''
+    def __init__(self, rows):
+        self._rows = rows
+
+    @classmethod
+    def from_dataframe(cls, df, column):
+        '''Build the index for the kicker names found in column
+        '''
+        names, codes = _factorize(df.loc[:, column].values)
+        order = np.argsort(codes, kind='stable')
+        counts = np.bincount(codes, minlength=len(names))
+        starts = np.concatenate([[0], np.cumsum(counts)])
+
+        rows = {}
+        for i, name in enumerate(names):
+            rows[name] = _compress(order[starts[i]:starts[i + 1]])
+        return cls(rows)
+
+    @classmethod
+    def concat(cls, indices, lengths):
+        '''Index of concatenated dataframes
+
+        Args:
+            indices: the index of each dataframe
+            lengths: number of rows of each dataframe
+        '''
+        rows = {}
+        offset = 0
+        for index, n_rows in zip(indices, lengths):
+            for name in index.names:
+                t_rows = _shift(index.rows(name), offset)
+                if name in rows:
+                    prev = _expand(rows[name])
+                    t_rows = _compress(np.concatenate([prev, _expand(t_rows)]))
+                rows[name] = t_rows
+            offset += n_rows
+        return cls(rows)
+
+    @property
+    def names(self):
+        return list(self._rows.keys())
+
+    def rows(self, name):
+        '''rows of the kicker as slice or array of positions
+        '''
+        return self._rows[name]
+
+    def select(self, df, name):
+        '''rows of dataframe df measured for kicker name
+        '''
+        return df.iloc[self._rows[name]]
+
+    def to_dict(self):
+        '''Representation suitable for json
+        '''
+        r = {}
+        for name in self.names:
+            rows = self._rows[name]
+            if isinstance(rows, slice):
+                rows = [rows.start, rows.stop]
+            else:
+                rows = {'positions': rows.tolist()}
+            r[name] = {'rows': rows}
+        return r
+
+    @classmethod
+    def from_dict(cls, d):
+        rows = {}
+        for name, entry in d.items():
+            t_rows = entry['rows']
+            if isinstance(t_rows, dict):
+                t_rows = np.asarray(t_rows['positions'], dtype=np.int_)
+            else:
+                t_rows = slice(*t_rows)
+            rows[name] = t_rows
+        return cls(rows)
+
+
+def _factorize(values):
+    '''Names in order of appearance and the code of each row
+    '''
+    names, first, codes = np.unique(values, return_index=True,
+                                    return_inverse=True)
+    order = np.argsort(first)
+    remap = np.empty_like(order)
+    remap[order] = np.arange(len(order))
+    return names[order].tolist(), remap[codes]
+
+
+def _expand(rows):
+    if isinstance(rows, slice):
+        return np.arange(rows.start, rows.stop)
+    return rows
+
@@ -0,0 +1,209 @@
+'''Cache of model orbits
+
+Computing the closed orbit of the model for a changed magnet takes
+long. The plot and fit processes compute the same orbits again and
+again. :class:`ModelCache` keeps the results
+
+    * in memory: a least recently used cache of bounded size
+    * on disk: one compressed numpy file per result. The file name is
+      derived from the content of the key, thus it can be shared by
+      different processes and runs.
+
+The key includes a hash of the lattice (see :func:`lattice_hash`), so
+that results of a modified lattice are not mixed up.
+
+The cache directory is taken from the environment variable
+`BACT2_MODEL_CACHE`; set it to an empty string to keep the cache in
+memory only.
+'''
+import collections
+import hashlib
+import json
+import logging
+import numbers
+import os
+import tempfile
+
+import numpy as np
+
+logger = logging.getLogger('bact2')
+
+#: environment variable defining the cache directory
+cache_dir_env = 'BACT2_MODEL_CACHE'
+
+
+def default_cache_dir():
+    '''cache directory to use if none is given
+    '''
+    try:
+        return os.environ[cache_dir_env]
+    except KeyError:
+        pass
+    return os.path.join(os.path.expanduser('~'), '.cache', 'bact2',
+                        'model_orbits')
+
+
+def _key_part(value):
+    '''value in a form which does not depend on the python process
+    '''
+    if isinstance(value, (bool, np.bool_)) or value is None:
+        return value
+    if isinstance(value, numbers.Integral):
+        return int(value)
+    if isinstance(value, numbers.Real):
+        # repr is exact for floats
+        return repr(float(value))
+    if isinstance(value, str):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [_key_part(v) for v in value]
+    txt = f'Can not use value {value!r} of type {type(value)} in cache key'
+    raise AssertionError(txt)
+
+
+def make_key(*args, **kws):
+    '''content based key for the arguments
+
+    Only numbers, strings, None and lists or tuples of these are
+    supported.
+    '''
+    parts = [_key_part(args), sorted((k, _key_part(v)) for k, v in kws.items())]
+    txt = json.dumps(parts, separators=(',', ':'))
+    return hashlib.sha1(txt.encode('utf8')).hexdigest()
+
+
+def lattice_hash(elements):
+    '''hash of the scalar properties of the lattice elements
+
+    Args:
+        elements: sequence of lattice elements (e.g. ocelot elements)
+
+    Attributes which are not numbers or strings (e.g. transfer maps)
+    are ignored.
+    '''
+    h = hashlib.sha1()
+    for elem in elements:
+        attrs = [type(elem).__name__]
+        for name, value in sorted(vars(elem).items()):
+            try:
+                value = _key_part(value)
+            except AssertionError:
+                continue
+            attrs.append([name, value])
+        h.update(json.dumps(attrs, separators=(',', ':')).encode('utf8'))
+    return h.hexdigest()
+
+
+class ModelCache:
+    '''Two level cache: memory (least recently used) and disk
+
+    Args:
+        cache_dir: directory of the disk cache. If None
+                   :func:`default_cache_dir` is used. If empty or False
+                   data are only kept in memory
+        maxsize:   number of entries kept in memory
+
+    Values are dictionaries of numpy arrays.
+    '''
+    def __init__(self, cache_dir=None, maxsize=256):
+        if cache_dir is None:
+            cache_dir = default_cache_dir()
+
+        if cache_dir:
+            try:
+                os.makedirs(cache_dir, exist_ok=True)
+            except OSError as exc:
+                logger.warning(f'Can not use model cache dir {cache_dir}:'
+                               f' {exc}; keeping models in memory only')
+                cache_dir = None
+        else:
+            cache_dir = None
+
+        assert(maxsize > 0)
+        self._cache_dir = cache_dir
+        self._maxsize = maxsize
+        self._memory = collections.OrderedDict()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    @property
+    def cache_dir(self):
+        return self._cache_dir
+
+    def _path(self, key):
+        return os.path.join(self._cache_dir, key[:2], key + '.npz')
+
+    def _remember(self, key, value):
+        self._memory[key] = value
+        self._memory.move_to_end(key)
+        while len(self._memory) > self._maxsize:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        if self._cache_dir is None:
+            return None
+        try:
+            with np.load(self._path(key), allow_pickle=False) as data:
+                return {name: data[name] for name in data.files}
+        except (OSError, ValueError):
+            # not found or incompletely written
+            return None
+
+    def _store(self, key, value):
+        if self._cache_dir is None:
+            return
+        path = self._path(key)
+        dir_name = os.path.dirname(path)
+        try:
+            os.makedirs(dir_name, exist_ok=True)
+            # written under a temporary name: other processes shall
+            # not see a partial file
+            fd, tmp = tempfile.mkstemp(dir=dir_name, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as fp:
+                np.savez_compressed(fp, **value)
+            os.replace(tmp, path)
+        except OSError as exc:
+            logger.warning(f'Could not store model to cache {path}: {exc}')
+
+    def get(self, key):
+        '''cached value or None if not found
+        '''
+        try:
+            value = self._memory[key]
+        except KeyError:
+            pass
+        else:
+            self._memory.move_to_end(key)
+            self.hits += 1
+            return value
+
+        value = self._load(key)
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.disk_hits += 1
+        self._remember(key, value)
+        return value
+
+    def put(self, key, value):
+        value = {name: np.asarray(v) for name, v in value.items()}
+        self._remember(key, value)
+        self._store(key, value)
+        return value
+
+    def get_or_compute(self, key, compute):
+        '''cached value, computed and stored if not found
+
+        Args:
+            key:     as returned by :func:`make_key`
+            compute: function without arguments returning the value
+        '''
+        value = self.get(key)
+        if value is None:
+            value = self.put(key, compute())
+        return value
+
+    def clear_memory(self):
+        self._memory.clear()
@@ -1,8 +1,8 @@
 from . import reference_orbit, model_fit_funcs, magnet_info
+from .model_cache import ModelCache, lattice_hash, make_key
 
 import scipy.optimize
 import numpy as np
-import functools
 import logging
 import enum
 
@@ -31,8 +31,58 @@ def select_bpm_data_in_model(ds, arrays):
     return ds_m, r
 
 
+def _orbit_to_arrays(offset):
+    '''model orbit as dictionary of arrays as stored in the cache
+    '''
+    r = {}
+    for part in ('bpm', 'trace'):
+        data = getattr(offset, part)
+        for coor in ('x', 'y', 's'):
+            r[f'{part}_{coor}'] = getattr(data, coor)
+    return r
+
+
+def _combine_arrays(a, b, fa, fb):
+    '''fa * a + fb * b for the orbit arrays, keeping the positions
+    '''
+    r = {}
+    for name, val in a.items():
+        if name.endswith('_s'):
+            r[name] = val
+        else:
+            r[name] = fa * val + fb * b[name]
+    return r
+
+
+def _arrays_to_orbit(arrays):
+    def od(part):
+        return reference_orbit.OrbitData(
+            x=arrays[f'{part}_x'], y=arrays[f'{part}_y'], s=arrays[f'{part}_s']
+        )
+    return reference_orbit.OrbitBpmTrace(bpm=od('bpm'), trace=od('trace'))
+
+
 class OrbitOffsetProcessor:
-    def __init__(self, **kws):
+    '''
+
+    Args:
+        model_cache:     cache for the computed model orbits. If None a
+                         :class:`bact2.applib.transverse_lib.model_cache.ModelCache`
+                         using the default cache directory is created
+        linear_response: if True the orbit for a steerer kick is derived
+                         from the response to a kick of
+                         :attr:`reference_angle`. Otherwise the model
+                         is computed for each kick
+        second_order:    add a quadratic term to the linear response.
+                         It is derived from the orbits computed for
+                         +/- :attr:`reference_angle`
+
+    For small kicks the orbit depends linearly on the kick angle. Then
+    the linear response requires one model computation per steerer
+    (two with the second order term) instead of one for each scale.
+    '''
+    def __init__(self, model_cache=None, linear_response=False,
+                 second_order=False, **kws):
         orbit = reference_orbit.OrbitCalculator(**kws)
 
         orbit_data_ref = orbit.orbitData()
@@ -46,23 +96,88 @@ class OrbitOffsetProcessor:
         # 1 urad reference angle
         self.reference_angle = 1e-6
 
-    @functools.lru_cache(maxsize=None)
+        if model_cache is None:
+            model_cache = ModelCache()
+        self.model_cache = model_cache
+        self.lattice_hash = lattice_hash(orbit.cell)
+
+        self.linear_response = linear_response
+        self.second_order = second_order
+        self._response_terms = {}
+
+    def cached_model(self, compute, *args, **kws):
+        '''model orbit computed by compute or taken from the cache
+
+        Args:
+            compute: function without arguments computing the orbit
+                     offset
+            args:    identify the model (together with the lattice)
+        '''
+        key = make_key(self.lattice_hash, *args, **kws)
+
+        def compute_arrays():
+            return _orbit_to_arrays(compute())
+
+        arrays = self.model_cache.get_or_compute(key, compute_arrays)
+        return _arrays_to_orbit(arrays)
+
     def compute_reference_model(self, magnet_name=None, scale=None):
 
         assert(magnet_name is not None)
 
-        scaled_angle = self.reference_angle * scale
-        logger.info(
-            f'Computing model for scale {scaled_angle*1000:.3f} mrad'
-            f' and magnet {magnet_name}'
-        )
+        if self.linear_response:
+            return self._linear_response_model(magnet_name, scale)
+        return self._kick_model(magnet_name, scale)
 
-        od = self.orbit.orbitCalculatorForChangedMagnet(name=magnet_name,
-                                                        angle=scaled_angle)
-        off_orbit = od.orbitData()
-        offset = self.orbit_offset_filter(off_orbit)
+    def response_terms(self, magnet_name):
+        '''linear and quadratic response to a kick of the reference angle
 
-        return offset
+        Returns:
+            linear, quadratic: orbit arrays (as stored in the model
+            cache). quadratic is None if :attr:`second_order` is not set
+        '''
+        key = (magnet_name, self.reference_angle, self.second_order)
+        try:
+            return self._response_terms[key]
+        except KeyError:
+            pass
+
+        plus = _orbit_to_arrays(self._kick_model(magnet_name, 1.0))
+        if self.second_order:
+            minus = _orbit_to_arrays(self._kick_model(magnet_name, -1.0))
+            linear = _combine_arrays(plus, minus, .5, -.5)
+            quadratic = _combine_arrays(plus, minus, .5, .5)
+        else:
+            linear, quadratic = plus, None
+
+        r = linear, quadratic
+        self._response_terms[key] = r
+        return r
+
+    def _linear_response_model(self, magnet_name, scale):
+        linear, quadratic = self.response_terms(magnet_name)
+        if quadratic is None:
+            arrays = _combine_arrays(linear, linear, scale, 0)
+        else:
+            arrays = _combine_arrays(linear, quadratic, scale, scale**2)
+        return _arrays_to_orbit(arrays)
+
+    def _kick_model(self, magnet_name, scale):
+        scaled_angle = self.reference_angle * scale
+
+        def compute():
+            logger.info(
+                f'Computing model for scale {scaled_angle*1000:.3f} mrad'
+                f' and magnet {magnet_name}'
+            )
+            od = self.orbit.orbitCalculatorForChangedMagnet(name=magnet_name,
+                                                            angle=scaled_angle,
+                                                            incremental=True)
+            off_orbit = od.orbitData()
+            offset = self.orbit_offset_filter(off_orbit)
+            return offset
+
+        return self.cached_model(compute, 'kick', magnet_name, scaled_angle)
 
     def _compute(self, magnet_name=None, scale=None, scale_to_bpm_units=False,
                  **kws):
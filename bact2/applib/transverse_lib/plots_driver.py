@@ -0,0 +1,232 @@
+'''Create the plots of all kickers within one python process
+
+Alternative to the make file generated by
+:mod:`bact2.applib.transverse_lib.plots_makefile`: the processed data are
+loaded once and the plots are distributed to worker processes. These
+are forked from the main process so that they share the loaded data and
+the imported modules.
+
+Plots which are newer than the processed data are not created again
+(unless forced).
+
+Main entry points:
+   * :func:`main_func`
+   * :func:`build_plots`
+'''
+import argparse
+import concurrent.futures
+import logging
+import multiprocessing
+import os.path
+import time
+
+import matplotlib
+import matplotlib.pyplot as plt
+
+from . import process_model_fits, process_plots, processed_store
+from .plots_makefile import kicker_names_of, plot_targets
+
+logger = logging.getLogger('bact2')
+
+#: state shared with the (forked) worker processes
+_shared = {}
+
+
+def _input_file_name(file_name):
+    '''file whose modification time tells when the data were processed
+    '''
+    if os.path.isdir(file_name):
+        return os.path.join(file_name, processed_store.store_index_name)
+    return file_name
+
+
+def _is_up_to_date(target_file_path, input_mtime):
+    try:
+        return os.path.getmtime(target_file_path) >= input_mtime
+    except OSError:
+        return False
+
+
+def _select_kicker(name):
+    obj = _shared['obj']
+    try:
+        return obj.select_kicker(name)
+    except AttributeError:
+        # objects pickled by older versions
+        df = obj.processed_dataframe
+        t_kicker_col = df.loc[:, _shared['column_with_kicker_name']]
+        return df.loc[t_kicker_col == name]
+
+
+def _build_target(kind, name, target_file_path):
+    '''Create one plot file. Executed in the worker processes
+    '''
+    start = time.time()
+    df = _select_kicker(name)
+    if kind == 'agnostic':
+        process_plots.process_target(
+            df, target_file_path,
+            process_kicker_func=_shared['process_kicker_func'])
+    else:
+        process_model_fits.process_target(
+            df, target_file_path,
+            process_func=_shared['process_fit_func'])
+    # workers are reused: do not accumulate figures
+    plt.close('all')
+    return time.time() - start
+
+
+def _init_worker(shared):
+    '''Executed once in each worker process
+
+    Forked workers inherit the shared state anyway. Others (e.g.
+    spawned ones) receive it pickled.
+    '''
+    _shared.update(shared)
+
+
+def _executor(jobs):
+    try:
+        mp_context = multiprocessing.get_context('fork')
+    except ValueError:
+        logger.warning('fork not available: the processed data are'
+                       ' pickled to each worker process')
+        mp_context = None
+    return concurrent.futures.ProcessPoolExecutor(
+        max_workers=jobs, mp_context=mp_context, initializer=_init_worker,
+        initargs=(dict(_shared),))
+
+
+def build_plots(obj, plots_dir, targets, process_kicker_func=None,
+                process_fit_func=None, column_with_kicker_name=None,
+                jobs=None):
+    '''Create the plot files
+
+    Args:
+        obj:                     processed data
+        plots_dir:               directory to put the plots to
+        targets:                 list of (kind, kicker name, file name)
+                                 as returned by
+                                 :func:`bact2.applib.transverse_lib.plots_makefile.plot_targets`
+        process_kicker_func:     function creating the model agnostic
+                                 plots
+        process_fit_func:        function fitting the model and plotting
+        column_with_kicker_name: only used for objects pickled by older
+                                 versions
+        jobs:                    number of worker processes. If 1 all
+                                 plots are made in this process. None
+                                 uses one per cpu
+
+    Returns:
+        list of target files which failed
+    '''
+    _shared.update(obj=obj, process_kicker_func=process_kicker_func,
+                   process_fit_func=process_fit_func,
+                   column_with_kicker_name=column_with_kicker_name)
+
+    n_targets = len(targets)
+    failed = []
+    start = time.time()
+
+    def report(cnt, target_file_path, dt=None, exc=None):
+        if exc is not None:
+            logger.error(f'[{cnt}/{n_targets}] {target_file_path} failed: {exc}')
+            failed.append(target_file_path)
+            return
+        logger.info(f'[{cnt}/{n_targets}] {target_file_path}'
+                    f' required {dt:.1f} s')
+
+    paths = [(kind, name, os.path.join(plots_dir, file_name))
+             for kind, name, file_name in targets]
+
+    if jobs == 1:
+        for cnt, (kind, name, path) in enumerate(paths, 1):
+            try:
+                dt = _build_target(kind, name, path)
+            except Exception as exc:
+                report(cnt, path, exc=exc)
+            else:
+                report(cnt, path, dt=dt)
+    else:
+        with _executor(jobs) as executor:
+            futures = {
+                executor.submit(_build_target, kind, name, path): path
+                for kind, name, path in paths
+            }
+            done = concurrent.futures.as_completed(futures)
+            for cnt, fut in enumerate(done, 1):
+                path = futures[fut]
+                try:
+                    dt = fut.result()
+                except Exception as exc:
+                    report(cnt, path, exc=exc)
+                else:
+                    report(cnt, path, dt=dt)
+
+    dt = time.time() - start
+    logger.info(f'Created {n_targets - len(failed)} of {n_targets} plot files'
+                f' in {dt:.1f} s')
+    return failed
+
+
+def main_func(pickle_file_name=None, column_with_kicker_name=None,
+              plots_dir=None, process_kicker_func=None,
+              process_fit_func=None, argv=None):
+    '''Create all plots for the processed data
+
+    Args:
+        argv: command line arguments; see `--help`
+
+    Returns:
+        number of plot files which could not be made
+    '''
+    assert(pickle_file_name is not None)
+    assert(column_with_kicker_name is not None)
+    assert(plots_dir is not None)
+    assert(process_kicker_func is not None)
+    assert(process_fit_func is not None)
+
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('--jobs', '-j', type=int, default=None,
+                        help='number of worker processes (default: cpus)')
+    parser.add_argument('--force', '-B', action='store_true',
+                        help='create plots even if they are up to date')
+    parser.add_argument('--plots-dir', default=plots_dir,
+                        help=f'output directory (default: {plots_dir})')
+    parser.add_argument('--input', default=pickle_file_name,
+                        help='processed data (default: %(default)s)')
+    args = parser.parse_args(argv)
+
+    # Plots are only written to files
+    matplotlib.use('Agg')
+
+    logger.info(f'Using processed data stored in {args.input}')
+    obj = processed_store.load(args.input)
+    input_mtime = os.path.getmtime(_input_file_name(args.input))
+
+    kicker_names = kicker_names_of(obj, column_with_kicker_name)
+    targets = plot_targets(kicker_names)
+    n_all = len(targets)
+    if not args.force:
+        targets = [
+            (kind, name, file_name)
+            for kind, name, file_name in targets
+            if not _is_up_to_date(os.path.join(args.plots_dir, file_name),
+                                  input_mtime)
+        ]
+    logger.info(f'{len(targets)} of {n_all} plot files need to be created')
+    if not targets:
+        return 0
+
+    os.makedirs(args.plots_dir, exist_ok=True)
+    # Load the data before forking so that the workers share it
+    if not isinstance(obj, processed_store.ProcessedStore):
+        obj.processed_dataframe
+        getattr(obj, 'kicker_index', None)
+
+    failed = build_plots(obj, args.plots_dir, targets,
+                         process_kicker_func=process_kicker_func,
+                         process_fit_func=process_fit_func,
+                         column_with_kicker_name=column_with_kicker_name,
+                         jobs=args.jobs)
+    return len(failed)
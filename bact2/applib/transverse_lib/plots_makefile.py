@@ -1,10 +1,10 @@
 '''Generates make file to generate the different plots
 '''
 import bact2
-import gzip
-import pickle
+from bact2.applib.transverse_lib import processed_store
 import io
 import os.path
+import pandas as pd
 
 #: Header of make file
 header = '''# Automatic generated file
@@ -23,6 +23,49 @@ def create_target_dependency_list(target_name, t_list):
     return txt
 
 
+def plot_targets(kicker_names):
+    '''plot files to create for the kickers
+
+    Returns:
+        a list of (kind, kicker name, file name). Kind is one of
+        'agnostic' (model agnostic plots), 'fit_1d' or 'fit_2d'
+    '''
+    targets = []
+    cnt = 0
+    for name in kicker_names:
+        cnt += 1
+        horizontal = name[0] == 'h'
+        if horizontal:
+            suffix = 'x'
+        else:
+            suffix = 'y'
+
+        # the agnostic fits
+        targets.append(('agnostic', name,
+                        f'pltm_{cnt:03d}_{name}_main_{suffix}.pdf'))
+        # the model fits
+        targets.append(('fit_1d', name,
+                        f'pltfit_{cnt:03d}_{name}_1d_{suffix}.pdf'))
+        targets.append(('fit_2d', name,
+                        f'pltfit_{cnt:03d}_{name}_2d_{suffix}.pdf'))
+    return targets
+
+
+def kicker_names_of(obj, column_with_kicker_name):
+    '''names of the kickers found in the processed data
+
+    The names are in the order the kickers were measured. This order
+    is stable: the counter in the plot file names depends on it.
+    '''
+    try:
+        return obj.kicker_index.names
+    except AttributeError:
+        # objects pickled by older versions
+        df = obj.dataframe
+        kicker_names = df.loc[:, column_with_kicker_name]
+        return list(pd.unique(kicker_names))
+
+
 def main_func(makefile_name=None, pickle_file_name=None,
               column_with_kicker_name=None,
               app_dir=None, plots_dir=None):
@@ -34,18 +77,19 @@ def main_func(makefile_name=None, pickle_file_name=None,
     assert(plots_dir is not None)
 
 
-    with gzip.open(pickle_file_name) as fp:
-        obj = pickle.load(fp)
-    df = obj.dataframe
+    obj = processed_store.load(pickle_file_name)
+    if isinstance(obj, processed_store.ProcessedStore):
+        # make can not track the modification of a directory's content
+        pickle_file_name = os.path.join(
+            pickle_file_name, processed_store.store_index_name)
 
-    kicker_names = df.loc[:, column_with_kicker_name]
-    kicker_names = set(kicker_names)
+    kicker_names = kicker_names_of(obj, column_with_kicker_name)
 
     bact2_dir = os.path.dirname(bact2.__file__)
     buf = io.StringIO()
     buf.write(header)
 
-    print(f'Using pickle stored in {pickle_file_name}')
+    print(f'Using processed data stored in {pickle_file_name}')
 
     # Put scripts to proper place
     buf.write(f'BACT2_DIR={bact2_dir}\n')
@@ -61,35 +105,19 @@ def main_func(makefile_name=None, pickle_file_name=None,
     all_files_fit_1d = []
     all_files_fit_2d = []
 
-    cnt = 0
-    for name in kicker_names:
-        cnt += 1
-        horizontal = name[0] == 'h'
-        if horizontal:
-            suffix = 'x'
+    for kind, name, file_name in plot_targets(kicker_names):
+        target_file = '${PLOT_DIR}/' + file_name
+        if kind == 'agnostic':
+            all_files_agnostic.append(target_file)
+            script = '${SCRIPT_NAME}'
+        elif kind == 'fit_1d':
+            all_files_fit_1d.append(target_file)
+            script = '${SCRIPT_NAME_FIT}'
         else:
-            suffix = 'y'
-
-        # the agnostic fits
-        target_file = ('${PLOT_DIR}/' +
-                       f'pltm_{cnt:03d}_{name}_main_{suffix}.pdf')
-        all_files_agnostic.append(target_file)
-        buf.write(f'{target_file}' + ' : ${PICKLE_FILE}\n')
-        buf.write('\t${PYTHON3} ${SCRIPT_NAME} $< $@ \n\n')
-
-        # the model fits
-        target_file = ('${PLOT_DIR}/' +
-                       f'pltfit_{cnt:03d}_{name}_1d_{suffix}.pdf')
-        all_files_fit_1d.append(target_file)
-        buf.write(f'{target_file}' + ' : ${PICKLE_FILE}\n')
-        buf.write('\t${PYTHON3} ${SCRIPT_NAME_FIT} $< $@ \n\n')
-
-        # the model fits
-        target_file = ('${PLOT_DIR}/' +
-                       f'pltfit_{cnt:03d}_{name}_2d_{suffix}.pdf')
-        all_files_fit_2d.append(target_file)
+            all_files_fit_2d.append(target_file)
+            script = '${SCRIPT_NAME_FIT}'
         buf.write(f'{target_file}' + ' : ${PICKLE_FILE}\n')
-        buf.write('\t${PYTHON3} ${SCRIPT_NAME_FIT} $< $@ \n\n')
+        buf.write('\t${PYTHON3} ' + script + ' $< $@ \n\n')
 
     txt = create_target_dependency_list('all_files_agnostic', all_files_agnostic)
     buf.write(txt)
@@ -3,6 +3,7 @@
 import logging
 from ..utils import utils as m_u
 from . import bpm_data
+from .kicker_index import KickerIndex
 from ...pandas.dataframe import df_aggregate as dfg
 import pandas as pd
 import numpy as np
@@ -84,6 +85,10 @@ class ProcessedBPMDataCommon:
     column_for_selected_device_indep = None
     column_for_selected_device_indep_ref = None
 
+    #: store the vectors of the processed dataframe as
+    #: :class:`bact2.pandas.dataframe.vector_array.VectorArray`
+    vector_array = True
+
     def __init__(self, df, columns_to_process=None):
 
         self._orig_df = df
@@ -92,6 +97,7 @@ class ProcessedBPMDataCommon:
         self._measurement = None
         self._measurement_fit_data = None
         self._df_wr = None
+        self._kicker_index = None
 
         if columns_to_process is None:
             columns_to_process = cols_to_process_default
@@ -151,6 +157,22 @@ class ProcessedBPMDataCommon:
             self._to_processed_dataframe()
         return self._df_wr
 
+    @property
+    def kicker_index(self):
+        '''Rows of each kicker in the processed dataframe
+
+        See :class:`bact2.applib.transverse_lib.kicker_index.KickerIndex`
+        '''
+        # Objects pickled by older versions do not have this attribute
+        if getattr(self, '_kicker_index', None) is None:
+            self._to_kicker_index()
+        return self._kicker_index
+
+    def select_kicker(self, name):
+        '''processed dataframe of one kicker
+        '''
+        return self.kicker_index.select(self.processed_dataframe, name)
+
     # ----------------------------------------------------------------------
     # Lazy procecssing
     def _to_dataframe_step1(self):
@@ -234,4 +256,13 @@ class ProcessedBPMDataCommon:
                                       indep_ref_column=sel_dev_indep_ref)
         # df_wr = bpm_data.add_bpm_scale(df_wr, copy=False, column_name=sel_dev)
         df_wr = bpm_data.add_bpm_deviation_from_fit(df_wr, copy=False)
+        if self.vector_array:
+            df_wr = dfg.df_vectors_convert(df_wr.infer_objects(), copy=False,
+                                           vector_array=True)
         self._df_wr = df_wr
+
+    def _to_kicker_index(self):
+        sel_dev = self.column_for_selected_device
+        assert(sel_dev is not None)
+        index = KickerIndex.from_dataframe(self.processed_dataframe, sel_dev)
+        self._kicker_index = index
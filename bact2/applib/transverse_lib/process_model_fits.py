@@ -1,10 +1,10 @@
 from bact2.applib.transverse_lib import reference_orbit, model_fits, model_fit_funcs
+from bact2.applib.transverse_lib import processed_store
 from bact2.applib.response_matrix import commons
+from bact2.pandas.dataframe.vector_array import column_to_matrix
 import matplotlib.pyplot as plt
 import numpy as np
 
-import gzip
-import pickle
 import logging
 import os.path
 import sys
@@ -23,12 +23,12 @@ def prepare_bpm_data(df_sel, ref_row=None):
     x_r = df_sel.bpm_waveform_x_rms
     y_r = df_sel.bpm_waveform_y_rms
 
-    ds = np.array(ds.tolist(), np.float_)
-    x_r = np.array(x_r.tolist(), np.float_)
-    y_r = np.array(y_r.tolist(), np.float_)
+    ds = column_to_matrix(ds, np.float_)
+    x_r = column_to_matrix(x_r, np.float_)
+    y_r = column_to_matrix(y_r, np.float_)
 
-    x = np.array(x.tolist(), np.float_)
-    y = np.array(y.tolist(), np.float_)
+    x = column_to_matrix(x, np.float_)
+    y = column_to_matrix(y, np.float_)
     
     if ref_row is not None:
         ref = df_sel.iloc[ref_row, :]
@@ -223,11 +223,12 @@ def plot_fit_data(ref_data=None, bpm_data=None, bpm_data_m=None, offset=None,
     fig.savefig(savename)
 
 
-def main_func(process_func):
-    pickle_file_name = sys.argv[1]
-    target_file_path = sys.argv[2]
+def parse_target_name(target_file_path):
+    '''Information coded in the file name of a model fit plot
 
-    dir_name = os.path.dirname(target_file_path)
+    Returns:
+        kicker_name, coordinate, last_2D
+    '''
     target_file_name = os.path.basename(target_file_path)
     file_name, ext = os.path.splitext(target_file_name)
 
@@ -246,14 +247,20 @@ def main_func(process_func):
         )
         raise AssertionError(txt)
 
-    logger.info(
-        f'Processing kicker {kicker_name} main coordinate {coordinate}'
-    )
+    return kicker_name, coordinate, last_2D
+
+
+def process_target(df, target_file_path, process_func=None):
+    '''Fit the model for the kicker of the target file and plot it
 
-    with gzip.open(pickle_file_name) as fp:
-        obj = pickle.load(fp)
+    The plots are made for both coordinates. The plot of the other
+    coordinate is stored next to the target file.
+    '''
+    assert(process_func is not None)
 
-    df = obj.processed_dataframe
+    dir_name = os.path.dirname(target_file_path)
+    target_file_name = os.path.basename(target_file_path)
+    kicker_name, coordinate, last_2D = parse_target_name(target_file_path)
 
     for t_coordinate in ['x', 'y']:
         if t_coordinate != coordinate:
@@ -264,3 +271,23 @@ def main_func(process_func):
         savepath = os.path.join(dir_name, savename)
         process_func(df, kicker_name, coordinate=t_coordinate,
                      savename=savepath, last_2D=last_2D)
+
+
+def main_func(process_func, column_with_kicker_name=None):
+    pickle_file_name = sys.argv[1]
+    target_file_path = sys.argv[2]
+
+    kicker_name, coordinate, last_2D = parse_target_name(target_file_path)
+
+    logger.info(
+        f'Processing kicker {kicker_name} main coordinate {coordinate}'
+    )
+
+    if column_with_kicker_name is None:
+        obj = processed_store.load(pickle_file_name)
+        df = obj.processed_dataframe
+    else:
+        df = processed_store.load_kicker(pickle_file_name, kicker_name,
+                                         column_with_kicker_name)
+
+    process_target(df, target_file_path, process_func=process_func)
@@ -1,12 +1,35 @@
 '''Model agnostic plots of the measured data
 '''
-import gzip
-import pickle
+from bact2.applib.transverse_lib import processed_store
 import datetime
 import os
 import sys
 
 
+def kicker_name_from_target(target_file_path):
+    '''kicker name as coded in the plot file name
+    '''
+    target_file_name = os.path.basename(target_file_path)
+    tmp = target_file_name.split('_')
+    return tmp[2]
+
+
+def process_target(df, target_file_path, process_kicker_func=None):
+    '''Create the model agnostic plots of the kicker of target file
+
+    Args:
+        df:                  processed dataframe of the kicker
+        target_file_path:    plot file to produce
+        process_kicker_func: function creating the plots
+    '''
+    assert(process_kicker_func is not None)
+
+    target_file_name = os.path.basename(target_file_path)
+    plot_dir = os.path.dirname(target_file_path)
+    process_kicker_func(df, plot_dir=plot_dir,
+                        target_file_name=target_file_name)
+
+
 def main_func(process_kicker_func=None, column_with_kicker_name=None):
 
     assert(column_with_kicker_name is not None)
@@ -15,30 +38,20 @@ def main_func(process_kicker_func=None, column_with_kicker_name=None):
     pickle_file = sys.argv[1]
     target_file_path = sys.argv[2]
 
-    target_file_name = os.path.basename(target_file_path)
-    plot_dir = os.path.dirname(target_file_path)
-    file_name, ext = os.path.split(target_file_name)
-
-    # preprocess the name
-    tmp = target_file_name.split('_')
-    kicker_name = tmp[2]
+    kicker_name = kicker_name_from_target(target_file_path)
 
     print(f'Processing kicker {kicker_name}')
 
     start_timestamp = datetime.datetime.now()
 
-    with gzip.open(pickle_file) as fp:
-        obj = pickle.load(fp)
-
-    df = obj.processed_dataframe
-    t_kicker_col = df.loc[:, column_with_kicker_name]
-    one_steerer = df.loc[t_kicker_col == kicker_name]
+    one_steerer = processed_store.load_kicker(pickle_file, kicker_name,
+                                              column_with_kicker_name)
 
     preprocess_timestamp = datetime.datetime.now()
     dtp = preprocess_timestamp - start_timestamp
 
-    process_kicker_func(one_steerer, plot_dir=plot_dir,
-                        target_file_name=target_file_name)
+    process_target(one_steerer, target_file_path,
+                   process_kicker_func=process_kicker_func)
 
     dt = datetime.datetime.now() - start_timestamp
     print(f'plotting kicker {kicker_name} required {dt}'
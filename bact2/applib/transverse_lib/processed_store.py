@@ -0,0 +1,559 @@
+'''Store processed measurement data
+
+The measurement data are processed device by device (e.g. steerer by
+steerer). Two formats are supported:
+
+    * a gzip compressed pickle stream: the processed chunks are written
+      one after the other, so that only one chunk has to be kept in
+      memory while writing.
+    * a column store: a directory containing one block per kicker. Each
+      block stores each column of the dataframes as `.npy` file. A
+      small json index lists the blocks. The columns are loaded as
+      memory maps, so that the data of one kicker can be accessed
+      without reading the rest of the measurement.
+
+Main entry points:
+   * :func:`write_chunks`
+   * :func:`write_store`
+   * :func:`load`
+   * :func:`load_kicker`
+'''
+import gzip
+import json
+import logging
+import os
+import pickle
+import re
+import shutil
+
+import numpy as np
+import pandas as pd
+
+from ...pandas.dataframe.vector_array import VectorArray, to_vector_array
+from .kicker_index import KickerIndex
+
+logger = logging.getLogger('bact2')
+
+#: marks a stream of processed chunks
+chunks_header = {'format': 'bact2.processed_chunks', 'version': 1}
+
+
+class ProcessedBPMDataChunks:
+    '''Processed data of a measurement split up in chunks
+
+    Args:
+        chunks: processed data, one per device, as provided by
+                :class:`bact2.applib.transverse_lib.process_dataframe.ProcessedBPMDataCommon`
+
+    Provides the same dataframes as
+    :class:`ProcessedBPMDataCommon`. These are concatenated from the
+    chunks. The measurement count is restarted for each chunk; it is
+    offset here as if the measurement was counted in one go.
+    '''
+    def __init__(self, chunks):
+        self._chunks = list(chunks)
+        self._cache = {}
+        self._offsets = None
+
+    @property
+    def chunks(self):
+        return self._chunks
+
+    def _measurement_offsets(self):
+        if self._offsets is None:
+            offsets = []
+            offset = 0
+            for chunk in self._chunks:
+                offsets.append(offset)
+                offset += int(np.max(chunk.dataframe.measurement)) + 1
+            self._offsets = offsets
+        return self._offsets
+
+    def _concat(self, attr, measurement_index=False):
+        try:
+            return self._cache[attr]
+        except KeyError:
+            pass
+
+        offsets = self._measurement_offsets()
+        frames = []
+        for offset, chunk in zip(offsets, self._chunks):
+            df = getattr(chunk, attr)
+            df = _offset_measurement(df, offset, measurement_index)
+            frames.append(df)
+
+        r = pd.concat(frames)
+        self._cache[attr] = r
+        return r
+
+    @property
+    def original_dataframe(self):
+        return self._concat('original_dataframe')
+
+    @property
+    def dataframe(self):
+        return self._concat('dataframe')
+
+    @property
+    def agg(self):
+        return self._concat('agg', measurement_index=True)
+
+    @property
+    def measurement_data(self):
+        return self._concat('measurement_data', measurement_index=True)
+
+    @property
+    def measurement_fit_data(self):
+        return self._concat('measurement_fit_data')
+
+    @property
+    def processed_dataframe(self):
+        return self._concat('processed_dataframe', measurement_index=True)
+
+    @property
+    def kicker_index(self):
+        '''Rows of each kicker in the processed dataframe
+        '''
+        try:
+            return self._cache['kicker_index']
+        except KeyError:
+            pass
+
+        indices = [_kicker_index_of(chunk) for chunk in self._chunks]
+        lengths = [len(chunk.processed_dataframe) for chunk in self._chunks]
+        index = KickerIndex.concat(indices, lengths)
+        self._cache['kicker_index'] = index
+        return index
+
+    def select_kicker(self, name):
+        '''processed dataframe of one kicker
+        '''
+        return self.kicker_index.select(self.processed_dataframe, name)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state['_cache'] = {}
+        return state
+
+
+def _kicker_index_of(processed):
+    try:
+        return processed.kicker_index
+    except AttributeError:
+        # pickled by a version without kicker index
+        column = processed.column_for_selected_device
+        return KickerIndex.from_dataframe(processed.processed_dataframe,
+                                          column)
+
+
+def _offset_measurement(df, offset, measurement_index=False):
+    '''Add offset to the measurement count (and the index if requested)
+    '''
+    if not offset or 'measurement' not in df.columns:
+        return df
+    df = df.copy()
+    df.loc[:, 'measurement'] = df.measurement + offset
+    if measurement_index:
+        df.index = df.index + offset
+    return df
+
+
+def _is_chunks_header(obj):
+    if not isinstance(obj, dict):
+        return False
+    return obj.get('format') == chunks_header['format']
+
+
+def write_chunks(file_name, processed):
+    '''Process chunks and write them to a gzip compressed pickle stream
+
+    Args:
+        file_name: name of the file to write to
+        processed: an iterable of processed data (e.g.
+                   :class:`ProcessedBPMDataCommon` instances)
+
+    Returns:
+        number of chunks written
+    '''
+    cnt = 0
+    with gzip.open(file_name, 'w') as fp:
+        pickle.dump(chunks_header, fp)
+        for p in processed:
+            # Processes the data frame
+            # All intermedidate steps are accessible
+            p.processed_dataframe
+            pickle.dump(p, fp)
+            cnt += 1
+            logger.info(f'Stored chunk {cnt} to {file_name}')
+
+    return cnt
+
+
+def _load_pickle(file_name):
+    with gzip.open(file_name) as fp:
+        obj = pickle.load(fp)
+        if not _is_chunks_header(obj):
+            return obj
+
+        chunks = []
+        while True:
+            try:
+                chunks.append(pickle.load(fp))
+            except EOFError:
+                break
+
+    return ProcessedBPMDataChunks(chunks)
+
+
+# --------------------------------------------------------------------------
+# Column store
+#: name of the index file of the column store
+store_index_name = 'index.json'
+store_header = {'format': 'bact2.processed_columns', 'version': 1}
+#: directories of the blocks
+_block_dir_pattern = re.compile(r'b\d{4}$')
+
+#: dataframes saved to the column store. The second entry flags if
+#: the index is the measurement count
+store_frames = (
+    ('dataframe', False),
+    ('processed_dataframe', True),
+)
+
+
+def is_store(file_name):
+    '''True if file_name refers to a column store (or its index)
+    '''
+    if os.path.basename(file_name) == store_index_name:
+        return True
+    return os.path.isdir(file_name)
+
+
+def _store_dir(file_name):
+    if os.path.basename(file_name) == store_index_name:
+        return os.path.dirname(file_name)
+    return file_name
+
+
+def _column_to_storage(col):
+    '''Array to save for a dataframe column and its kind
+    '''
+    values = col.array
+    if isinstance(values, VectorArray):
+        return values.matrix, 'vector'
+
+    values = col.values
+    if values.dtype != np.object_:
+        return values, 'array'
+
+    vecs = None
+    if len(values) > 0 and isinstance(values[0], np.ndarray):
+        vecs = to_vector_array(values)
+    if vecs is not None:
+        return vecs.matrix, 'vector'
+
+    if all(isinstance(v, str) for v in values):
+        return np.array(values, dtype=np.str_), 'string'
+
+    return values, 'pickle'
+
+
+def _storage_to_column(data, kind):
+    if kind == 'vector':
+        return VectorArray(data)
+    elif kind == 'string':
+        return data.astype(np.object_)
+    return data
+
+
+class StoreWriter:
+    '''Write dataframes kicker by kicker to a column store
+
+    Args:
+        dir_name:                directory of the store
+        column_with_kicker_name: column containing the kicker name
+
+    Call :meth:`close` to write the index. Used as context manager
+    the index is only written if no exception was raised. The index
+    and the blocks of a store written before are removed first: a
+    store without index is incomplete.
+    '''
+    def __init__(self, dir_name, column_with_kicker_name):
+        assert(column_with_kicker_name is not None)
+        self._dir_name = dir_name
+        self._column = column_with_kicker_name
+        self._blocks = []
+        self._kickers = {}
+        os.makedirs(dir_name, exist_ok=True)
+        self._clear()
+
+    def _clear(self):
+        '''remove the index and blocks of a previous write
+        '''
+        path = os.path.join(self._dir_name, store_index_name)
+        if os.path.exists(path):
+            os.remove(path)
+        for name in os.listdir(self._dir_name):
+            block_dir = os.path.join(self._dir_name, name)
+            if _block_dir_pattern.match(name) and os.path.isdir(block_dir):
+                shutil.rmtree(block_dir)
+
+    def _write_column(self, block_dir, file_name, col):
+        data, kind = _column_to_storage(col)
+        if kind == 'pickle':
+            file_name += '.pk'
+            with open(os.path.join(block_dir, file_name), 'wb') as fp:
+                pickle.dump(data, fp)
+        else:
+            file_name += '.npy'
+            np.save(os.path.join(block_dir, file_name), data,
+                    allow_pickle=False)
+        return {'name': col.name, 'file': file_name, 'kind': kind}
+
+    def _write_frame(self, block_dir, df):
+        columns = [
+            self._write_column(block_dir, f'c{cnt:03d}', df.loc[:, name])
+            for cnt, name in enumerate(df.columns)
+        ]
+        index = self._write_column(block_dir, 'index', df.index.to_series())
+        index['name'] = df.index.name
+        meta = {'columns': columns, 'index': index, 'n_rows': int(df.shape[0])}
+        return meta
+
+    def add(self, frames):
+        '''Add dataframes
+
+        Args:
+            frames: a dictionary name -> dataframe. The dataframes are
+                    split up by the kicker name
+        '''
+        indices = {}
+        for frame_name, df in frames.items():
+            grp = df.groupby(self._column, sort=False)
+            for name, rows in grp.indices.items():
+                indices.setdefault(name, {})[frame_name] = rows
+
+        for name, frame_rows in indices.items():
+            block_name = f'b{len(self._blocks):04d}'
+            block_dir = os.path.join(self._dir_name, block_name)
+            block = {'name': name, 'dir': block_name, 'frames': {}}
+            for frame_name, rows in frame_rows.items():
+                frame_dir = os.path.join(block_dir, frame_name)
+                os.makedirs(frame_dir, exist_ok=True)
+                df = frames[frame_name].iloc[rows]
+                block['frames'][frame_name] = self._write_frame(frame_dir, df)
+
+            self._kickers.setdefault(name, []).append(len(self._blocks))
+            self._blocks.append(block)
+            logger.debug(f'Stored block {block_name} for kicker {name}')
+
+    def close(self):
+        index = store_header.copy()
+        index['column_with_kicker_name'] = self._column
+        index['kickers'] = self._kickers
+        index['blocks'] = self._blocks
+        path = os.path.join(self._dir_name, store_index_name)
+        # readers never see a partially written index
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wt') as fp:
+            json.dump(index, fp, indent=1)
+        os.replace(tmp_path, path)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            logger.error(f'Not writing index of incomplete store {self._dir_name}')
+        # propagate exception
+        return False
+
+
+def _frames_of(processed, offset=0):
+    frames = {}
+    for frame_name, measurement_index in store_frames:
+        df = getattr(processed, frame_name)
+        frames[frame_name] = _offset_measurement(df, offset, measurement_index)
+    return frames
+
+
+def write_store(dir_name, processed, column_with_kicker_name):
+    '''Write processed data to a column store
+
+    Args:
+        dir_name:                directory of the store
+        processed:               processed data (e.g.
+                                 :class:`ProcessedBPMDataCommon`) or an
+                                 iterable of processed chunks
+        column_with_kicker_name: column containing the kicker name
+
+    Chunks are processed and written one after the other. Their
+    measurement count is offset as done by
+    :class:`ProcessedBPMDataChunks`.
+
+    Returns:
+        number of chunks written
+    '''
+    if hasattr(processed, 'processed_dataframe'):
+        processed = [processed]
+
+    cnt = 0
+    offset = 0
+    with StoreWriter(dir_name, column_with_kicker_name) as writer:
+        for p in processed:
+            writer.add(_frames_of(p, offset))
+            offset += int(np.max(p.dataframe.measurement)) + 1
+            cnt += 1
+            logger.info(f'Stored chunk {cnt} to {dir_name}')
+
+    return cnt
+
+
+class ProcessedStore:
+    '''Processed data as stored in a column store
+
+    Args:
+        dir_name: directory of the store (or its index file)
+
+    The columns are opened as (copy on write) memory maps when a block
+    is loaded. Use :meth:`load_kicker` to access the data of one kicker
+    only. The properties :attr:`dataframe` and :attr:`processed_dataframe` load
+    all blocks.
+    '''
+    def __init__(self, dir_name):
+        self._dir_name = _store_dir(dir_name)
+        path = os.path.join(self._dir_name, store_index_name)
+        with open(path, 'rt') as fp:
+            index = json.load(fp)
+
+        if index.get('format') != store_header['format']:
+            txt = f'{path} is not an index of a processed data store'
+            raise AssertionError(txt)
+
+        self._index = index
+        self._cache = {}
+
+    @property
+    def column_with_kicker_name(self):
+        return self._index['column_with_kicker_name']
+
+    @property
+    def kickers(self):
+        '''kicker names in the order they were stored
+        '''
+        return list(self._index['kickers'].keys())
+
+    def _load_frame(self, block, frame_name):
+        meta = block['frames'][frame_name]
+        frame_dir = os.path.join(self._dir_name, block['dir'], frame_name)
+
+        def read(entry):
+            path = os.path.join(frame_dir, entry['file'])
+            if entry['kind'] == 'pickle':
+                with open(path, 'rb') as fp:
+                    return pickle.load(fp)
+            data = np.load(path, mmap_mode='c')
+            return _storage_to_column(data, entry['kind'])
+
+        t_index = meta['index']
+        index = pd.Index(np.asarray(read(t_index)), name=t_index['name'])
+        data = {}
+        for entry in meta['columns']:
+            data[entry['name']] = pd.Series(read(entry), index=index,
+                                            name=entry['name'])
+        columns = [entry['name'] for entry in meta['columns']]
+        return pd.DataFrame(data, index=index, columns=columns)
+
+    @property
+    def kicker_index(self):
+        '''Rows of each kicker in :attr:`processed_dataframe`
+
+        Built from the store's index; no data are read.
+        '''
+        try:
+            return self._cache['kicker_index']
+        except KeyError:
+            pass
+
+        indices = []
+        lengths = []
+        for block in self._index['blocks']:
+            name = block['name']
+            n_rows = block['frames']['processed_dataframe']['n_rows']
+            indices.append(KickerIndex({name: slice(0, n_rows)}))
+            lengths.append(n_rows)
+        index = KickerIndex.concat(indices, lengths)
+        self._cache['kicker_index'] = index
+        return index
+
+    def select_kicker(self, name):
+        '''processed dataframe of one kicker; only its blocks are read
+        '''
+        return self.load_kicker(name)
+
+    def load_kicker(self, name, frame_name='processed_dataframe'):
+        '''dataframe containing the rows of one kicker
+        '''
+        blocks = [self._index['blocks'][i] for i in self._index['kickers'][name]]
+        frames = [self._load_frame(block, frame_name) for block in blocks]
+        if len(frames) == 1:
+            return frames[0]
+        return pd.concat(frames)
+
+    def _load_all(self, frame_name):
+        try:
+            return self._cache[frame_name]
+        except KeyError:
+            pass
+        frames = [self._load_frame(block, frame_name)
+                  for block in self._index['blocks']]
+        df = pd.concat(frames)
+        self._cache[frame_name] = df
+        return df
+
+    @property
+    def dataframe(self):
+        return self._load_all('dataframe')
+
+    @property
+    def processed_dataframe(self):
+        return self._load_all('processed_dataframe')
+
+
+def load(file_name):
+    '''Load processed data
+
+    Args:
+        file_name: a gzip compressed pickle, a column store directory or
+                   the index file of a column store
+
+    Returns:
+        a :class:`ProcessedStore` for column stores, a
+        :class:`ProcessedBPMDataChunks` if the file was written by
+        :func:`write_chunks` or the pickled object
+    '''
+    if is_store(file_name):
+        return ProcessedStore(file_name)
+    return _load_pickle(file_name)
+
+
+def load_kicker(file_name, kicker_name, column_with_kicker_name):
+    '''Processed dataframe of one kicker
+
+    Only the kicker's block is read from column stores. Pickles are
+    loaded completely and the kicker is selected using the kicker index.
+    '''
+    obj = load(file_name)
+    try:
+        select_kicker = obj.select_kicker
+    except AttributeError:
+        pass
+    else:
+        return select_kicker(kicker_name)
+
+    # objects pickled by older versions
+    df = obj.processed_dataframe
+    t_kicker_col = df.loc[:, column_with_kicker_name]
+    return df.loc[t_kicker_col == kicker_name]
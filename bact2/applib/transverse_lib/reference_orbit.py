@@ -73,6 +73,16 @@ for element in cell:
 
 
 class OrbitCalculator:
+    '''Closed orbit of the lattice
+
+    Calculators derived for a changed element (see
+    :meth:`orbitCalculatorWithNewElement`) keep a reference to the
+    calculator they were derived from. On request their lattice is
+    initialised incrementally: only the transfer map of the changed
+    element is computed, the transfer maps of all other elements are
+    reused. The response matrix used for the orbit correction is
+    reused only if the changed elements are steerers.
+    '''
     def __init__(self, cell=cell, copy=True, init_lattice=True):
 
         # Trying to avoid side effects
@@ -82,9 +92,15 @@ class OrbitCalculator:
         self.cell = cell
         self.orb = None
         self.method = None
+        self.method_tm = None
         self.lat_od = None
         self.lat = None
 
+        #: calculator this one was derived from and the names of the
+        #: elements which were changed
+        self.base = None
+        self.changed_elements = []
+
         # Lookup for the element
         self.lat_od = collections.OrderedDict()
         seq = self.cell
@@ -96,23 +112,98 @@ class OrbitCalculator:
         if init_lattice:
             self.initLattice()
 
-    def initLattice(self):
+    def _canUpdateIncrementally(self):
+        base = self.base
+        if base is None:
+            return False
+        return base.lat is not None and base.method_tm is not None
+
+    def _changesOnlyKicks(self):
+        '''True if only the angles of steerers were changed
+
+        These do not change the linear optics and thus not the
+        response matrix
+        '''
+        for name in self.changed_elements:
+            element = self.getElementbyName(name)
+            if not isinstance(element, (Hcor, Vcor)):
+                return False
+        return True
+
+    def _updatedLattice(self):
+        '''Lattice reusing the transfer maps of the base calculator
 
-        method = MethodTM()
-        lat = MagneticLattice(self.cell, method=method)
+        Only the maps of the changed elements are computed
+        '''
+        base = self.base
+        method_tm = base.method_tm
+
+        replace = {}
+        for name in self.changed_elements:
+            old_element = base.getElementbyName(name)
+            new_element = self.getElementbyName(name)
+            # Computes the transfer map of the new element only
+            MagneticLattice([new_element], method=method_tm)
+            replace[id(old_element)] = new_element
+
+        lat = _copy.copy(base.lat)
+        lat.sequence = [replace.get(id(elem), elem)
+                        for elem in base.lat.sequence]
+        return lat, method_tm
+
+    def initLattice(self, correct_orbit=True, incremental=False,
+                    reuse_response_matrix=False):
+        '''Compute the lattice, its response matrix and correct the orbit
+
+        Args:
+            correct_orbit:         apply the orbit correction. The
+                                   response matrix is only computed
+                                   if it is applied
+            incremental:           reuse the transfer maps of the base
+                                   calculator (if derived from one)
+            reuse_response_matrix: correct an incrementally derived
+                                   lattice with the response matrix of
+                                   the base lattice, even if not only
+                                   steerers were changed
+
+        The response matrix of the base lattice is used for the
+        correction of incrementally derived lattices if only steerers
+        were changed. A quadrupole change alters the response: its
+        matrix is only reused on request, e.g. as approximation for
+        small changes.
+        '''
+        incremental = incremental and self._canUpdateIncrementally()
+        reuse_response = (
+            incremental
+            and (reuse_response_matrix or self._changesOnlyKicks())
+            and self.base.orb.response_matrix is not None
+        )
+
+        if incremental:
+            lat, method_tm = self._updatedLattice()
+        else:
+            method_tm = MethodTM()
+            lat = MagneticLattice(self.cell, method=method_tm)
         orb = NewOrbit(lat)
 
         method = RingRM(lattice=orb.lat,
                         hcors=orb.hcors, vcors=orb.vcors,
                         bpms=orb.bpms)
-        orb.response_matrix = ResponseMatrix(method=method)
-        orb.response_matrix.calculate()
-
-        orb.correction(beta=500, epsilon_x=1e-9, epsilon_y=1e-9,
-                       print_log=False)
+        if not correct_orbit:
+            orb.response_matrix = None
+        elif reuse_response:
+            orb.response_matrix = self.base.orb.response_matrix
+        else:
+            orb.response_matrix = ResponseMatrix(method=method)
+            orb.response_matrix.calculate()
+
+        if correct_orbit:
+            orb.correction(beta=500, epsilon_x=1e-9, epsilon_y=1e-9,
+                           print_log=False)
 
         self.orb = orb
         self.method = method
+        self.method_tm = method_tm
         self.lat = lat
 
     @functools.lru_cache(maxsize=2)
@@ -202,11 +293,13 @@ class OrbitCalculator:
     #
     #     return r
 
-    def orbitCalculatorWithNewElement(self, name=None, init_lattice=True):
+    def orbitCalculatorWithNewElement(self, name=None, init_lattice=True,
+                                      incremental=False):
         '''
 
         Returns: neworbit, ne_element
 
+        See :meth:`initLattice` for incremental
         '''
         assert(name is not None)
 
@@ -217,12 +310,22 @@ class OrbitCalculator:
         new_cell = _copy.copy(self.cell)
         new_cell[num] = new_element
 
-        ins = self.__class__(new_cell, copy=False, init_lattice=init_lattice)
+        ins = self.__class__(new_cell, copy=False, init_lattice=False)
+        ins.base = self
+        ins.changed_elements = [name]
+        if init_lattice:
+            ins.initLattice(incremental=incremental)
         return new_element, ins
 
     def orbitCalculatorForChangedQuadrupole(self, name=None, rk1=None,
-                                            dx=None, dy=None, init_lattice=True):
+                                            dx=None, dy=None, init_lattice=True,
+                                            correct_orbit=True,
+                                            incremental=False,
+                                            reuse_response_matrix=False):
         '''
+
+        See :meth:`initLattice` for correct_orbit, incremental and
+        reuse_response_matrix
         '''
         from ocelot.cpbd.elements import XYQuadrupole
 
@@ -265,11 +368,14 @@ class OrbitCalculator:
 
         log.info(f'Created new lattice with relative k1 change {rk1} dx {dx} dy  {dy}')
         if init_lattice:
-            new_orbit.initLattice()
+            new_orbit.initLattice(correct_orbit=correct_orbit,
+                                  incremental=incremental,
+                                  reuse_response_matrix=reuse_response_matrix)
         return new_orbit
 
     def orbitCalculatorForChangedMagnet(self, name=None, angle=None,
-                                        init_lattice=True):
+                                        init_lattice=True, correct_orbit=True,
+                                        incremental=False):
         '''
         '''
         angle = float(angle)
@@ -278,7 +384,8 @@ class OrbitCalculator:
         new_element, new_orbit = r
         new_element.angle = angle
         if init_lattice:
-            new_orbit.initLattice()
+            new_orbit.initLattice(correct_orbit=correct_orbit,
+                                  incremental=incremental)
         return new_orbit
 
 
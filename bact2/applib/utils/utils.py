@@ -126,7 +126,8 @@ def add_measurement_counts_progressive(df, columns=None, count_column=None,
 
     counter = measurement_counts(np_sel)
 
-    df.loc[:, count_column] = 1
+    # The first row starts the first measurement
+    df.loc[:, count_column] = 0
     indices = df.index[1:]
     df.loc[indices, count_column] = counter
 
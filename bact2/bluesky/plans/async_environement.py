@@ -0,0 +1,122 @@
+'''Plan executing environments with agents on the run engine's loop
+
+The agents of :func:`threaded_environement.run_environement` are run
+in a thread of their own; each step is handed over by blocking queues.
+Here the agents are coroutines running on the event loop of the run
+engine: an agent awaits :meth:`Environment.stepAsync` and the plan
+executes the step as soon as the agent submitted it.
+
+Agents which can not be written as coroutines are run in a thread;
+these use the blocking methods of the environment as before.
+'''
+from bluesky import preprocessors as bpp
+from .executor import AsyncPlanExecutor
+
+import asyncio
+import logging
+
+logger = logging.getLogger('bact2')
+
+
+def run_environements(envs, agents, md=None, log=None):
+    '''Plan for executing environements sharing one run engine loop
+
+    Args:
+        envs :   instances of subclasses of :class:Environment
+        agents : the agents driving the environments. Coroutine
+                 functions are run as tasks on the loop of the run
+                 engine, other callables in a thread
+        md :     additional meta data
+
+    Returns:
+        the values returned by the agents
+
+    All environments share one :class:`AsyncPlanExecutor`: the steps
+    submitted by the agents are executed in the order they arrive.
+    The plan ends when all agents returned.
+
+    If several environments are given, each one emits its readings
+    to a stream of its own: environments without a stream name get
+    `environement_<index>`.
+
+    Typical usage:
+
+    ::
+
+        env = Environment(detectors, motors)
+
+        async def agent():
+            await env.setupAsync()
+            state = await env.resetAsync()
+            for i in range(10):
+                state, reward, done, info = await env.stepAsync(action)
+            env.done()
+
+        RE(run_environement(env, agent))
+    '''
+    if log is None:
+        log = logger
+
+    envs = list(envs)
+    agents = list(agents)
+    assert(len(envs) > 0)
+    assert(len(agents) > 0)
+
+    if len(envs) > 1:
+        for cnt, env in enumerate(envs):
+            if env.stream_name is None:
+                env.stream_name = f'environement_{cnt}'
+
+    detectors = []
+    objects_all = []
+    for env in envs:
+        for obj in list(env.detectors) + list(env.motors) + list(env.state_motors):
+            if obj not in objects_all:
+                objects_all.append(obj)
+        for det in env.detectors:
+            if det not in detectors:
+                detectors.append(det)
+
+    _md = {
+        'detectors': [det.name for det in detectors],
+        'plan_args': {
+            'environements' : list(map(repr, envs)),
+            'agents' : list(map(repr, agents)),
+          },
+        'plan_name' : 'environement_executor',
+        'executor_type' : 'asyncio',
+        'hints' : {}
+    }
+    _md.update(md or {})
+
+    @bpp.stage_decorator(objects_all)
+    @bpp.run_decorator(md=_md)
+    def run_inner():
+        # the plan is iterated by the run engine on its event loop
+        executor = AsyncPlanExecutor(loop=asyncio.get_running_loop(), log=log)
+        for env in envs:
+            env.executor = executor
+
+        try:
+            r = (yield from executor.execute(agents))
+        except Exception:
+            log.error('run_environements: failed to execute environments %s', envs)
+            raise
+        finally:
+            for env in envs:
+                env.clearLinkToExecutor()
+        return r
+
+    return (yield from run_inner())
+
+
+def run_environement(env, agent, md=None, log=None):
+    '''Plan for executing one environement
+
+    See :func:`run_environements`
+
+    Returns:
+        the value returned by the agent
+    '''
+    r = (yield from run_environements([env], [agent], md=md, log=log))
+    return r[0]
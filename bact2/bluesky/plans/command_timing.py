@@ -0,0 +1,183 @@
+"""Timing of the commands submitted by an environment
+
+:class:`CommandTiming` wraps each command an :class:`Environment`
+submits and records the time spent in each phase:
+
+    * think:      result of the previous command received until this
+                  command is submitted (the agent or optimiser)
+    * queue_wait: submitted until the executor starts the plan
+    * move:       plan started until it first triggers or reads a
+                  detector (typically moving the motors)
+    * measure:    first trigger or read until the plan finished
+    * execute:    plan started until finished (move and measure)
+    * hand_back:  plan finished until the agent received the result
+    * total:      submitted until the result was received
+
+The durations are aggregated in
+:class:`bact2.ophyd.devices.utils.latency_histogram.LatencyHistogram`.
+The histograms of the plan phases are filled by the thread of the run
+engine, the others by the one of the agent.
+
+:class:`CommandTimingDevice` makes the timing readable as ophyd
+signals, e.g. to emit it as a stream of the run.
+"""
+from bluesky import plan_stubs as bps, preprocessors as bpp
+from ophyd import Component as Cpt, Signal
+
+from ...ophyd.devices.utils.latency_histogram import LatencyHistogram
+from ...ophyd.devices.utils.timing_device import TimingDevice
+import functools
+import numpy as np
+import time
+
+#: messages ending the move phase of a command
+_read_commands = ('trigger', 'create', 'read')
+
+
+class CommandTiming:
+    """Time stamps of each command and histograms over all of them
+    """
+    phases = ('think', 'queue_wait', 'move', 'measure', 'execute',
+              'hand_back', 'total')
+
+    def __init__(self, **histogram_kws):
+        self.histograms = {
+            name: LatencyHistogram(**histogram_kws) for name in self.phases
+        }
+        self.reset()
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+        self.n_submitted = 0
+        self.n_executed = 0
+        self.n_received = 0
+        self.n_failed = 0
+        self.last = {name: np.nan for name in self.phases}
+        self._t_received = None
+        self._n_pending = 0
+
+    def _add(self, name, value):
+        self.last[name] = value
+        if not np.isnan(value):
+            self.histograms[name].add(value)
+
+    def wrap(self, cmd, device=None, stream_name=None):
+        """the command recording its timing
+
+        Args:
+            cmd:         callable returning the plan
+            device:      if given, read to stream_name after the plan
+                         finished (see :class:`CommandTimingDevice`)
+            stream_name: name of the event stream for the device
+
+        Returns:
+            the wrapped command and the record to hand to
+            :meth:`received` or :meth:`failed`
+
+        To be called by the agent when submitting.
+        """
+        now = time.monotonic()
+        record = {'t_submitted': now}
+
+        think = np.nan
+        if self._n_pending == 0 and self._t_received is not None:
+            # commands submitted ahead: no think time
+            think = now - self._t_received
+        self._add('think', think)
+        self._n_pending += 1
+        self.n_submitted += 1
+
+        def watch(msg):
+            if 't_read' not in record and msg.command in _read_commands:
+                record['t_read'] = time.monotonic()
+            return msg
+
+        @functools.wraps(cmd)
+        def timed_cmd():
+            record['t_start'] = time.monotonic()
+            r = (yield from bpp.msg_mutator(cmd(), watch))
+            record['t_end'] = time.monotonic()
+            self._executed(record)
+            if device is not None:
+                yield from bps.trigger_and_read([device], name=stream_name)
+            return r
+
+        return timed_cmd, record
+
+    def _executed(self, record):
+        t_start, t_end = record['t_start'], record['t_end']
+        t_read = record.get('t_read', t_end)
+        self._add('queue_wait', t_start - record['t_submitted'])
+        self._add('move', t_read - t_start)
+        self._add('measure', t_end - t_read)
+        self._add('execute', t_end - t_start)
+        self.n_executed += 1
+
+    def received(self, record):
+        """the agent received the result of the command
+        """
+        now = time.monotonic()
+        self._add('hand_back', now - record.get('t_end', np.nan))
+        self._add('total', now - record['t_submitted'])
+        self._t_received = now
+        self._n_pending -= 1
+        self.n_received += 1
+
+    def failed(self, record):
+        self._t_received = None
+        self._n_pending -= 1
+        self.n_failed += 1
+
+    def summary(self, quantiles=(.5, .9, .99)):
+        """aggregated timing of all commands
+
+        Returns:
+            dictionary phase name -> summary of its histogram (see
+            :meth:`LatencyHistogram.summary`), the counts and the
+            shares of the time spent by the machine (execute), the
+            agent (think) and the hand over between both (queue_wait
+            and hand_back)
+        """
+        hists = self.histograms
+        r = {name: hist.summary(quantiles) for name, hist in hists.items()}
+        r['counts'] = {
+            'submitted': self.n_submitted,
+            'executed': self.n_executed,
+            'received': self.n_received,
+            'failed': self.n_failed,
+        }
+
+        shares = {
+            'machine': hists['execute'].total,
+            'agent': hists['think'].total,
+            'hand_over': hists['queue_wait'].total + hists['hand_back'].total,
+        }
+        total = sum(shares.values())
+        if total > 0:
+            shares = {name: val / total for name, val in shares.items()}
+        else:
+            shares = {name: np.nan for name in shares}
+        r['shares'] = shares
+        return r
+
+
+class CommandTimingDevice(TimingDevice):
+    """Timing of the last command as signals
+
+    Args:
+        timing: the :class:`CommandTiming` to report
+
+    The signals are updated when the device is read. If read directly
+    after the plan of a command (see :meth:`CommandTiming.wrap`) the
+    think, queue wait, move, measure and execute durations are the ones of
+    this command, hand back and total the ones of the previous
+    command.
+    """
+    think = Cpt(Signal, name='think', value=np.nan)
+    queue_wait = Cpt(Signal, name='queue_wait', value=np.nan)
+    move = Cpt(Signal, name='move', value=np.nan)
+    measure = Cpt(Signal, name='measure', value=np.nan)
+    execute = Cpt(Signal, name='execute', value=np.nan)
+    hand_back = Cpt(Signal, name='hand_back', value=np.nan)
+    total = Cpt(Signal, name='total', value=np.nan)
@@ -1,6 +1,7 @@
 '''OpenAI compatible environment
 '''
 from bluesky import plan_stubs as bps, preprocessors as bpp
+from .command_timing import CommandTiming, CommandTimingDevice
 import functools
 
 import super_state_machine.machines
@@ -28,11 +29,11 @@ def per_step_plan(detectors, motors, actions, *args, log=None, **kwargs):
         l.extend([m, a])
     args = tuple(l)
 
-    log.info(f'Executing mv {args}')
+    log.debug('Executing mv %s', args)
     yield from bps.mv(*args)
 
     r = (yield from bps.trigger_and_read(detectors))
-    log.info(f'Read {detectors} to {r}')
+    log.debug('Read %s to %s', detectors, r)
 
     return r
 
@@ -111,6 +112,13 @@ class Environment:
     The device has to have the same signature as the device
         :class:`bact2.ophyd.utils.environement.`
 
+    The readings are emitted to the event stream stream_name (default
+    the primary stream). Environments sharing one run need streams of
+    their own.
+
+    The time spent by each command is recorded in :attr:`timing` (see
+    :class:`CommandTiming`). If timing_stream_name is given, it is
+    also emitted to this stream after each command.
     '''
     def __init__(self, *, detectors, motors, state_motors, log=None,
                 per_step_plan=per_step_plan,
@@ -120,6 +128,8 @@ class Environment:
                 user_args=(),
                 user_kwargs={},
                 plan_executor=None,
+                stream_name=None,
+                timing_stream_name=None,
                 ):
 
         self.detectors = detectors
@@ -143,6 +153,14 @@ class Environment:
         self.state_to_reset_to = None
 
         self._executor = plan_executor
+        self.stream_name = stream_name
+
+        self.timing = CommandTiming()
+        self.timing_stream_name = timing_stream_name
+        self.timing_device = None
+        if timing_stream_name is not None:
+            self.timing_device = CommandTimingDevice(name=timing_stream_name,
+                                                     timing=self.timing)
 
         self.state = EnvironmentState()
 
@@ -226,26 +244,15 @@ class Environment:
         :meth:`storeInitialState`.
 
         '''
-        self.state.set_setting_up()
-        cmd = functools.partial(self.setup_plan, self.detectors, self.motors, 
-                                self.user_args, self.user_kwargs)
-        r = self._submit(cmd)
-        self.storeInitialState(r)
-        self.state.set_initialised()
+        cmd = self._setupCommand()
+        self._setupResult(self._submit(cmd))
 
     def close(self):
         '''What to emit to the run engine?
         '''
-        self.state.set_tearing_down()
-        reset_state = self.getStateToResetTo()
-        cmd = functools.partial(self.teardown_plan, self.detectors, self.motors,
-                                self.state_motors, reset_state,
-                                self.user_args, self.user_kwargs)
+        cmd = self._closeCommand()
         self._submit(cmd)
-
-        # Inform bluesky that we are done ...
-        self._executor.stopCommandExecution()
-        self.state.set_undefined()
+        self._closeFinish()
 
     def done(self):
         self._executor.stopCommandExecution()
@@ -267,7 +274,85 @@ class Environment:
             info (dict):          Contains auxiliary diagnostic information (helpful
                                   for debugging, and sometimes learning).
         """
+        cmd = self._stepCommand(actions)
+        return self._stepResult(self._submit(cmd))
+
+    def steps(self, actions):
+        '''Run several steps, submitted ahead
 
+        Args:
+            actions: a sequence of actions, one for each step
+
+        Returns:
+            a list of (observation, reward, done, info), one for each
+            step
+
+        The steps are handed to the executor without waiting for the
+        results of the previous ones (see
+        :meth:`PlanDelegatorExecutor.submitFuture`). Thus the run
+        engine continues with the next step as soon as one finished.
+        All steps are executed, even if the episode ended earlier.
+        '''
+        pending = [self._submitFuture(self._stepCommand(action))
+                   for action in actions]
+        return [self._stepResult(self._futureResult(*p)) for p in pending]
+
+    def reset(self):
+        '''
+
+        Todo:
+            The device should now what its inital state was.
+            What's the bluesky equivalent to this call
+        '''
+        cmd = self._resetCommand()
+        return self._resetResult(self._submit(cmd))
+
+    #-------------------------------------------------------------------------
+    # The same methods as coroutines: to be used by agents running on the
+    # event loop of the run engine (see :mod:`.async_environement`)
+    async def setupAsync(self):
+        cmd = self._setupCommand()
+        self._setupResult(await self._submitAsync(cmd))
+
+    async def resetAsync(self):
+        cmd = self._resetCommand()
+        return self._resetResult(await self._submitAsync(cmd))
+
+    async def stepAsync(self, actions):
+        cmd = self._stepCommand(actions)
+        return self._stepResult(await self._submitAsync(cmd))
+
+    async def closeAsync(self):
+        cmd = self._closeCommand()
+        await self._submitAsync(cmd)
+        self._closeFinish()
+
+    #-------------------------------------------------------------------------
+    # Commands to submit and processing of their results
+    def _setupCommand(self):
+        self.state.set_setting_up()
+        cmd = functools.partial(self.setup_plan, self.detectors, self.motors,
+                                self.user_args, self.user_kwargs)
+        return cmd
+
+    def _setupResult(self, r):
+        self.storeInitialState(r)
+        self.state.set_initialised()
+
+    def _closeCommand(self):
+        self.state.set_tearing_down()
+        reset_state = self.getStateToResetTo()
+        cmd = functools.partial(self.teardown_plan, self.detectors, self.motors,
+                                self.state_motors, reset_state,
+                                self.user_args, self.user_kwargs)
+        return cmd
+
+    def _closeFinish(self):
+        # Inform bluesky that we are done ...
+        self._executor.stopCommandExecution()
+        self.state.set_undefined()
+
+    def _stepCommand(self, actions):
         self.state.set_stepping()
 
         lm = len(self.motors)
@@ -293,32 +378,25 @@ class Environment:
 
         cmd = functools.partial(self.per_step_plan, self.detectors, self.motors, actions,
                                 self.user_args, self.user_kwargs)
-        print(f'step executing command {cmd}')
-        r_dic = self._submit(cmd)
+        self.log.debug('step executing command %s', cmd)
+        return cmd
 
-        # Process result
+    def _stepResult(self, r_dic):
         state = self.computeState(r_dic)
         reward, done = self.computeRewardTerminal(r_dic)
         info = {}
-        if done:
+        if done and not self.state.is_done:
             self.state.set_done()
         return state, reward, done, info
 
-    def reset(self):
-        '''
-
-        Todo:
-            The device should now what its inital state was.
-            What's the bluesky equivalent to this call
-        '''
+    def _resetCommand(self):
         self.state.set_resetting()
         reset_state = self.getStateToResetTo()
         cmd = functools.partial(self.reset_plan, self.detectors, self.state_motors, reset_state,
                                 self.user_args, self.user_kwargs)
+        return cmd
 
-        # Process result
-        r_dic = self._submit(cmd)
-
+    def _resetResult(self, r_dic):
         # Translate it to a state
         state = self.computeState(r_dic)
         self.state.set_initialised()
@@ -351,14 +429,83 @@ class Environment:
         )
         return txt
 
+    def _inStream(self, cmd):
+        '''emit the readings of the command to the stream of the environment
+        '''
+        stream_name = self.stream_name
+        if stream_name is None:
+            return cmd
+
+        def rename(msg):
+            if msg.command == 'create':
+                msg = msg._replace(kwargs=dict(msg.kwargs, name=stream_name))
+            return msg
+
+        @functools.wraps(cmd)
+        def cmd_in_stream():
+            return (yield from bpp.msg_mutator(cmd(), rename))
+        return cmd_in_stream
+
+    def _prepare(self, cmd):
+        '''the command as submitted: in the stream of the environment
+        and timed
+        '''
+        return self.timing.wrap(self._inStream(cmd), device=self.timing_device,
+                                stream_name=self.timing_stream_name)
+
     def _submit(self, cmd):
         assert(not self.state.is_failed)
+        cmd, record = self._prepare(cmd)
         try:
             r = self.executor.submit(cmd)
         except Exception:
+            self.timing.failed(record)
             self.state.set_failed()
             self._executor.stopCommandExecution()
             raise 
+        self.timing.received(record)
+        return r
+
+    def _submitFuture(self, cmd):
+        '''
+        Returns:
+            the future and the timing record of the command
+        '''
+        assert(not self.state.is_failed)
+        cmd, record = self._prepare(cmd)
+        try:
+            fut = self.executor.submitFuture(cmd)
+        except Exception:
+            self.timing.failed(record)
+            self.state.set_failed()
+            self._executor.stopCommandExecution()
+            raise
+        return fut, record
+
+    def _futureResult(self, fut, record):
+        try:
+            # the commands before are finished: at most one to execute
+            r = fut.result(self.executor.command_execution_timeout)
+        except Exception:
+            self.timing.failed(record)
+            if not self.state.is_failed:
+                self.state.set_failed()
+                self._executor.stopCommandExecution()
+            raise
+        self.timing.received(record)
+        return r
+
+    async def _submitAsync(self, cmd):
+        assert(not self.state.is_failed)
+        cmd, record = self._prepare(cmd)
+        try:
+            r = await self.executor.submitAsync(cmd)
+        except Exception:
+            self.timing.failed(record)
+            self.state.set_failed()
+            self._executor.stopCommandExecution()
+            raise
+        self.timing.received(record)
         return r
 
     @property
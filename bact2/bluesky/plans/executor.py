@@ -8,8 +8,13 @@ It would be possible
 Todo:
     Naming: beter a converter?
 '''
+from bluesky.utils import Msg
+import asyncio
+import concurrent.futures
+import inspect
 import itertools
 import queue
+import threading
 import traceback
 import sys
 import logging
@@ -67,9 +72,22 @@ class EndOfEvaluation:
 end_of_evaluation = EndOfEvaluation()
 
 
+class PendingCommand:
+    '''Command submitted ahead: its result is set to the future
+    '''
+    def __init__(self, cmd, future):
+        self.cmd = cmd
+        self.future = future
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        return f'{cls_name}({self.cmd})'
+
+
 class _BaseClass_Del_Exec:
     def __init__(self, *, command_queue, result_queue, log=None,
-                maxtime_for_next_command=5, command_execution_timeout=5):
+                maxtime_for_next_command=5, command_execution_timeout=5,
+                max_in_flight=1):
 
         self.state = ExecutorState()
         self.cmd_state = CommandProcessingState()
@@ -85,6 +103,13 @@ class _BaseClass_Del_Exec:
         self.maxtime_for_next_command = maxtime_for_next_command
         self.command_execution_timeout = command_execution_timeout
 
+        # commands submitted by submitFuture and not yet finished
+        assert(max_in_flight >= 1)
+        self.max_in_flight = max_in_flight
+        self._in_flight = threading.BoundedSemaphore(max_in_flight)
+        # exception of the command which failed
+        self.failure = None
+
         self.last_command = None
 
     def __repr__(self):
@@ -95,6 +120,7 @@ class _BaseClass_Del_Exec:
             f' result_queue={self.result_queue},'
             f' command_queue_timeout={self.maxtime_for_next_command},'
             f' command_execution_timeout={self.command_execution_timeout},'
+            f' max_in_flight={self.max_in_flight},'
             ' )'
         )
         return txt
@@ -105,9 +131,12 @@ class _PlanDelegator:
         for i in range(10):
             if self.command_queue.qsize() > 0:
                 try:
-                    self.command_queue.get(block=False)
+                    cmd = self.command_queue.get(block=False)
                 except queue.Empty:
                     pass
+                else:
+                    if isinstance(cmd, PendingCommand):
+                        cmd.future.cancel()
             if self.result_queue.qsize() > 0:
                 try:
                     self.result_queue.get(block=False)
@@ -128,8 +157,16 @@ class _PlanDelegator:
             txt = f'{cls_name}: still waiting for command response to cmd {self.last_command}'
             self.log.info(txt)
 
-        if not self.state.is_failed:
-            self.state.set_stopping()
+        if self.state.is_failed:
+            # failed can not be left: only tell bluesky, if still listening
+            self.log.info(f'{cls_name}: command execution failed: stopping')
+            try:
+                self.command_queue.put(end_of_evaluation, block=False)
+            except queue.Full:
+                pass
+            return
+
+        self.state.set_stopping()
 
         self.log.info(f'{cls_name}: stopping command execution')
 
@@ -171,6 +208,54 @@ class _PlanDelegator:
         self.cmd_state.set_finished()
         return r
 
+    def submitFuture(self, cmd):
+        '''submit a command without waiting for its result
+
+        Returns:
+            a :class:`concurrent.futures.Future` for the result
+
+        Up to :attr:`max_in_flight` commands can be submitted ahead:
+        the executor executes them one after the other and sets the
+        results in the order of submission. If the window is full
+        this method blocks until the oldest command finished.
+
+        If a command failed before, its exception is raised: the
+        executor does not accept further commands.
+        '''
+        self._checkAccepting(cmd)
+        timeout = self.command_execution_timeout * self.max_in_flight
+        if not self._in_flight.acquire(timeout=timeout):
+            txt = (
+                f'{self.max_in_flight} commands still in flight after'
+                f' {timeout} s: can not submit {cmd}'
+            )
+            self.log.error(txt)
+            self.cmd_state.set_failed()
+            self.state.set_failed()
+            raise TimeoutError(txt)
+
+        fut = concurrent.futures.Future()
+        fut.add_done_callback(lambda fut: self._in_flight.release())
+        try:
+            # e.g. failed while waiting for the window
+            self._checkAccepting(cmd)
+            self.submit(PendingCommand(cmd, fut), wait_for_result=False)
+        except Exception as exc:
+            fut.set_exception(exc)
+            raise
+
+        if self.failure is not None:
+            # failed while submitting: nobody will execute the command
+            self._failPending(self.failure)
+        return fut
+
+    def _checkAccepting(self, cmd):
+        if self.failure is not None:
+            raise self.failure
+        if self.state.is_failed or self.state.is_stopping or self.state.is_stopped:
+            txt = f'Executor {self.state.state}: can not execute cmd {cmd}'
+            raise AssertionError(txt)
+
 
 
 class _PlanExecutor(_BaseClass_Del_Exec):
@@ -201,28 +286,63 @@ class _PlanExecutor(_BaseClass_Del_Exec):
                 self.log.info(f'{cls_name}: evaluation finished')
                 return
 
-            self.log.info(f'{cls_name}: executing cmd no. {cnt}: {cmd}')
+            fut = None
+            if isinstance(cmd, PendingCommand):
+                fut = cmd.future
+                cmd = cmd.cmd
+                if not fut.set_running_or_notify_cancel():
+                    self.log.debug('%s: cmd no. %d cancelled: %s', cls_name, cnt, cmd)
+                    continue
+
+            self.log.debug('%s: executing cmd no. %d: %s', cls_name, cnt, cmd)
 
             try:
                 if as_iter:
                     r = (yield from self._executeSingle(cmd, as_iter=as_iter) )
                 else:
                     r = self._executeSingle(cmd, as_iter=as_iter)
+            except GeneratorExit:
+                # plan closed by the run engine, e.g. aborted
+                exc = RuntimeError(f'{cls_name}: plan closed while executing cmd {cmd}')
+                if fut is not None:
+                    fut.set_exception(exc)
+                self._failPending(exc)
+                raise
             except Exception as exc:
                 txt = f'Received exception {exc} while executing cmd {cmd}'
                 # traceback.print_exc(sys.stdout)
                 self.log.error(txt)
-                self.result_queue.put(exc)
+                if fut is None:
+                    self.result_queue.put(exc)
+                else:
+                    fut.set_exception(exc)
+                self._failPending(exc)
                 raise exc
 
-            self.log.info(f'cmd {cmd} produced result {r}')
+            self.log.debug('cmd %s produced result %s', cmd, r)
             # self.command_queue.task_done()
-            self.result_queue.put(r)
+            if fut is None:
+                self.result_queue.put(r)
+            else:
+                fut.set_result(r)
 
-    def _executeSingle(self, cmd, as_iter=False):
-        cls_name = self.__class__.__name__
-        self.log.info(f'{cls_name}: waiting for commands to execute')
+    def _failPending(self, exc):
+        '''commands submitted ahead will not be executed any more
+        '''
+        if self.failure is None:
+            self.failure = exc
+        if not self.state.is_failed:
+            self.state.set_failed()
+        while True:
+            try:
+                cmd = self.command_queue.get(block=False)
+            except queue.Empty:
+                return
+            if isinstance(cmd, PendingCommand):
+                if cmd.future.set_running_or_notify_cancel():
+                    cmd.future.set_exception(exc)
 
+    def _executeSingle(self, cmd, as_iter=False):
         if as_iter:
             r = (yield from cmd())
         else:
@@ -252,6 +372,12 @@ class PlanDelegatorExecutor(_PlanDelegator, _PlanExecutor, _BaseClass_Del_Exec):
         * execute the call back in a separate coroutine thread
           or callback
 
+    Commands known in advance can be submitted using
+    :meth:`submitFuture`: up to `max_in_flight` of these are queued,
+    so that the run engine does not wait for the callback to produce
+    the next command. The command queue should then hold
+    `max_in_flight` commands.
+
     Warning:
         The callback and the run engine must not be executed in
         different runnable entities (e.g. different threads)
@@ -266,6 +392,211 @@ class PlanExecutor(_PlanExecutor, _BaseClass_Del_Exec):
     pass
 
 
+class AsyncPlanExecutor:
+    '''Delegate submitted plans to the run engine on its event loop
+
+    Args:
+        loop: the event loop of the run engine
+        log:  a logger.Logger instance. Typically the logger of the
+              RunEngine
+
+    The agents are run as coroutines on the loop of the run engine
+    (see :meth:`execute`): these submit their commands with
+    :meth:`submitAsync`. The plan waits for the next command using a
+    `wait_for` message. Thus no thread is required and no queue is
+    polled with a timeout.
+
+    Agents which have to run in a thread of their own (e.g. blocking
+    libraries) use :meth:`submit`. The command is handed to the loop
+    by :func:`asyncio.run_coroutine_threadsafe`.
+
+    Several environments (and their agents) can share one executor:
+    their commands are executed in the order they are submitted.
+    '''
+    def __init__(self, *, loop, log=None, command_execution_timeout=None):
+        self.state = ExecutorState()
+        self.loop = loop
+        self.command_queue = asyncio.Queue()
+
+        if log is None:
+            log = logger
+        self.log = log
+
+        # only used by submit: None for waiting as long as required
+        self.command_execution_timeout = command_execution_timeout
+        self.last_command = None
+
+    def __repr__(self):
+        cls_name = self.__class__.__name__
+        txt = (
+            f'{cls_name}('
+            f' loop={self.loop},'
+            f' command_execution_timeout={self.command_execution_timeout},'
+            ' )'
+        )
+        return txt
+
+    #-------------------------------------------------------------------------
+    # Agent side
+    async def submitAsync(self, cmd):
+        '''submit a command and wait for its result
+
+        Must be awaited on the loop of the run engine.
+        '''
+        if self.state.is_stopping or self.state.is_stopped or self.state.is_failed:
+            txt = f'Executor {self.state.state}: can not execute cmd {cmd}'
+            raise AssertionError(txt)
+
+        fut = self.loop.create_future()
+        self.command_queue.put_nowait((cmd, fut))
+        return (await fut)
+
+    def submit(self, cmd, wait_for_result=True):
+        '''submit a command from a thread other than the one of the loop
+        '''
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self.loop:
+            txt = (
+                f'submit called on the loop of the run engine (cmd {cmd}):'
+                ' would dead lock, use submitAsync instead'
+            )
+            raise AssertionError(txt)
+
+        self.last_command = cmd
+        c_fut = asyncio.run_coroutine_threadsafe(self.submitAsync(cmd), self.loop)
+        if not wait_for_result:
+            return c_fut
+        return c_fut.result(self.command_execution_timeout)
+
+    def submitFuture(self, cmd):
+        '''submit a command from a thread without waiting for its result
+
+        Returns:
+            a :class:`concurrent.futures.Future` for the result
+        '''
+        return self.submit(cmd, wait_for_result=False)
+
+    def stopCommandExecution(self, fail_mode=False):
+        '''The evaluation ends when all agents returned
+
+        Provided for :class:`Environment` which calls it when done.
+        '''
+        cls_name = self.__class__.__name__
+        self.log.debug('%s: stop requested: ends when the agents return',
+                       cls_name)
+
+    #-------------------------------------------------------------------------
+    # Plan side
+    def startAgent(self, agent):
+        '''start the agent: as task if it is a coroutine function,
+        otherwise in the default executor of the loop (i.e. in a thread)
+        '''
+        if inspect.iscoroutinefunction(agent):
+            fut = self.loop.create_task(agent())
+        else:
+            fut = self.loop.run_in_executor(None, agent)
+
+        def on_done(fut):
+            self.command_queue.put_nowait(end_of_evaluation)
+
+        fut.add_done_callback(on_done)
+        return fut
+
+    def _nextCommand(self):
+        '''the next command (or end of evaluation) from the queue
+
+        Only waits by the run engine if no command is pending yet.
+        '''
+        try:
+            return self.command_queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+
+        item = []
+
+        async def get():
+            if not item:
+                item.append(await self.command_queue.get())
+
+        yield Msg('wait_for', None, [get])
+        return item[0]
+
+    def _abort(self, agents, exc):
+        '''fail pending commands and stop the agents
+        '''
+        self.state.set_failed()
+        while True:
+            try:
+                item = self.command_queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            if item is end_of_evaluation:
+                continue
+            cmd, fut = item
+            if not fut.done():
+                fut.set_exception(exc)
+        for agent in agents:
+            # only the coroutines can be cancelled
+            agent.cancel()
+
+    def execute(self, agents):
+        '''Execute the commands submitted by the agents
+
+        Args:
+            agents: callables; coroutine functions are run as tasks,
+                    other callables in a thread
+
+        Returns:
+            the result of the agents
+
+        Stops when all agents returned. If an agent or a command
+        fails, the exception is raised and the other agents are
+        cancelled.
+        '''
+        cls_name = self.__class__.__name__
+        self.state.set_running()
+        agents = [self.startAgent(agent) for agent in agents]
+
+        try:
+            for cnt in itertools.count():
+                item = (yield from self._nextCommand())
+
+                if item is end_of_evaluation:
+                    for agent in agents:
+                        if agent.done() and not agent.cancelled():
+                            exc = agent.exception()
+                            if exc is not None:
+                                raise exc
+                    if all([agent.done() for agent in agents]):
+                        break
+                    continue
+
+                cmd, fut = item
+                if fut.cancelled():
+                    continue
+                self.last_command = cmd
+                self.log.debug('%s: executing cmd no. %d: %s', cls_name, cnt, cmd)
+                try:
+                    r = (yield from cmd())
+                except Exception as exc:
+                    self.log.error('%s: received exception %s while executing cmd %s',
+                                   cls_name, exc, cmd)
+                    fut.set_exception(exc)
+                    raise
+                fut.set_result(r)
+
+        except BaseException as exc:
+            self._abort(agents, exc)
+            raise
+
+        self.state.set_stopping()
+        self.state.set_stopped()
+        self.log.info('%s: evaluation finished', cls_name)
+        return [agent.result() for agent in agents]
+
 
 def execute_plan_stub(executor, log=None):
 
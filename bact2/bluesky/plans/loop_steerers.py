@@ -8,6 +8,7 @@ Todo:
 
 from bluesky import plan_stubs as bps, preprocessors as bpp
 from bluesky.utils import separate_devices, Msg
+from ...math.proportional_root import proportional_root_search
 
 import numpy as np
 import logging
@@ -129,6 +130,19 @@ def step_steerer(steerer, currents, detectors, num_readings, current_offset=None
                 calculate_orbit_offset(val)
 
 
+def steerer_setpoint_limits(steerer):
+    """limits of the setpoint of the steerer
+
+    The proxy of the steerer collection (`col.sel.dev`) does not know
+    the limits: the ones of the selected steerer are used.
+    """
+    try:
+        steerer = steerer.selected_steerer
+    except AttributeError:
+        pass
+    return np.array(steerer.setpoint.limits, np.float_)
+
+
 def steerer_search_step(steerer, start_current, detectors, num_readings,
                         bpm_prefix='bpm_waveform', dr_target=1.0,
                         dr_scale_max=25, dr_eps=1e-2, eps_rel=.1, eps_clip=1e-4,
@@ -136,6 +150,10 @@ def steerer_search_step(steerer, start_current, detectors, num_readings,
                         linear_gradient=None, root_finder=None,logger=None):
     """
 
+    Returns:
+        the root as absolute current and the total scale relative to
+        start_current
+
     Todo:
        Fix: detectors should not change during run I guess
        Use a separate stream for the search
@@ -152,8 +170,7 @@ def steerer_search_step(steerer, start_current, detectors, num_readings,
 
     logger.info('Starting thread')
 
-    limits = steerer.setpoint.limits
-    limits = np.array(limits)
+    limits = steerer_setpoint_limits(steerer)
     assert((np.absolute(limits) > 1e-8).all())
     dl = limits[1] - limits[0]
     assert(dl > 1e-8)
@@ -203,17 +220,140 @@ def steerer_search_step(steerer, start_current, detectors, num_readings,
         f'Steerer {st_name} found current {the_root}'
         f' total scale {total_scale}'
     )
-    logger.info()
+    logger.info(txt)
+    book_keeping_dev.scale_factor.value = total_scale
+
+    return r, total_scale
+
+
+def steerer_scale_search(steerer, start_current, detectors, num_readings,
+                         bpm_prefix='bpm_waveform', dr_target=1.0,
+                         eps_rel=.1, max_evaluations=3, max_ratio=10,
+                         current_offset=None, book_keeping_dev=None,
+                         scale_cache=None, steerer_name=None, logger=None):
+    """Search the current step giving the orbit offset dr_target
+
+    Alternative to :func:`steerer_search_step`: the current is
+    predicted from the gain (orbit offset per current) of the steerer
+    kept in scale_cache (a :class:`bact2.math.proportional_root.GainCache`),
+    i.e. the one found for this steerer before or the one of the model.
+    Each evaluation refits the gain; with a known gain one or two
+    evaluations are required. The gain found is stored in the cache.
+
+    Uses :func:`proportional_root_search`: no thread is required.
+    The current is limited to the limits of the steerer (see
+    :func:`steerer_setpoint_limits`).
+
+    Returns:
+        the :class:`ProportionalRootResult` (root as absolute current)
+        and the total scale relative to start_current.
+        :func:`steerer_scale_search_step` returns the root instead of
+        the result, as :func:`steerer_search_step` does
+    """
+    assert(book_keeping_dev is not None)
+    assert(scale_cache is not None)
+    det = [steerer] + detectors
+
+    if steerer_name is None:
+        steerer_name = steerer.name
+
+    if current_offset is None:
+        current_offset = (yield from steerer_current_offset(steerer, logger=logger))
+
+    limits = steerer_setpoint_limits(steerer)
+    x_max = None
+    if limits[1] > limits[0]:
+        if start_current >= 0:
+            x_max = limits[1] - current_offset
+        else:
+            x_max = current_offset - limits[0]
+        assert(x_max > 0)
+
+    gain = scale_cache.gain(steerer_name)
+    logger.info(f'Steerer {steerer_name}: searching scale with gain {gain}')
+    search = proportional_root_search(dr_target, start_current, gain,
+                                      eps_rel=eps_rel, max_ratio=max_ratio,
+                                      max_evaluations=max_evaluations,
+                                      x_max=x_max)
+
+    d_current = next(search)
+    while True:
+        yield from bps.checkpoint()
+        book_keeping_dev.dI.value = float(d_current)
+        yield from bps.mv(steerer, d_current + current_offset)
+
+        for i in range(num_readings):
+            val = (yield from bps.trigger_and_read(det))
+
+        dr = calculate_orbit_offset(val, bpm_prefix=bpm_prefix)
+        dr_max = dr.max()
+        logger.info(
+            f'Steerer {steerer_name}: current step {d_current:.5f}'
+            f' gave dr {dr_max:.5f} target {dr_target:.5f}'
+        )
+        try:
+            d_current = search.send(dr_max)
+        except StopIteration as stop:
+            result = stop.value
+            break
+
+    scale_cache.update(steerer_name, result.gain)
+
+    total_scale = result.root / start_current
+    book_keeping_dev.dI.value = float(result.root)
     book_keeping_dev.scale_factor.value = total_scale
+    logger.info(
+        f'Steerer {steerer_name} found current step {result.root:.5f}'
+        f' total scale {total_scale:.5f} after {result.n_evaluations}'
+        f' evaluations (converged {result.converged})'
+    )
 
-    return the_root, total_scale
+    # as steerer_search_step: root as absolute current
+    result.root = result.root + current_offset
+    return result, total_scale
+
+
+def steerer_scale_search_step(steerer, start_current, detectors, num_readings,
+                              **kws):
+    """:func:`steerer_scale_search` returning as :func:`steerer_search_step`
+
+    Returns:
+        the root as absolute current and the total scale relative to
+        start_current
+    """
+    result, total_scale = (yield from steerer_scale_search(
+        steerer, start_current, detectors, num_readings, **kws))
+    return result.root, total_scale
+
+
+def hysteresis_currents(currents, current_offset, n_loops=3):
+    """currents cycling the steerer before the data are taken
+
+    Args:
+        currents:       the (scaled) current steps relative to the offset
+        current_offset: the current the steerer is set back to
+        n_loops:        number of cycles between maximum and minimum
+
+    Returns:
+        the absolute currents: n_loops times maximum and minimum, then
+        the offset
+    """
+    total_current = np.asarray(currents) + current_offset
+    c_max, c_min = total_current.max(), total_current.min()
+    steps = [c_max, c_min] * n_loops + [current_offset]
+    return np.array(steps, np.float_)
 
 
 def select_step_steerer(col, name, currents, *args, dr_target=1.0,
                         book_keeping_dev=None,
                         linear_gradient=None, root_finder=None,
+                        scale_cache=None,
                         logger=None, **kws):
     '''Testing if run doc has to be issued
+
+    If scale_cache is given the scale is searched by
+    :func:`steerer_scale_search_step`, otherwise by
+    :func:`steerer_search_step` using the root_finder
     '''
 
     logger.info('Selecting steerer {}'.format(name))
@@ -259,10 +399,16 @@ def select_step_steerer(col, name, currents, *args, dr_target=1.0,
             val = None
             book_keeping_dev.mode.value = 'searching_scale'
 
-            val = (yield from steerer_search_step(t_steerer, currents_max, *args, current_offset=current_offset, dr_target=dr_target,
-                                                  linear_gradient=linear_gradient, root_finder=root_finder,
-                                                  logger=logger,
-                                                  **kws))
+            if scale_cache is not None:
+                val = (yield from steerer_scale_search_step(
+                    t_steerer, currents_max, *args, current_offset=current_offset,
+                    dr_target=dr_target, scale_cache=scale_cache,
+                    steerer_name=name, logger=logger, **kws))
+            else:
+                val = (yield from steerer_search_step(t_steerer, currents_max, *args, current_offset=current_offset, dr_target=dr_target,
+                                                      linear_gradient=linear_gradient, root_finder=root_finder,
+                                                      logger=logger,
+                                                      **kws))
 
             if val is not None:
                 current_step, total_scale = val
@@ -274,16 +420,11 @@ def select_step_steerer(col, name, currents, *args, dr_target=1.0,
 
             # run the hyseresis loop. I assume that I am on the branch upwards
             # That's something the power converter should know how to perform
-            total_current = scaled_currents + current_offset
-
-            c_max, c_min = total_current.max(), total_current.min()
-            n_loops = 3
-            steps = [c_max, c_min] * n_loops + [current_offset]
-            hysteresis_currents = np.array(steps, np.float_)
+            t_hysteresis = hysteresis_currents(scaled_currents, current_offset)
 
-            logger.info(f'Executing hystersis {hysteresis_currents.min()} {hysteresis_currents.max()}')
+            logger.info(f'Executing hystersis {t_hysteresis.min()} {t_hysteresis.max()}')
             book_keeping_dev.mode.value = 'hysteresis_loop'
-            for cur in hysteresis_currents:
+            for cur in t_hysteresis:
                 yield from bps.checkpoint()
                 yield from bps.mv(t_steerer, cur)
 
@@ -331,6 +472,7 @@ def loop_steerers(detectors, col, num_readings=1, md=None,
     # Devices can not be put to the keywords ...
     kws_store.pop('linear_gradient', None)
     kws_store.pop('root_finder', None)
+    kws_store.pop('scale_cache', None)
     kws_store.pop('logger', None)
     _md = {
         'detectors': [det.name for det in detectors],
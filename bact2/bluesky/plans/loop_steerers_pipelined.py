@@ -0,0 +1,176 @@
+'''Response matrix measurement overlapping the moves between steerers
+
+:func:`loop_steerers` treats one steerer after the other: select it,
+measure the reference orbit, search the scale, cycle the hysteresis,
+take the data. Each move waits for the steerer to settle.
+
+:func:`loop_steerers_pipelined` overlaps the moves which do not
+disturb a measurement: while the previous steerer is set back to its
+offset, the next one is selected and its hysteresis loop is started.
+Moves are issued with :func:`bluesky.plan_stubs.abs_set` and waited
+for per group. The orbit is only measured when all these moves are
+finished.
+
+The scale search is not made: the scale of each steerer has to be
+known beforehand, e.g. from a previous measurement (see the
+`bk_dev_scale_factor` stored by :func:`loop_steerers`). Thus the
+hysteresis loop can be run before the reference orbit is measured.
+'''
+from bluesky import plan_stubs as bps, preprocessors as bpp
+
+from .loop_steerers import (
+    current_signs, hysteresis_currents, orbit, step_steerer,
+    steerer_current_offset)
+
+import numpy as np
+import logging
+logger = logging.getLogger('bact2')
+
+
+def precondition_steerer(steerer, currents, group=None):
+    '''cycle steerer through currents
+
+    Only the moves of this steerer are waited for (by group). Moves
+    issued before, e.g. setting back the previous steerer, continue
+    meanwhile.
+    '''
+    assert(group is not None)
+    for cur in currents:
+        yield from bps.checkpoint()
+        yield from bps.abs_set(steerer, cur, group=group)
+        yield from bps.wait(group=group)
+
+
+def loop_steerers_pipelined(detectors, col, num_readings=1, md=None,
+                            horizontal_steerer_names=None,
+                            vertical_steerer_names=None,
+                            current_val_horizontal=None,
+                            current_val_vertical=None,
+                            current_steps=None, scale_factors=None,
+                            n_hysteresis_loops=3, overlap=True,
+                            book_keeping_dev=None, logger=logger):
+    """Measure the response of each steerer, overlapping the moves
+
+    Args:
+        detectors:          detectors to read (e.g. the bpm)
+        col:                the :class:`SteererCollection`
+        num_readings:       readings per current step
+        current_steps:      relative steps; default
+                            :data:`loop_steerers.current_signs`
+        scale_factors:      dictionary steerer name -> scale of its
+                            current steps. Missing steerers use 1
+        n_hysteresis_loops: cycles of the hysteresis loop
+        overlap:            if False the moves are made one after the
+                            other (as :func:`loop_steerers` does)
+        book_keeping_dev:   the :class:`Bookkeeping` device
+
+    The steerers are set back to their offset even if the plan fails.
+    """
+    assert(horizontal_steerer_names is not None)
+    assert(vertical_steerer_names is not None)
+    assert(current_val_horizontal is not None)
+    assert(current_val_vertical is not None)
+    assert(book_keeping_dev is not None)
+
+    if current_steps is None:
+        current_steps = current_signs
+    current_steps = np.asarray(current_steps, np.float_)
+
+    if scale_factors is None:
+        scale_factors = {}
+    scale_factors = dict(scale_factors)
+
+    steps = [(name, current_val_vertical) for name in vertical_steerer_names]
+    steps += [(name, current_val_horizontal) for name in horizontal_steerer_names]
+
+    _md = {
+        'detectors': [det.name for det in detectors],
+        'num_readings': num_readings,
+        'plan_args': {
+            'detectors': list(map(repr, detectors)),
+            'num_readings': num_readings,
+            'horizontal_steerer_names': horizontal_steerer_names,
+            'vertical_steerer_names': vertical_steerer_names,
+            'current_val_horizontal': current_val_horizontal,
+            'current_val_vertical': current_val_vertical,
+            'current_steps': current_steps,
+            'scale_factors': scale_factors,
+            'n_hysteresis_loops': n_hysteresis_loops,
+            'overlap': overlap,
+          },
+        'plan_name': 'response_matrix_pipelined',
+        'hints': {}
+    }
+    _md.update(md or {})
+
+    bk = book_keeping_dev
+    detectors_all = (detectors + [col.selected] + [bk])
+
+    #: steerer and offset to set back
+    previous = []
+
+    def set_back(group):
+        '''start setting back the previous steerer
+        '''
+        while previous:
+            steerer, current_offset = previous.pop()
+            logger.info(f'Setting {steerer.name} back to {current_offset:.5f}')
+            yield from bps.abs_set(steerer, current_offset, group=group)
+
+    def set_back_and_wait():
+        group = 'set_back_final'
+        yield from set_back(group)
+        yield from bps.wait(group=group)
+
+    def _measure(name, current_val, cnt):
+        scale = float(scale_factors.get(name, 1.0))
+        currents = current_steps * current_val * scale
+        group_set_back = f'set_back_{cnt}'
+
+        if not overlap:
+            yield from set_back_and_wait()
+
+        # the previous steerer is still moving: select the next one
+        yield from set_back(group_set_back)
+        logger.info(f'Selecting steerer {name}')
+        yield from bps.mv(col, name)
+        # the proxy: data are stored as for loop_steerers
+        selected = col.sel.dev
+        # the steerer itself: still addressed when the next one is selected
+        steerer = getattr(col.steerers, name)
+
+        bk.mode.value = 'current_offset'
+        bk.steerer_name.value = name
+        bk.scale_factor.value = scale
+        bk.dI.value = 0.0
+        current_offset = (yield from steerer_current_offset(selected, logger=logger))
+        bk.current_offset.value = float(current_offset)
+        previous.append((steerer, current_offset))
+
+        t_hysteresis = hysteresis_currents(currents, current_offset,
+                                           n_loops=n_hysteresis_loops)
+        bk.mode.value = 'hysteresis_loop'
+        yield from precondition_steerer(steerer, t_hysteresis,
+                                        group=f'precondition_{cnt}')
+
+        # The orbit must not change any more
+        yield from bps.wait(group=group_set_back)
+
+        bk.mode.value = 'reference_orbit'
+        orbit.clearOffset()
+        yield from step_steerer(selected, [0], detectors_all, num_readings,
+                                current_offset=current_offset,
+                                book_keeping_dev=bk, logger=logger)
+
+        bk.mode.value = 'store_data'
+        yield from step_steerer(selected, currents, detectors_all,
+                                num_readings, current_offset=current_offset,
+                                book_keeping_dev=bk, logger=logger)
+
+    @bpp.stage_decorator(detectors_all)
+    @bpp.run_decorator(md=_md)
+    def _run_all():
+        for cnt, (name, current_val) in enumerate(steps):
+            yield from _measure(name, current_val, cnt)
+
+    return (yield from bpp.finalize_wrapper(_run_all(), set_back_and_wait))
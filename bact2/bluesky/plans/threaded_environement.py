@@ -8,20 +8,23 @@ import itertools
 logger = logging.getLogger('bact2')
 
 
-def setup_threaded_executor():
-    q_cmd = Queue(maxsize=1)
+def setup_threaded_executor(max_in_flight=1):
+    q_cmd = Queue(maxsize=max_in_flight)
     q_res = Queue(maxsize=1)
 
-    executor = PlanDelegatorExecutor(command_queue=q_cmd, result_queue=q_res)
+    executor = PlanDelegatorExecutor(command_queue=q_cmd, result_queue=q_res,
+                                     max_in_flight=max_in_flight)
     return executor
 
 
-def run_environement(env, partial, md=None, log=None, n_loops=1):
+def run_environement(env, partial, md=None, log=None, n_loops=1, max_in_flight=1):
     '''Plan for executing environement.
 
     Args:
         env : a instanance of a subclass of :class:Environment
         n_loops : if negative run for ever
+        max_in_flight: number of commands which can be submitted ahead
+                       (see :meth:`Environment.steps`)
 
     This plan expects that env is used as an environement in an
     OpenAI or keras learning environment.
@@ -74,6 +77,7 @@ def run_environement(env, partial, md=None, log=None, n_loops=1):
             'setup_plan' : repr(env.setup_plan),
             'teardown_plan' : repr(env.teardown_plan),
             'n_loops' : n_loops,
+            'max_in_flight' : max_in_flight,
           },
         'plan_name' : 'environement_executor',
         'executor_type' : 'threaded',
@@ -87,7 +91,7 @@ def run_environement(env, partial, md=None, log=None, n_loops=1):
     @bpp.stage_decorator(objects_all)
     @bpp.run_decorator(md=_md)
     def run_inner():
-        executor = setup_threaded_executor()
+        executor = setup_threaded_executor(max_in_flight=max_in_flight)
 
         def run_partial(partial):
             return partial()
@@ -100,9 +104,10 @@ def run_environement(env, partial, md=None, log=None, n_loops=1):
             thread.start()
             log.info(f'run_environement: thread evaluating partial, executing plan')
             for cnt in itertools.count():
-                if n_loops < 0 or cnt < n_loops:
-                    log.info(f'run_environement: running loop {cnt}')
-                    r = (yield from execute_plan_stub(executor, log=log))
+                if n_loops >= 0 and cnt >= n_loops:
+                    break
+                log.info(f'run_environement: running loop {cnt}')
+                r = (yield from execute_plan_stub(executor, log=log))
         except Exception:
             log.error(f'run_environement: Failed to execute environment {env}')
             raise 
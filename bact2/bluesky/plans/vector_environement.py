@@ -0,0 +1,162 @@
+'''Step several environments with one plan
+
+:class:`Environment` submits one command per step: the executor hands
+it to the run engine and waits for the result. An agent working on N
+environments (e.g. N copies of a device) would pay these round trips
+N times per step and move and read the devices one after the other.
+
+:class:`VectorEnvironment` combines N environments: one step submits
+one plan which moves all motors together and reads all detectors once.
+Each environment computes its state and reward from the same
+reading; these are returned stacked, as vectorised gym environments
+do.
+'''
+from .environement import Environment
+
+import functools
+import numpy as np
+
+
+def _unique(objs):
+    '''objects in order, each only once (by identity)
+    '''
+    seen = set()
+    r = []
+    for obj in objs:
+        if id(obj) in seen:
+            continue
+        seen.add(id(obj))
+        r.append(obj)
+    return r
+
+
+class VectorEnvironment(Environment):
+    '''N environments stepped together
+
+    Args:
+        envs: the environments (instances of subclasses of
+              :class:`Environment`). These must not share motors
+
+    The detectors are read once per step: detectors shared by the
+    environments are read only once. The per step, setup, reset and
+    teardown plans of the first environment are used.
+
+    :meth:`step` expects one action vector per environment and returns
+    the stacked states, the rewards and the terminal flags as arrays.
+    '''
+    def __init__(self, envs, **kws):
+        envs = list(envs)
+        if len(envs) == 0:
+            raise AssertionError('At least one environment required')
+        self.envs = envs
+
+        motors = [m for env in envs for m in env.motors]
+        state_motors = [m for env in envs for m in env.state_motors]
+        for name, objs in (('motors', motors), ('state motors', state_motors)):
+            if len(_unique(objs)) != len(objs):
+                txt = f'Environments must not share {name}: {objs}'
+                raise AssertionError(txt)
+
+        first = envs[0]
+        for name in ('per_step_plan', 'reset_plan', 'setup_plan',
+                     'teardown_plan', 'user_args', 'user_kwargs'):
+            kws.setdefault(name, getattr(first, name))
+        kws.setdefault('log', first.log)
+
+        detectors = _unique(det for env in envs for det in env.detectors)
+        super().__init__(detectors=detectors, motors=motors,
+                         state_motors=state_motors, **kws)
+
+    @property
+    def n_envs(self):
+        return len(self.envs)
+
+    def _splitFlat(self, values, attr):
+        '''split the flat vector to the environments
+        '''
+        r = []
+        start = 0
+        for env in self.envs:
+            n = len(getattr(env, attr))
+            r.append(values[start:start + n])
+            start += n
+        return r
+
+    def flattenActions(self, actions):
+        '''one action vector per environment to one per motor
+        '''
+        if len(actions) != self.n_envs:
+            txt = (
+                f'Expected actions for {self.n_envs} environments'
+                f' but got {len(actions)}'
+            )
+            raise AssertionError(txt)
+
+        flat = []
+        for cnt, (env, action) in enumerate(zip(self.envs, actions)):
+            action = np.atleast_1d(action)
+            n_motors = len(env.motors)
+            if action.shape != (n_motors,):
+                txt = (
+                    f'Environment {cnt} expects {n_motors} actions'
+                    f' but got {action.shape}'
+                )
+                raise AssertionError(txt)
+            flat.extend(action.tolist())
+        return flat
+
+    #-------------------------------------------------------------------------
+    # delegated to the environments
+    def storeInitialState(self, dic):
+        for env in self.envs:
+            env.storeInitialState(dic)
+
+    def getStateToResetTo(self):
+        r = []
+        for env in self.envs:
+            r.extend(list(env.getStateToResetTo()))
+        return r
+
+    def computeState(self, dic):
+        return np.array([env.computeState(dic) for env in self.envs])
+
+    def computeRewardTerminal(self, dic):
+        r = [env.computeRewardTerminal(dic) for env in self.envs]
+        rewards, dones = zip(*r)
+        return np.array(rewards, np.float_), np.array(dones, np.bool_)
+
+    #-------------------------------------------------------------------------
+    def step(self, actions):
+        '''one step of all environments
+
+        Args:
+            actions: one action vector per environment
+
+        Returns:
+            states (stacked), rewards, dones (arrays of length n_envs),
+            infos (one dictionary per environment)
+
+        The state of this environment is done if all are done.
+        '''
+        return super().step(actions)
+
+    def _stepCommand(self, actions):
+        self.state.set_stepping()
+        try:
+            flat = self.flattenActions(actions)
+        except Exception:
+            self.executor.stopCommandExecution()
+            raise
+
+        cmd = functools.partial(self.per_step_plan, self.detectors,
+                                self.motors, flat, self.user_args,
+                                self.user_kwargs)
+        return cmd
+
+    def _stepResult(self, r_dic):
+        states = self.computeState(r_dic)
+        rewards, dones = self.computeRewardTerminal(r_dic)
+        infos = [{} for env in self.envs]
+        if dones.all() and not self.state.is_done:
+            self.state.set_done()
+        return states, rewards, dones, infos
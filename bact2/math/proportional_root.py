@@ -0,0 +1,191 @@
+'''Root of a response proportional to the excitation
+
+The orbit offset produced by a steerer is proportional to its current
+change: f(x) = gain * |x|. The x giving a target response is found
+from an estimate of the gain, e.g. the model response matrix or an
+earlier measurement of the same steerer:
+
+    * :func:`proportional_root_search` predicts x from the gain,
+      refits the gain to each evaluation and stops as soon as the
+      response is within tolerance. With a reasonable prior it
+      requires one or two evaluations.
+    * :class:`GainCache` keeps the gains: the ones of the model and
+      the ones found by the last search.
+
+The search is a generator: it yields the next x to evaluate and is
+sent the response. Thus it can be driven by a bluesky plan without
+a thread, see :func:`bact2.bluesky.plans.loop_steerers.steerer_scale_search_step`.
+'''
+from dataclasses import dataclass, field
+from typing import List
+import json
+import logging
+import numpy as np
+
+logger = logging.getLogger('bact2')
+
+
+@dataclass
+class ProportionalRootResult:
+    '''Result of :func:`proportional_root_search`
+    '''
+    #: x giving the target response (best estimate)
+    root: float
+    #: gain fitted to the evaluations
+    gain: float
+    #: the root was evaluated and the response is within tolerance
+    converged: bool
+    #: the evaluated x
+    x: List[float] = field(default_factory=list)
+    #: the responses
+    f: List[float] = field(default_factory=list)
+
+    @property
+    def n_evaluations(self):
+        return len(self.x)
+
+
+def fit_gain(x, f):
+    '''least squares fit of f = gain * |x|
+
+    Returns:
+        the gain; nan if all x are 0
+    '''
+    ax = np.absolute(np.asarray(x, np.float_))
+    f = np.asarray(f, np.float_)
+    denominator = (ax**2).sum()
+    if denominator == 0:
+        return np.nan
+    return (ax * f).sum() / denominator
+
+
+def proportional_root_search(f_target, x_start, gain=None, *, eps_rel=.1,
+                             max_evaluations=3, max_ratio=10, x_max=None):
+    '''Find x with gain * |x| = f_target
+
+    Args:
+        f_target:        the response to reach (> 0)
+        x_start:         x to evaluate first if no gain is known. Its
+                         sign is the sign of the root
+        gain:            prior estimate of the gain, e.g. from
+                         :class:`GainCache`
+        eps_rel:         relative tolerance of the response
+        max_evaluations: maximum number of evaluations
+        max_ratio:       maximum ratio of the next x to the last
+                         evaluated one: cautious extrapolation if the
+                         prior was far off
+        x_max:           maximum of abs(x)
+
+    Yields the x to evaluate and expects to be sent the response.
+    Returns a :class:`ProportionalRootResult`: if not converged its
+    root is the one predicted from the fitted gain.
+
+    Typical usage:
+
+    ::
+
+        search = proportional_root_search(1.0, x_start, gain)
+        x = next(search)
+        try:
+            while True:
+                x = search.send(measure(x))
+        except StopIteration as stop:
+            result = stop.value
+    '''
+    assert(f_target > 0)
+    assert(max_evaluations >= 1)
+    assert(max_ratio > 1)
+
+    sign = 1.0 if x_start >= 0 else -1.0
+    if x_max is None:
+        x_max = np.inf
+
+    def clip(x):
+        return sign * min(abs(x), x_max)
+
+    def predict(gain, x_last):
+        if not gain > 0:
+            # no response seen: step as far as allowed
+            return clip(x_last * max_ratio)
+        x = f_target / gain
+        return clip(min(x, abs(x_last) * max_ratio))
+
+    if gain is not None and gain > 0:
+        x = clip(f_target / gain)
+    else:
+        x = clip(abs(x_start))
+    assert(x != 0)
+
+    xv, fv = [], []
+    for cnt in range(max_evaluations):
+        f = yield x
+        xv.append(x)
+        fv.append(float(f))
+
+        gain = fit_gain(xv, fv)
+        logger.debug('proportional root: x %g f %g gain %g', x, f, gain)
+        if abs(f - f_target) <= eps_rel * f_target:
+            return ProportionalRootResult(x, gain, True, xv, fv)
+        x = predict(gain, x)
+
+    return ProportionalRootResult(x, gain, False, xv, fv)
+
+
+class GainCache:
+    '''Gains of the steerers: prior for :func:`proportional_root_search`
+
+    Args:
+        model_gains: dictionary steerer name -> gain predicted e.g. by
+                     the model (see :meth:`fromResponse`)
+
+    Gains found by a search are stored with :meth:`update` and are
+    preferred to the model ones. :meth:`save` and :meth:`load` keep
+    them for the next run.
+    '''
+    def __init__(self, model_gains=None):
+        self.model_gains = dict(model_gains or {})
+        self.measured_gains = {}
+
+    @classmethod
+    def fromResponse(cls, names, response_x, response_y=None, scale=1):
+        '''gains from the columns of the response matrices
+
+        Args:
+            names:      steerer name of each column
+            response_x: horizontal response (n_bpms, n_steerers)
+            response_y: vertical response (n_bpms, n_steerers)
+            scale:      to convert to the units of the response
+
+        The gain is the largest orbit offset (in both planes) per
+        unit current.
+        '''
+        resp = np.asarray(response_x, np.float_)**2
+        if response_y is not None:
+            resp = resp + np.asarray(response_y, np.float_)**2
+        gains = np.sqrt(resp).max(axis=0) * scale
+
+        names = list(names)
+        assert(len(names) == len(gains))
+        return cls(dict(zip(names, gains.tolist())))
+
+    def gain(self, name):
+        '''the gain of the steerer: measured or model; None if unknown
+        '''
+        gain = self.measured_gains.get(name, None)
+        if gain is None:
+            gain = self.model_gains.get(name, None)
+        return gain
+
+    def update(self, name, gain):
+        if not gain > 0:
+            logger.warning('Not storing gain %s for steerer %s', gain, name)
+            return
+        self.measured_gains[name] = float(gain)
+
+    def save(self, filename):
+        with open(filename, 'wt') as fp:
+            json.dump(self.measured_gains, fp)
+
+    def load(self, filename):
+        with open(filename, 'rt') as fp:
+            self.measured_gains.update(json.load(fp))
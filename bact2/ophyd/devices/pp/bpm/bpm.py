@@ -11,10 +11,11 @@ from ophyd.status import DeviceStatus, AndStatus
 from ...raw import bpm as bpm_raw
 from ...utils.derived_signal import DerivedSignalLinear
 from .bpm_parameters import create_bpm_config
-from .bpm_packed_data import (packed_data_to_named_array,
-                              raw_to_scaled_data_channel)
+from .bpm_packed_data import (PackedDataDecoder, ScaledDataConverter,
+                              effective_scale)
 import numpy as np
 import enum
+import time
 
 
 class BPMStatusBits(enum.IntEnum):
@@ -47,7 +48,34 @@ class DerivedSignalLinearBPM( DerivedSignalLinear ):
 
     The inverse is used for calculating the bpm offset
     in mm from the raw data.
+
+    The effective factor and offset are cached. The cache is cleared
+    whenever the gain, bit gain or offset signals change.
     '''
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._effective_scale = None
+        for sig in (self._gain, self._bit_gain, self._offset):
+            if isinstance(sig, Signal):
+                sig.subscribe(self._clearEffectiveScale, run=False)
+
+    def _clearEffectiveScale(self, *args, **kwargs):
+        self._effective_scale = None
+
+    def effectiveScale(self):
+        '''factor and offset: scaled = raw * factor - offset
+        '''
+        r = self._effective_scale
+        if r is None:
+            def value(sig):
+                if isinstance(sig, Signal):
+                    return sig.get()
+                return sig
+            r = effective_scale(value(self._gain), value(self._offset),
+                               bit_gain=value(self._bit_gain))
+            self._effective_scale = r
+        return r
+
     def forward(self, values):
         raise NotImplementedError('Can not make a bpm a steerer')
 
@@ -57,14 +85,8 @@ class DerivedSignalLinearBPM( DerivedSignalLinear ):
         BPM data are first scaled from raw data to mm.
         Then the offset is subtracted.
         '''
-
-        gain = self._gain.value
-        bit_gain = self._bit_gain.value
-        offset = self._offset.value
-
-        conv = raw_to_scaled_data_channel
-        r  = conv(values, gain, offset, bit_gain=bit_gain)
-        return r
+        factor, offset = self.effectiveScale()
+        return values * factor - offset
 
 class BPMChannelScale( DerivedSignalLinearBPM ):
     '''Values required for deriving BPM reading from raw signals
@@ -131,7 +153,15 @@ class BPMChannel( Device ):
 
     #: processed data: already in mm
     pos = Cpt(BPMChannelScale, parent_attr='pos_raw', name='pos')
-    rms = Cpt(BPMChannelScale, parent_attr='rms_raw', name='rms')
+    #: the offset only applies to the position
+    rms = Cpt(BPMChannelScale, parent_attr='rms_raw', name='rms',
+              parent_offset_attr=None)
+
+    def channelScale(self):
+        '''(gain, offset, bit_gain) as used by
+        :class:`bpm_packed_data.ScaledDataConverter`
+        '''
+        return (self.gain.get(), self.offset.get(), self.bit_gain.get())
 
     def trigger(self):
         raise NotImplementedError('Use BPMWaveform instead')
@@ -149,6 +179,18 @@ class BPMWaveform(  bpm_raw.BPMPackedData ):
     #: Number of valid beam position monitors
     n_valid_bpms = 128
 
+    #: number of buffers the packed data are decoded to in turn. The
+    #: signals refer to these buffers, so data handed out (e.g. to
+    #: bluesky documents) are overwritten after this number of
+    #: updates. Only set it if the consumers copy the data. None
+    #: allocates a new buffer for each update
+    packed_data_buffers = None
+
+    #: subscription run after new packed data were decoded and stored.
+    #: The callback receives the decoded data
+    #: (:class:`bpm_packed_data.PackedData`) as `data`
+    SUB_DECODED = 'decoded'
+
     #: All data for x
     x = Cpt(BPMChannel, 'x')
     #: All data for y
@@ -174,6 +216,11 @@ class BPMWaveform(  bpm_raw.BPMPackedData ):
         self.n_valid_bpms = int(self.n_valid_bpms)
         assert(self.n_valid_bpms > 0)
 
+        self._decoder = None
+        self._converter = None
+        for channel in (self.x, self.y):
+            for sig in (channel.gain, channel.offset, channel.bit_gain):
+                sig.subscribe(self._clearConverter, run=False)
         self.setConfigData()
 
     def setConfigData(self):
@@ -182,6 +229,7 @@ class BPMWaveform(  bpm_raw.BPMPackedData ):
         self.ds.put(rec['ds'])
         idx = rec['idx']
         self.indices.put(idx - 1)
+        self._decoder = None
         self.x.gain.put(rec['x_scale'])
         self.y.gain.put(rec['y_scale'])
         self.x.offset.put(rec['x_offset'])
@@ -206,16 +254,59 @@ class BPMWaveform(  bpm_raw.BPMPackedData ):
         self.status.put(array['stat'])
         self.gain_raw.put(array['gain_raw'])
 
-    def checkAndStorePackedData(self, packed_data):
+    def packedDataDecoder(self):
+        '''decoder for the packed data
 
-        indices = self.indices.value
+        Created again if the indices were changed
+        '''
+        indices = self.indices.get()
         if len(indices) == 0:
             indices = None
 
-        array = packed_data_to_named_array(packed_data,
-                                           n_valid_items=self.n_valid_bpms,
-                                           indices=indices)
-        return self.storeDataInWaveforms(array)
+        decoder = self._decoder
+        if decoder is not None:
+            t_indices = decoder.indices
+            if indices is None and t_indices is None:
+                return decoder
+            if (indices is not None and t_indices is not None
+                    and np.array_equal(indices, t_indices)):
+                return decoder
+
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid_bpms,
+                                    indices=indices,
+                                    n_buffers=self.packed_data_buffers)
+        self._decoder = decoder
+        return decoder
+
+    def _clearConverter(self, *args, **kwargs):
+        self._converter = None
+
+    def scaledDataConverter(self):
+        '''converter of raw readings to mm
+
+        Created again if a gain, bit gain or offset was changed
+        '''
+        converter = self._converter
+        if converter is None:
+            converter = ScaledDataConverter(self.x.channelScale(),
+                                            self.y.channelScale())
+            self._converter = converter
+        return converter
+
+    def scaleData(self, data, out=None):
+        '''decoded packed data (or stacked raw readings) to mm
+
+        See :meth:`bpm_packed_data.ScaledDataConverter.convert`
+        '''
+        return self.scaledDataConverter().convert(data, out=out)
+
+    def checkAndStorePackedData(self, packed_data):
+
+        array = self.packedDataDecoder().decode(packed_data)
+        r = self.storeDataInWaveforms(array)
+        self._run_subs(sub_type=self.SUB_DECODED, data=array,
+                       timestamp=time.time())
+        return r
 
     def trigger(self):
         status_processed = DeviceStatus(self, timeout=5)
@@ -232,8 +323,7 @@ class BPMWaveform(  bpm_raw.BPMPackedData ):
 
             data = self.packed_data.get()
             self.checkAndStorePackedData(data)
-            status_processed.success = True
-            status_processed._finished()
+            status_processed.set_finished()
 
         status = super().trigger()
         status.add_callback(check_data)
@@ -0,0 +1,198 @@
+'''Beam position monitor readings collected in batches
+
+Triggering :class:`BPMWaveform` once per reading creates one event
+document per reading. :class:`BPMWaveformBatch` collects
+`n_readings` consecutive updates of the packed data on one trigger and
+provides them as stacked arrays (one row per reading) together with the
+reading counters and time stamps. Alternatively only the mean and
+standard deviation over the readings are read.
+'''
+from ophyd import Component as Cpt, Signal, Kind
+from ophyd.status import DeviceStatus
+
+from ...utils.ring_buffer import RingBuffer
+from .bpm import BPMWaveform
+
+import logging
+import threading
+
+logger = logging.getLogger('bact2')
+
+
+class ReadingBatch:
+    '''Collects a fixed number of decoded bpm readings
+
+    Args:
+        n_readings: number of readings to collect
+        converter:  a :class:`bpm_packed_data.ScaledDataConverter`; the
+                    readings are scaled to mm when added
+    '''
+    def __init__(self, n_readings, converter):
+        n_readings = int(n_readings)
+        assert(n_readings > 0)
+        self.n_readings = n_readings
+        self.converter = converter
+        self.buffer = RingBuffer(n_readings)
+        self._scaled = None
+
+    @property
+    def complete(self):
+        return len(self.buffer) >= self.n_readings
+
+    def add(self, data, timestamp, counter):
+        '''add one decoded reading
+
+        Args:
+            data: decoded packed data (see
+                  :class:`bpm_packed_data.PackedData`)
+
+        Returns:
+            True if the batch is complete
+        '''
+        assert(not self.complete)
+
+        scaled = self.converter.convert(data, out=self._scaled)
+        self._scaled = scaled.matrix
+        self.buffer.append(
+            time=timestamp, counter=counter,
+            x=scaled['x_pos'], y=scaled['y_pos'],
+            x_rms=scaled['x_rms'], y_rms=scaled['y_rms'],
+            status=data['stat'],
+        )
+        return self.complete
+
+    def stacked(self, name):
+        '''all readings of field name, one row per reading
+        '''
+        return self.buffer.ordered(name)
+
+    def mean(self, name):
+        return self.buffer.mean(name)
+
+    def std(self, name):
+        return self.buffer.std(name)
+
+
+class BPMWaveformBatch(BPMWaveform):
+    '''Collect `n_readings` fresh readings on one trigger
+
+    An update of the packed data received after the trigger is
+    decoded and added to the batch if it is a fresh reading: ready is
+    high and the counter changed since the last accepted reading (the
+    check of :meth:`BPMMeasurementStates.checkCounter`). Thus packed
+    data sent early or a second time by the IOC are skipped. The
+    status finishes when `n_readings` readings were accepted.
+
+    If `summary_only` is set, the stacked arrays are not read; only
+    the mean and standard deviation over the readings are. The mode
+    is applied when the device is staged.
+
+    The signals of :class:`BPMWaveform` contain the last reading.
+    '''
+    #: number of readings per trigger
+    n_readings = Cpt(Signal, name='n_readings', value=1, kind=Kind.config)
+    #: only read mean and std over the readings
+    summary_only = Cpt(Signal, name='summary_only', value=False,
+                       kind=Kind.config)
+
+    #: per reading: the bpm counter and the time stamp
+    batch_counter = Cpt(Signal, name='batch_counter', value=[])
+    batch_timestamp = Cpt(Signal, name='batch_timestamp', value=[])
+
+    #: per reading, scaled to mm
+    batch_x = Cpt(Signal, name='batch_x', value=[])
+    batch_y = Cpt(Signal, name='batch_y', value=[])
+    batch_x_rms = Cpt(Signal, name='batch_x_rms', value=[])
+    batch_y_rms = Cpt(Signal, name='batch_y_rms', value=[])
+    batch_status = Cpt(Signal, name='batch_status', value=[])
+
+    #: over the readings
+    x_mean = Cpt(Signal, name='x_mean', value=[])
+    x_std = Cpt(Signal, name='x_std', value=[])
+    y_mean = Cpt(Signal, name='y_mean', value=[])
+    y_std = Cpt(Signal, name='y_std', value=[])
+
+    _stacked_signal_names = (
+        ('batch_counter', 'counter'), ('batch_timestamp', 'time'),
+        ('batch_x', 'x'), ('batch_y', 'y'), ('batch_x_rms', 'x_rms'),
+        ('batch_y_rms', 'y_rms'), ('batch_status', 'status'),
+    )
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._batch_lock = threading.Lock()
+
+    def newBatch(self):
+        return ReadingBatch(self.n_readings.get(), self.scaledDataConverter())
+
+    def _applyMode(self):
+        '''stacked arrays only read if requested
+        '''
+        if self.summary_only.get():
+            kind = Kind.omitted
+        else:
+            kind = Kind.normal
+        for sig_name, unused in self._stacked_signal_names:
+            getattr(self, sig_name).kind = kind
+
+    def stage(self):
+        # the kinds define the event descriptor: only change them
+        # outside of a run
+        self._applyMode()
+        return super().stage()
+
+    def storeBatch(self, batch):
+        '''Store the collected readings to the signals
+        '''
+        for sig_name, field in self._stacked_signal_names:
+            getattr(self, sig_name).put(batch.stacked(field))
+
+        self.x_mean.put(batch.mean('x'))
+        self.x_std.put(batch.std('x'))
+        self.y_mean.put(batch.mean('y'))
+        self.y_std.put(batch.std('y'))
+
+    def trigger(self):
+        batch = self.newBatch()
+        timeout = self.bpm_timeout * 2 * batch.n_readings
+        status = DeviceStatus(self, timeout=timeout)
+        # counter of the reading available when triggered
+        last_counter = int(self.counter.get())
+
+        def on_packed_data(value=None, timestamp=None, **kwargs):
+            nonlocal last_counter
+            with self._batch_lock:
+                if status.done or batch.complete:
+                    return
+                if not self.ready.get():
+                    # sent before the reading was complete
+                    return
+                counter = int(self.counter.get())
+                if counter == last_counter:
+                    # sent once again
+                    logger.debug(f'{self.name}: same counter value {counter}'
+                                 ' once again')
+                    return
+                last_counter = counter
+                try:
+                    data = self.packedDataDecoder().decode(value)
+                    self.storeDataInWaveforms(data)
+                    self._run_subs(sub_type=self.SUB_DECODED, data=data,
+                                   timestamp=timestamp)
+                    if not batch.add(data, timestamp, counter):
+                        return
+                    self.storeBatch(batch)
+                except Exception as exc:
+                    logger.error(f'{self.name}: failed to process bpm data:'
+                                 f' {exc}')
+                    status.set_exception(exc)
+                    return
+            status.set_finished()
+
+        cid = self.packed_data.subscribe(on_packed_data, run=False)
+
+        def unsubscribe(status):
+            self.packed_data.unsubscribe(cid)
+
+        status.add_callback(unsubscribe)
+        return status
@@ -0,0 +1,138 @@
+'''History of beam position monitor readings
+
+:class:`BPMHistory` records the orbits decoded by
+:class:`bact2.ophyd.devices.pp.bpm.bpm.BPMWaveform` in a fixed size ring
+buffer. Statistics over the last readings are provided as signals.
+'''
+from ophyd import Component as Cpt, Device, Signal
+from ophyd.status import DeviceStatus
+
+from ...utils.ring_buffer import RingBuffer
+
+import numpy as np
+import threading
+
+
+class BPMHistory(Device):
+    '''Keep the last `max_readings` orbits of a bpm waveform
+
+    Args:
+        waveform:      the :class:`BPMWaveform` to record
+        waveform_name: alternatively the name of the waveform within
+                       the parent
+
+    Recording starts when the device is staged (or
+    :meth:`startRecording` is called). Each update of the waveform is
+    scaled to mm and appended to :attr:`buffer`. Triggering computes
+    the statistics over the last `window` readings (all if 0).
+
+    Use :attr:`buffer` (a
+    :class:`bact2.ophyd.devices.utils.ring_buffer.RingBuffer`) to access
+    the recorded data: fields time, x, y, x_rms, y_rms and status.
+    '''
+    max_readings = Cpt(Signal, name='max_readings', value=1000)
+    window = Cpt(Signal, name='window', value=0)
+
+    n_readings = Cpt(Signal, name='n_readings', value=0)
+    x_mean = Cpt(Signal, name='x_mean', value=np.nan)
+    x_std = Cpt(Signal, name='x_std', value=np.nan)
+    x_min = Cpt(Signal, name='x_min', value=np.nan)
+    x_max = Cpt(Signal, name='x_max', value=np.nan)
+    y_mean = Cpt(Signal, name='y_mean', value=np.nan)
+    y_std = Cpt(Signal, name='y_std', value=np.nan)
+    y_min = Cpt(Signal, name='y_min', value=np.nan)
+    y_max = Cpt(Signal, name='y_max', value=np.nan)
+
+    _default_config_attrs = ('max_readings', 'window')
+
+    def __init__(self, *args, waveform=None, waveform_name=None, parent=None,
+                 **kwargs):
+        super().__init__(*args, parent=parent, **kwargs)
+        if waveform is None and waveform_name is not None:
+            waveform = getattr(parent, waveform_name)
+        self.waveform = waveform
+
+        self.buffer = None
+        self._lock = threading.Lock()
+        self._subscription = None
+        self._scaled = None
+        self.resetReadings()
+
+    def resetReadings(self):
+        with self._lock:
+            self.buffer = RingBuffer(self.max_readings.get())
+            self._scaled = None
+        self.n_readings.put(0)
+
+    def startRecording(self):
+        assert(self.waveform is not None)
+        if self._subscription is not None:
+            return
+        self._subscription = self.waveform.subscribe(
+            self._onDecoded, event_type=self.waveform.SUB_DECODED, run=False)
+
+    def stopRecording(self):
+        if self._subscription is None:
+            return
+        self.waveform.unsubscribe(self._subscription)
+        self._subscription = None
+
+    def _onDecoded(self, data=None, timestamp=None, **kwargs):
+        # the buffer appends copies: the scaled data can be reused
+        scaled = self.waveform.scaleData(data, out=self._scaled)
+        self._scaled = scaled.matrix
+        self.addReading(
+            timestamp,
+            x=scaled['x_pos'], y=scaled['y_pos'],
+            x_rms=scaled['x_rms'], y_rms=scaled['y_rms'],
+            status=data['stat'],
+        )
+
+    def addReading(self, timestamp, *, x, y, x_rms, y_rms, status):
+        '''Append one orbit (already in mm) to the buffer
+        '''
+        with self._lock:
+            self.buffer.append(time=timestamp, x=x, y=y, x_rms=x_rms,
+                               y_rms=y_rms, status=status)
+
+    def updateStatistics(self):
+        '''Statistics over the last `window` readings
+        '''
+        n = int(self.window.get())
+        signals = {
+            'x': (self.x_mean, self.x_std, self.x_min, self.x_max),
+            'y': (self.y_mean, self.y_std, self.y_min, self.y_max),
+        }
+
+        with self._lock:
+            buf = self.buffer
+            n_readings = len(buf)
+            if n > 0:
+                n_readings = min(n, n_readings)
+            values = {}
+            if n_readings > 0:
+                for name in signals:
+                    values[name] = (buf.mean(name, n), buf.std(name, n),
+                                    buf.min(name, n), buf.max(name, n))
+
+        self.n_readings.put(n_readings)
+        for name, sigs in signals.items():
+            vals = values.get(name, (np.nan,) * len(sigs))
+            for sig, val in zip(sigs, vals):
+                sig.put(val)
+
+    def trigger(self):
+        self.updateStatistics()
+        status = DeviceStatus(self)
+        status.set_finished()
+        return status
+
+    def stage(self):
+        r = super().stage()
+        self.resetReadings()
+        self.startRecording()
+        return r
+
+    def unstage(self):
+        self.stopRecording()
+        return super().unstage()
@@ -71,6 +71,154 @@ def packed_data_to_named_array(packed_data, n_valid_items=None, indices=None):
     return t_array
 
 
+#: the signals contained in the packed data (in this order)
+packed_data_names = (
+    'x_pos_raw', 'y_pos_raw', 'intensity_z', 'intensity_s', 'stat',
+    'gain_raw', 'x_rms_raw', 'y_rms_raw',
+)
+
+_packed_data_rows = {name: cnt for cnt, name in enumerate(packed_data_names)}
+
+
+class PackedData:
+    '''Decoded packed data: one row per signal
+
+    Args:
+        matrix: array of shape (8, n_bpms)
+
+    The signals are accessed by name (see :data:`packed_data_names`),
+    e.g. `data['x_pos_raw']`. These are views of the matrix.
+    '''
+    def __init__(self, matrix):
+        self.matrix = matrix
+        self._rows = {name: matrix[row] for name, row in _packed_data_rows.items()}
+
+    def __getitem__(self, name):
+        return self._rows[name]
+
+    def keys(self):
+        return self._rows.keys()
+
+    @property
+    def x(self):
+        return self._rows['x_pos_raw']
+
+    @property
+    def y(self):
+        return self._rows['y_pos_raw']
+
+    @property
+    def intensity(self):
+        return self.matrix[2:4]
+
+    @property
+    def status(self):
+        return self._rows['stat']
+
+    @property
+    def gain(self):
+        return self._rows['gain_raw']
+
+
+class PackedDataDecoder:
+    '''Validate and decode packed data without intermediate arrays
+
+    Args:
+        n_valid_items: number of valid items (see
+                       :func:`unpack_and_validate_data`)
+        indices:       the columns to select from the packed data. None
+                       to use all
+        n_buffers:     number of preallocated buffers used in turn. The
+                       data returned by :meth:`decode` are overwritten
+                       n_buffers decodes later. If None a new buffer is
+                       allocated for each decode
+
+    Same result as :func:`packed_data_to_named_array`. The packed data
+    are only reshaped (views), the unused half is checked in place and
+    the selected columns are gathered directly into the buffer.
+    '''
+    def __init__(self, n_valid_items=None, indices=None, n_buffers=2):
+        assert(n_valid_items is not None)
+        self.n_valid_items = int(n_valid_items)
+
+        if indices is not None:
+            indices = np.asarray(indices, dtype=np.intp)
+            process_vector.check_is_vector(indices)
+            if len(indices) > 0 and indices.min() < 0:
+                raise process_vector.Bact2AssertionError(
+                    f'negative indices {indices[indices < 0]}'
+                )
+        self.indices = indices
+
+        if n_buffers is not None:
+            n_buffers = int(n_buffers)
+            assert(n_buffers > 0)
+        self.n_buffers = n_buffers
+
+        self._buffers = []
+        self._next = 0
+
+    def _allocate(self, shape, dtype):
+        return PackedData(np.empty(shape, dtype=dtype))
+
+    def _buffer(self, shape, dtype):
+        if self.n_buffers is None:
+            return self._allocate(shape, dtype)
+
+        if self._buffers:
+            t_mat = self._buffers[0].matrix
+            if t_mat.shape != shape or t_mat.dtype != dtype:
+                self._buffers = []
+        if not self._buffers:
+            self._buffers = [self._allocate(shape, dtype)
+                             for i in range(self.n_buffers)]
+            self._next = 0
+
+        r = self._buffers[self._next]
+        self._next = (self._next + 1) % self.n_buffers
+        return r
+
+    def _validate(self, packed_data):
+        '''split off the data; check the unused half
+        '''
+        mat1 = process_vector.unpack_vector_to_matrix(packed_data, n_vecs=2)
+        unused = mat1[1]
+        n_valid = self.n_valid_items
+        if len(unused) < n_valid or np.count_nonzero(unused[n_valid:]):
+            # raises the appropriate exception
+            process_vector.check_unset_elements(
+                unused, n_valid_rows=n_valid, unset_elements_value=0)
+
+        return process_vector.unpack_vector_to_matrix(mat1[0], n_vecs=8)
+
+    def decode(self, packed_data):
+        '''decoded packed data
+
+        Returns:
+            :class:`PackedData`
+        '''
+        mat = self._validate(packed_data)
+        indices = self.indices
+
+        if indices is None:
+            r = self._buffer(mat.shape, mat.dtype)
+            np.copyto(r.matrix, mat)
+            return r
+
+        n_columns = mat.shape[1]
+        if len(indices) > 0 and indices.max() >= n_columns:
+            txt = (
+                f'index {indices.max()} out of range for packed data'
+                f' with {n_columns} columns'
+            )
+            raise process_vector.Bact2AssertionError(txt)
+
+        r = self._buffer((mat.shape[0], len(indices)), mat.dtype)
+        # indices checked above: clip avoids buffering the output
+        np.take(mat, indices, axis=1, out=r.matrix, mode='clip')
+        return r
+
+
 #: default bit gain for bpms. Scales raw readings to mm scale
 #: These can be still wrong by factors, but are then in the appropriate decade
 bit_gain_default = 2**15/10.0
@@ -95,31 +243,145 @@ def raw_to_scaled_data_channel(values, gain, offset, bit_gain=None):
     return r
 
 
-def raw_to_scaled_data(a_array, bpm_parameters, bit_gain=None):
-    '''Scale the channel data for the bpms
+def effective_scale(gain, offset, bit_gain=None):
+    '''factor and offset: scaled = raw * factor - offset
+    '''
+    gain = np.asarray(gain, dtype=np.float_)
+    if bit_gain is not None:
+        gain = gain * bit_gain
+    return 1.0 / gain, np.asarray(offset, dtype=np.float_)
+
+
+#: the signals of :class:`ScaledData` (in this order)
+scaled_data_names = ('x_pos', 'y_pos', 'x_rms', 'y_rms')
+
+#: rows of the raw signals in the packed data
+scaled_data_raw_rows = np.array(
+    [_packed_data_rows[name + '_raw'] for name in scaled_data_names],
+    dtype=np.intp
+)
+
+
+class ScaledData:
+    '''BPM readings in mm: one row per signal
 
     Args:
-       a_array: a record array containing the raw data of the bpm's
-       bpm_parameters: a record array containing the rescale values
-       bit_gain: conversion factor from bit to gain parameters
+        matrix: array of shape (..., 4, n_bpms)
+
+    The signals are accessed by name (see :data:`scaled_data_names`).
+    These are views of the matrix. Stacked readings (leading axes)
+    are supported.
     '''
+    def __init__(self, matrix):
+        self.matrix = matrix
 
-    conv = raw_to_scaled_data_channel
+    def __getitem__(self, name):
+        return self.matrix[..., scaled_data_names.index(name), :]
 
-    x_scale = bpm_parameters['x_scale']
-    x_offset = bpm_parameters['x_offset']
-    x_pos = conv(a_array['x_pos_raw'], x_scale, x_offset, bit_gain=bit_gain)
-    x_rms = conv(a_array['x_rms_raw'], x_scale, 0.0, bit_gain=bit_gain)
+    def keys(self):
+        return scaled_data_names
 
-    del x_scale, x_offset
 
-    y_scale = bpm_parameters['x_scale']
-    y_offset = bpm_parameters['x_offset']
-    y_pos = conv(a_array['y_pos_raw'], y_scale, y_offset, bit_gain=bit_gain)
-    y_rms = conv(a_array['y_rms_raw'], y_scale, 0.0, bit_gain=bit_gain)
+class ScaledDataConverter:
+    '''Scale raw bpm readings of both channels to mm
+
+    Args:
+        x_scale: (gain, offset, bit_gain) of the x channel
+        y_scale: (gain, offset, bit_gain) of the y channel
+
+    The gains and offsets can be scalars or vectors (one entry per
+    bpm). The effective factors and offsets are computed once. The
+    offset is only subtracted from the positions, not from the rms
+    values.
 
-    del y_scale, y_offset
+    See :func:`raw_to_scaled_data_channel` for the conversion.
+    '''
+    def __init__(self, x_scale, y_scale):
+        x_factor, x_offset = effective_scale(*x_scale)
+        y_factor, y_offset = effective_scale(*y_scale)
+
+        shape = np.broadcast_shapes(x_factor.shape, x_offset.shape,
+                                    y_factor.shape, y_offset.shape)
+        factor = np.empty((len(scaled_data_names),) + shape)
+        offset = np.zeros_like(factor)
+        factor[0::2] = x_factor
+        factor[1::2] = y_factor
+        offset[0] = x_offset
+        offset[1] = y_offset
+
+        if shape == ():
+            # broadcast along the bpms
+            factor = factor[:, np.newaxis]
+            offset = offset[:, np.newaxis]
+        self.factor = factor
+        self.offset = offset
+
+    def _scale(self, out):
+        np.multiply(out, self.factor, out=out)
+        np.subtract(out, self.offset, out=out)
+        return ScaledData(out)
+
+    def _output(self, shape, dtype, out):
+        if out is None:
+            dtype = np.result_type(dtype, self.factor.dtype)
+            return np.empty(shape, dtype=dtype)
+        if out.shape != shape:
+            txt = f'output shape {out.shape} does not match {shape}'
+            raise AssertionError(txt)
+        return out
+
+    def convert_matrix(self, mat, out=None):
+        '''Scale decoded packed data
+
+        Args:
+            mat: array of shape (..., 8, n_bpms) (see :class:`PackedData`)
+            out: array of shape (..., 4, n_bpms) to store the result to
+
+        Returns:
+            :class:`ScaledData`
+        '''
+        mat = np.asarray(mat)
+        shape = mat.shape[:-2] + (len(scaled_data_names), mat.shape[-1])
+        out = self._output(shape, mat.dtype, out)
+        # take first: out is float, packed data are typically integers
+        out[...] = np.take(mat, scaled_data_raw_rows, axis=-2, mode='clip')
+        return self._scale(out)
+
+    def convert(self, data, out=None):
+        '''Scale raw readings
+
+        Args:
+            data: :class:`PackedData` or a mapping (e.g. record array)
+                  with the entries 'x_pos_raw', 'y_pos_raw', 'x_rms_raw'
+                  and 'y_rms_raw'. These can be stacked readings of
+                  shape (n_readings, n_bpms)
+            out:  see :meth:`convert_matrix`
+        '''
+        if isinstance(data, PackedData):
+            return self.convert_matrix(data.matrix, out=out)
+
+        raw = [np.asarray(data[name + '_raw']) for name in scaled_data_names]
+        t_raw = raw[0]
+        shape = t_raw.shape[:-1] + (len(raw), t_raw.shape[-1])
+        out = self._output(shape, t_raw.dtype, out)
+        for cnt, val in enumerate(raw):
+            out[..., cnt, :] = val
+        return self._scale(out)
+
+
+def raw_to_scaled_data(a_array, bpm_parameters, bit_gain=None):
+    '''Scale the channel data for the bpms
+
+    Args:
+       a_array: a record array containing the raw data of the bpm's
+       bpm_parameters: a record array containing the rescale values
+       bit_gain: conversion factor from bit to gain parameters
+    '''
+    x_scale = (bpm_parameters['x_scale'], bpm_parameters['x_offset'], bit_gain)
+    y_scale = (bpm_parameters['y_scale'], bpm_parameters['y_offset'], bit_gain)
+    converter = ScaledDataConverter(x_scale, y_scale)
+    scaled = converter.convert(a_array)
 
     t_names = ['x_pos', 'y_pos',  'x_rms', 'y_rms']
-    res = fromarrays([x_pos, y_pos, x_rms, y_rms], names=t_names)
+    res = fromarrays([scaled[name] for name in t_names], names=t_names)
     return res
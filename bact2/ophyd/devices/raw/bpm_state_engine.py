@@ -1,5 +1,6 @@
 from ..utils import measurement_state_machine
 from ...utils import execute_async
+from .bpm_timing import AcquisitionTiming
 from ophyd.status import DeviceStatus
 import time
 import logging
@@ -65,6 +66,8 @@ class BPMMeasurementStates:
         self.measurement_state = measurement_state_machine.AcquisitionState()
         self._execute_async = execute_async.ExecuteAsynchronisly()
         self.__logger = logger
+        #: time spent in the different phases
+        self.timing = AcquisitionTiming()
 
     def setLogger(self, logger):
         self.__logger = logger
@@ -103,11 +106,12 @@ class BPMMeasurementStates:
 
 
         if val == self._counter:
-            fmt = "At {:.3f} got same counter value {} once again"
-            self.__logger.debug(fmt.format(self.dt, self._counter))
+            self.__logger.debug("At %.3f got same counter value %s once again",
+                                self.dt, self._counter)
             return None
 
         state = self.measurement_state
+        self.timing.counterChanged()
         fmt = "At {:.5f} state {} counter value changed from {} to {} "
         txt = fmt.format(self.dt, state.state, self._counter, val, )
 
@@ -155,7 +159,8 @@ class BPMMeasurementStates:
         self.measurement_state.set_triggered()
         self._counter = None
         self.tic()
-        self.__logger.info("At {:.3f} s: triggered acquisition ".format(self.dt))
+        self.timing.triggered()
+        self.__logger.debug("At %.3f s: triggered acquisition", self.dt)
 
     def set_acquire(self):
         """
@@ -163,14 +168,14 @@ class BPMMeasurementStates:
         When BPM signals that status is finished set the state
         engine to finished to
         """
-        fmt = "At {:.3f} s: setting to acquire mode after "
-        self.__logger.info(fmt.format(self.dt))
+        self.__logger.debug("At %.3f s: setting to acquire mode", self.dt)
         self.measurement_state.set_acquire()
+        self.timing.acquire()
 
     def set_validate(self):
-        fmt = "At {:.3f} s: setting to validate mode"
-        self.__logger.info(fmt.format(self.dt))
+        self.__logger.debug("At %.3f s: setting to validate mode", self.dt)
         self.measurement_state.set_validate()
+        self.timing.validate()
         self.tic()
 
     def set_finished(self):
@@ -178,12 +183,14 @@ class BPMMeasurementStates:
 
         Remove the callbacks to the changed values
         """
-        self.__logger.info("At {:.3f} s: finished acquistion ".format(self.dt))
+        self.__logger.debug("At %.3f s: finished acquistion", self.dt)
         self.measurement_state.set_finished()
+        self.timing.finished()
 
     def set_failed(self):
         self.__logger.warning("Switched to fail state dt = {:.3f}".format(self.dt))
         self.measurement_state.set_failed()
+        self.timing.failed()
 
     def onValueChange(self, *args, obj = None, **kwargs):
         """Common dispatch method for the triggers
@@ -220,8 +227,8 @@ class BPMMeasurementStates:
 
         method = self.onValueChangeMethods[self.measurement_state.state]
 
-        fmt = "At {}:,3f onValueChange delegating to {} args {} kwargs {}"
-        self.__logger.debug(fmt.format(self.dt, method, args, kwargs))
+        self.__logger.debug("At %.3f onValueChange delegating to %s args %s kwargs %s",
+                            self.dt, method, args, kwargs)
 
         r = method(*args, **kwargs)
         return r
@@ -247,11 +254,10 @@ class BPMMeasurementStates:
         """
         #self.log("on value triggered args {} kwargs {}".format(args, kwargs))
 
-        self.__logger.info("At {:.3f} s: change triggered by name {}".format(self.dt, name))
+        self.__logger.debug("At %.3f s: change triggered by name %s", self.dt, name)
         if name == "ready":
             ready = kwargs["value"]
-            txt = "At {:.3f} s: triggered ready val = {}".format(self.dt, ready)
-            self.__logger.info(txt)
+            self.__logger.debug("At %.3f s: triggered ready val = %s", self.dt, ready)
             if not ready:
                 # Waiting for the data!
                 self.set_acquire()
@@ -262,12 +268,12 @@ class BPMMeasurementStates:
         If ready returns to high switch to validate
         """
         #self.log("on value acquire args {} kwargs {}".format(args, kwargs))
-        self.__logger.debug("At {:.3f} s: on change acquire name {}".format(self.dt, name))
+        self.__logger.debug("At %.3f s: on change acquire name %s", self.dt, name)
 
         value = kwargs["value"]
         if name == 'ready':
             ready = value
-            self.__logger.info("At {:.3f} s: acquire ready val = {}".format(self.dt, ready))
+            self.__logger.debug("At %.3f s: acquire ready val = %s", self.dt, ready)
             if ready:
                 self.set_validate()
 
@@ -294,19 +300,19 @@ class BPMMeasurementStates:
             Review if a check should be made if ready falls off to low
         """
         # self.log("on value validate args {} kwargs {}".format(args, kwargs))
-        self.__logger.info("At {:.3f}: validate {}".format(self.dt, name))
+        self.__logger.debug("At %.3f: validate %s", self.dt, name)
 
 
         value = kwargs["value"]
         if name == "ready":
             ready = value
-            self.__logger.info("Validate dt {:.3f} ready val = {}".format(self.dt, ready))
+            self.__logger.debug("Validate dt %.3f ready val = %s", self.dt, ready)
 
         elif name == 'counter':
             self.checkCounter(value)
 
         elif name == 'packed_data':
-            self.__logger.info("Validate got bdata: now last check")
+            self.__logger.debug("Validate got bdata: now last check")
 
         else:
             self.set_failed()
@@ -377,6 +383,16 @@ class BPMMeasurementStates:
 
 
         signals = self.parent.ready, self.parent.counter, self.parent.packed_data
+
+        # the pending validation check: superseded by the next update
+        validation_timer = None
+
+        def cancel_validation_timer():
+            nonlocal validation_timer
+            if validation_timer is not None:
+                validation_timer.cancel()
+                validation_timer = None
+
         def clear_callbacks_to_signals():
             """Clear the update_cb to the signals
 
@@ -385,6 +401,7 @@ class BPMMeasurementStates:
             nonlocal signals
             for signal in signals:
                 signal.clear_sub(update_cb)
+            cancel_validation_timer()
 
         # Used as a counting semaphore ... it is incremented in
         # update_cb if in validation state
@@ -419,6 +436,7 @@ class BPMMeasurementStates:
             Handles validation over to :func:`check_and_finish`
             """
             nonlocal status, signals, n_updates_during_validation
+            nonlocal validation_timer
 
             if status.done:
                 clear_callbacks_to_signals()
@@ -448,8 +466,11 @@ class BPMMeasurementStates:
                 # The details are handled by :func:`check_and_finish`
                 # NB: n_updates_during_validation must be an in place increment
                 n_updates_during_validation += 1
+                if n_updates_during_validation > 1:
+                    self.timing.validationRestart()
                 f = functools.partial(check_and_finish, n_updates_during_validation)
-                self._execute_async.callLater(validation_time, f)
+                cancel_validation_timer()
+                validation_timer = self._execute_async.callLater(validation_time, f)
 
             else:
                 pass
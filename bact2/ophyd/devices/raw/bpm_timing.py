@@ -0,0 +1,162 @@
+"""Timing of the beam position monitor acquisition
+
+:class:`AcquisitionTiming` is informed by
+:class:`bpm_state_engine.BPMMeasurementStates` about each transition and
+records the time spent in each phase of a measurement:
+
+    * wait_ready: triggered until ready falls (the IOC acquires)
+    * acquire:    ready low until it rises again. The phase also ends
+                  if the counter changes or packed data arrive before
+                  (see :meth:`BPMMeasurementStates.onValueChangeAcquire`)
+    * validate:   validation until no new data arrived
+    * total:      triggered until finished
+
+The durations are aggregated in
+:class:`bact2.ophyd.devices.utils.latency_histogram.LatencyHistogram`.
+:class:`BPMAcquisitionTiming` makes the last measurement readable as
+ophyd signals.
+"""
+from ophyd import Component as Cpt, Signal
+
+from ..utils.latency_histogram import LatencyHistogram
+from ..utils.timing_device import TimingDevice
+import numpy as np
+import time
+
+
+class AcquisitionTiming:
+    """Time stamps of one measurement and histograms over all of them
+    """
+    phases = ('wait_ready', 'acquire', 'validate', 'total')
+
+    def __init__(self, **histogram_kws):
+        self.histograms = {
+            name: LatencyHistogram(**histogram_kws) for name in self.phases
+        }
+        self.reset()
+
+    def _clear(self):
+        self._t_triggered = None
+        self._t_acquire = None
+        self._t_validate = None
+        self._n_counter_changes = 0
+        self._n_validation_restarts = 0
+
+    def reset(self):
+        for hist in self.histograms.values():
+            hist.reset()
+        self.n_triggers = 0
+        self.n_finished = 0
+        self.n_failed = 0
+        self.n_counter_changes_total = 0
+        self.n_validation_restarts_total = 0
+        self.last = {name: np.nan for name in self.phases}
+        self.last_counter_changes = 0
+        self.last_validation_restarts = 0
+        self._clear()
+
+    def triggered(self):
+        self._clear()
+        self.n_triggers += 1
+        self._t_triggered = time.monotonic()
+
+    def acquire(self):
+        self._t_acquire = time.monotonic()
+
+    def validate(self):
+        self._t_validate = time.monotonic()
+
+    def counterChanged(self):
+        self._n_counter_changes += 1
+
+    def validationRestart(self):
+        """new data arrived during validation
+        """
+        self._n_validation_restarts += 1
+
+    def finished(self):
+        now = time.monotonic()
+        t_trig, t_acq, t_val = self._t_triggered, self._t_acquire, self._t_validate
+        if t_trig is None:
+            # not triggered through the state engine
+            return
+
+        def duration(start, end):
+            if start is None or end is None:
+                return np.nan
+            return end - start
+
+        last = {
+            'wait_ready': duration(t_trig, t_acq),
+            'acquire': duration(t_acq, t_val),
+            'validate': duration(t_val, now),
+            'total': duration(t_trig, now),
+        }
+        for name, val in last.items():
+            if not np.isnan(val):
+                self.histograms[name].add(val)
+
+        self.last = last
+        self.last_counter_changes = self._n_counter_changes
+        self.last_validation_restarts = self._n_validation_restarts
+        self.n_counter_changes_total += self._n_counter_changes
+        self.n_validation_restarts_total += self._n_validation_restarts
+        self.n_finished += 1
+        self._clear()
+
+    def failed(self):
+        self.n_failed += 1
+        self._clear()
+
+    def summary(self, quantiles=(.5, .9, .99)):
+        """aggregated timing of all measurements
+
+        Returns:
+            dictionary phase name -> summary of its histogram (see
+            :meth:`LatencyHistogram.summary`) and the counts of
+            triggers, failures, counter changes and validation restarts
+        """
+        r = {name: hist.summary(quantiles) for name, hist in self.histograms.items()}
+        r['counts'] = {
+            'triggers': self.n_triggers,
+            'finished': self.n_finished,
+            'failed': self.n_failed,
+            'counter_changes': self.n_counter_changes_total,
+            'validation_restarts': self.n_validation_restarts_total,
+        }
+        return r
+
+
+class BPMAcquisitionTiming(TimingDevice):
+    """Timing of the last bpm measurement as signals
+
+    Args:
+        timing: the :class:`AcquisitionTiming` to report
+
+    The signals are updated when the device is read. Thus add it to
+    the detectors together with the bpm.
+
+    The timing is the one of the state engine following the bpm
+    waveform. The bpm devices do not create a state engine; build it
+    together with this device:
+
+    ::
+
+        engine = BPMMeasurementStates(parent=bpm.waveform)
+        timing = BPMAcquisitionTiming(name='bpm_timing',
+                                      timing=engine.timing)
+        # engine.watch_and_take_data() on each bpm trigger
+        RE(count([bpm, timing]))
+    """
+    wait_ready = Cpt(Signal, name='wait_ready', value=np.nan)
+    acquire = Cpt(Signal, name='acquire', value=np.nan)
+    validate = Cpt(Signal, name='validate', value=np.nan)
+    total = Cpt(Signal, name='total', value=np.nan)
+    counter_changes = Cpt(Signal, name='counter_changes', value=0)
+    validation_restarts = Cpt(Signal, name='validation_restarts', value=0)
+
+    def updateSignals(self):
+        super().updateSignals()
+        timing = self.timing
+        self.counter_changes.put(timing.last_counter_changes)
+        self.validation_restarts.put(timing.last_validation_restarts)
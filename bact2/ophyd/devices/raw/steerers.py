@@ -14,6 +14,7 @@ from ophyd.status import AndStatus
 
 from .power_converter import PowerConverter
 from ..utils import trigger_on_update
+from ..utils.settle_detector import AdaptiveSettle
 from .steerer_list import horizontal_steerers, vertical_steerers
 import numpy as np
 
@@ -140,6 +141,14 @@ class Steerer(PowerConverter):
         self.setToStoredValue()
 
 
+class AdaptiveSteerer(AdaptiveSettle, Steerer):
+    """Steerer: move finished as soon as the readback settled
+
+    Instead of the fixed settle time, see
+    :class:`bact2.ophyd.devices.utils.settle_detector.AdaptiveSettle`
+    """
+
+
 class _SelectedSteerer(Device):
     setpoint = Cpt(SignalProxy, name='set',  value=np.nan, kind='hinted', lazy=False)
     readback = Cpt(SignalProxy, name='rdbk', value=np.nan, kind='hinted', lazy=False)
@@ -273,3 +282,12 @@ class SteererCollection(Device):
 
     def stop(self, success=False):
         self.sel.stop(success=success)
+
+
+class AdaptiveSteererCollection(SteererCollection):
+    """Steerer collection using :class:`AdaptiveSteerer`
+    """
+    steerers = DDC(
+        ad_group(AdaptiveSteerer, t_steerers, kind=Kind.normal, lazy=False),
+        doc='all steerers', default_read_attrs=(),
+    )
@@ -0,0 +1,13 @@
+'''Simulated devices for offline tests and benchmarks
+
+Stand-ins for the beam position monitors, the steerers and the
+multiplexer which do not require the machine: the devices use plain
+ophyd signals which are driven by simulators running in this process.
+The orbit measured by the beam position monitors follows the steerer
+and multiplexer currents through a response matrix.
+'''
+from .orbit import SimulatedOrbit, ring_response
+from .bpm import BPMIOCSimulator, SimBPMStorageRing, SimBPMWaveform
+from .steerer import (
+    SimAdaptiveSteerer, SimPowerConverter, SimSteerer, SimSteererCollection)
+from .multiplexer import SimMultiplexer
@@ -0,0 +1,190 @@
+'''Simulated beam position monitor IOC
+
+:class:`SimBPMWaveform` is a :class:`BPMWaveform` whose packed data,
+counter and ready signals are plain ophyd signals.
+:class:`BPMIOCSimulator` drives these signals as the IOC does: for each
+update ready falls, the counter increments, ready rises and the packed
+data are sent. Optionally the packed data are sent early (before
+ready rises) and resent a little later.
+'''
+from ophyd import Component as Cpt, Device, Signal
+
+from ..pp.bpm.bpm import BPMStatusBits, BPMStorageRing, BPMWaveform
+from ..pp.bpm.bpm_packed_data import scaled_data_raw_rows, packed_data_names
+
+import logging
+import numpy as np
+import threading
+import time
+
+logger = logging.getLogger('bact2')
+
+
+def pack_data(mat):
+    '''inverse of :meth:`PackedDataDecoder.decode`
+
+    Args:
+        mat: matrix of shape (8, n_columns) (see
+             :data:`bpm_packed_data.packed_data_names`)
+
+    Returns:
+        the vector as sent by the IOC
+    '''
+    mat = np.asarray(mat, dtype=np.float_)
+    assert(mat.shape[0] == len(packed_data_names))
+    # second half is not used
+    return np.concatenate([mat.ravel(), np.zeros(mat.size)])
+
+
+class SimBPMWaveform(BPMWaveform):
+    ''':class:`BPMWaveform` without channel access
+    '''
+    packed_data = Cpt(Signal, name='packed_data', value=[])
+    counter = Cpt(Signal, name='counter', value=0)
+    ready = Cpt(Signal, name='ready', value=1)
+
+
+class SimBPMStatistics(Device):
+    mean_x = Cpt(Signal, name='mean_x', value=0.0)
+    mean_y = Cpt(Signal, name='mean_y', value=0.0)
+    rms_x = Cpt(Signal, name='rms_x', value=0.0)
+    rms_y = Cpt(Signal, name='rms_y', value=0.0)
+
+
+class SimBPMStorageRing(BPMStorageRing):
+    stat = Cpt(SimBPMStatistics, "BPMZR", name="stat")
+    waveform = Cpt(SimBPMWaveform, "MDIZ2T5G", name="waveform")
+
+
+class BPMIOCSimulator:
+    '''Send the orbit to a :class:`SimBPMWaveform` as the IOC does
+
+    Args:
+        waveform:              the :class:`SimBPMWaveform`
+        orbit:                 :class:`orbit.SimulatedOrbit`; one bpm
+                               per configured bpm of the waveform
+        rate:                  updates per second
+        acquisition_time:      time ready is low (default: 30 % of
+                               the period)
+        early_probability:     probability that the packed data are
+                               sent before ready rises (and again
+                               after it)
+        duplicate_probability: probability that the packed data are
+                               sent a second time
+        duplicate_delay:       delay of the second sending
+        seed:                  seed for drawing the above
+
+    Use :meth:`start` and :meth:`stop` to run it in a thread or
+    :meth:`update` to make a single update without delays.
+    '''
+    def __init__(self, waveform, orbit, *, rate=2.0, acquisition_time=None,
+                 early_probability=0.0, duplicate_probability=0.0,
+                 duplicate_delay=0.02, seed=None):
+        rate = float(rate)
+        assert(rate > 0)
+        if acquisition_time is None:
+            acquisition_time = .3 / rate
+        acquisition_time = float(acquisition_time)
+        assert(0 <= acquisition_time < 1 / rate)
+
+        n_bpms = len(waveform.indices.get())
+        if orbit.n_bpms != n_bpms:
+            txt = f'orbit has {orbit.n_bpms} bpms but waveform {n_bpms}'
+            raise AssertionError(txt)
+
+        self.waveform = waveform
+        self.orbit = orbit
+        self.period = 1.0 / rate
+        self.acquisition_time = acquisition_time
+        self.early_probability = float(early_probability)
+        self.duplicate_probability = float(duplicate_probability)
+        self.duplicate_delay = float(duplicate_delay)
+
+        self.n_updates = 0
+        self._rng = np.random.RandomState(seed)
+        self._stop = threading.Event()
+        self._thread = None
+
+    def packedData(self):
+        '''the current orbit as packed data
+        '''
+        waveform = self.waveform
+        converter = waveform.scaledDataConverter()
+        indices = np.asarray(waveform.indices.get())
+
+        x, y, x_rms, y_rms = self.orbit.orbit()
+        scaled = np.array([x, y, x_rms, y_rms])
+        # inverse of the converter
+        raw = (scaled + converter.offset) / converter.factor
+
+        mat = np.zeros((len(packed_data_names), waveform.n_valid_bpms))
+        mat[scaled_data_raw_rows[:, np.newaxis], indices] = raw
+        rows = {name: cnt for cnt, name in enumerate(packed_data_names)}
+        status = (1 << BPMStatusBits.power) | (1 << BPMStatusBits.live)
+        mat[rows['stat'], indices] = status
+        mat[rows['intensity_z'], indices] = 1.0
+        mat[rows['intensity_s'], indices] = 1.0
+        mat[rows['gain_raw'], indices] = 1.0
+        return pack_data(mat)
+
+    def _sleep(self, dt):
+        '''sleep; returns True if stopped meanwhile
+        '''
+        if dt <= 0:
+            return self._stop.is_set()
+        return self._stop.wait(dt)
+
+    def update(self, sleep=None):
+        '''one update of the IOC
+
+        Args:
+            sleep: function to wait; None: no waiting
+        '''
+        if sleep is None:
+            def sleep(dt):
+                return False
+
+        waveform = self.waveform
+        rng = self._rng
+        early = rng.uniform() < self.early_probability
+        duplicate = rng.uniform() < self.duplicate_probability
+
+        waveform.ready.put(0)
+        if sleep(self.acquisition_time):
+            return
+        waveform.counter.put(waveform.counter.get() + 1)
+        if early:
+            waveform.packed_data.put(self.packedData())
+        waveform.ready.put(1)
+        data = self.packedData()
+        waveform.packed_data.put(data)
+        self.n_updates += 1
+        if duplicate:
+            if sleep(self.duplicate_delay):
+                return
+            waveform.packed_data.put(data)
+
+    def _run(self):
+        next_update = time.monotonic()
+        while not self._stop.is_set():
+            try:
+                self.update(sleep=self._sleep)
+            except Exception as exc:
+                logger.error(f'bpm simulator update failed: {exc}')
+            next_update += self.period
+            if self._sleep(next_update - time.monotonic()):
+                break
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='bpm-ioc-simulator')
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
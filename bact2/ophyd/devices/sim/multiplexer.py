@@ -0,0 +1,135 @@
+'''Simulated quadrupole multiplexer
+
+Stand-in for :class:`bact2.ophyd.devices.raw.multiplexer.Multiplexer`:
+a selector switching one power converter to one of the quadrupoles and
+this power converter. When switching, the selector readback first
+reports "Mux OFF" and then the name of the selected quadrupole; it can
+resend the name a little later, as the real multiplexer does
+sometimes.
+
+The current of the selected quadrupole is fed to the orbit, i.e. the
+quadrupoles are assumed to be passed off centre and act as kickers.
+'''
+from ophyd import Component as Cpt, Device, Signal
+from ophyd.status import DeviceStatus
+
+from ...utils.execute_async import default_scheduler
+from .steerer import SimPowerConverter
+
+import numpy as np
+
+#: readback of the selector if no quadrupole is selected
+mux_off = 'Mux OFF'
+
+
+class SimMultiplexerPowerConverter(SimPowerConverter):
+    tolerable_zero_current = Cpt(Signal, name='tolerable_error', value=20e-3)
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('settle_time', 2)
+        super().__init__(*args, **kwargs)
+
+    def isOff(self):
+        value = self.readback.get()
+        return np.absolute(value) < self.tolerable_zero_current.get()
+
+    def setToZero(self):
+        self.setpoint.put(0)
+
+    def _onReadback(self, value=None, **kwargs):
+        selected = self.parent.selector.readback.get()
+        if self._orbit is not None and selected != mux_off:
+            self._orbit.setCurrent(selected, value)
+
+    def connectOrbit(self, orbit, kicker_name=None):
+        self._orbit = orbit
+
+    def stop(self, success=False):
+        super().stop(success=success)
+        self.setToZero()
+
+    def unstage(self):
+        self.setToZero()
+        return super().unstage()
+
+
+class SimMultiplexerSelector(Device):
+    '''Selects the quadrupole the power converter is connected to
+
+    Args:
+        switch_time:     time between the readback changes
+        resend_time:     delay of the repeated name. None: not resent
+        validation_time: time the readback has to be stable before the
+                         switch is finished
+    '''
+    readback = Cpt(Signal, name='name', value=mux_off)
+    selected = Cpt(Signal, name='selected', value='non stored')
+    selected_num = Cpt(Signal, name='selected_num', value=-1)
+
+    def __init__(self, *args, switch_time=0.2, resend_time=None,
+                 validation_time=0.5, timeout=10, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.switch_time = float(switch_time)
+        self.resend_time = resend_time
+        self.validation_time = float(validation_time)
+        self.timeout = timeout
+
+    def set(self, value):
+        parent = self.parent
+        pc = parent.power_converter
+        if not pc.isOff():
+            raise AssertionError('Requesting switch while power converter is running!')
+
+        num = parent.quadrupole_names.index(value)
+        status = DeviceStatus(self, timeout=self.timeout)
+        if self.readback.get() == value:
+            status.set_finished()
+            return status
+
+        scheduler = default_scheduler()
+
+        def finish():
+            self.selected.put(value)
+            self.selected_num.put(num)
+            status.set_finished()
+
+        def select():
+            self.readback.put(value)
+            if self.resend_time is None:
+                scheduler.callLater(self.validation_time, finish)
+                return
+
+            def resend():
+                self.readback.put(value)
+                scheduler.callLater(self.validation_time, finish)
+            scheduler.callLater(self.resend_time, resend)
+
+        self.readback.put(mux_off)
+        scheduler.callLater(self.switch_time, select)
+        return status
+
+
+class SimMultiplexer(Device):
+    '''Stand-in for :class:`bact2.ophyd.devices.raw.multiplexer.Multiplexer`
+
+    Args:
+        quadrupole_names: the quadrupoles which can be selected. The
+                          kicker names of the orbit
+    '''
+    selector = Cpt(SimMultiplexerSelector, name='selector')
+    power_converter = Cpt(SimMultiplexerPowerConverter, name='mux_pc')
+
+    def __init__(self, *args, quadrupole_names=None, **kwargs):
+        assert(quadrupole_names is not None)
+        self.quadrupole_names = list(quadrupole_names)
+        super().__init__(*args, **kwargs)
+
+    def connectOrbit(self, orbit):
+        self.power_converter.connectOrbit(orbit)
+
+    def unstage(self):
+        self.power_converter.unstage()
+        return super().unstage()
+
+    def stop(self, success=False):
+        self.power_converter.stop(success=success)
@@ -0,0 +1,134 @@
+'''Orbit of a simulated ring
+
+The orbit at the beam position monitors is the response to the kicks
+of the steerers (and of the quadrupoles powered by the multiplexer)
+plus a fixed offset and noise.
+'''
+from ....applib.transverse_lib.distorted_orbit import closed_orbit_response_matrix
+import numpy as np
+import threading
+
+
+def ring_response(n_bpms, n_kickers, *, tune=17.8, beta_mean=10.0,
+                  kick_per_ampere=1e-2, seed=None):
+    '''Response of a ring with roughly constant beta
+
+    Args:
+        n_bpms:          number of beam position monitors
+        n_kickers:       number of kickers
+        tune:            the tune of the ring
+        beta_mean:       mean beta function (m); varied by 30 %
+        kick_per_ampere: kick angle in mrad for 1 A
+
+    Returns:
+        matrix of shape (n_bpms, n_kickers): orbit in mm for 1 A
+
+    Beam position monitors and kickers are distributed randomly around
+    the ring.
+    '''
+    rng = np.random.RandomState(seed)
+
+    def beta_mu(n):
+        mu = np.sort(rng.uniform(0, 2 * np.pi * tune, size=n))
+        beta = beta_mean * rng.uniform(.7, 1.3, size=n)
+        return beta, mu
+
+    beta, mu = beta_mu(n_bpms)
+    beta_k, mu_k = beta_mu(n_kickers)
+    r = closed_orbit_response_matrix(beta, mu, tune=tune, beta_k=beta_k,
+                                     mu_k=mu_k)
+    # m * mrad = mm
+    return r * kick_per_ampere
+
+
+class SimulatedOrbit:
+    '''Orbit as linear response to the kicker currents
+
+    Args:
+        kicker_names: names of the kickers (steerers, quadrupoles)
+        response_x:   horizontal response (n_bpms, n_kickers) in mm/A
+        response_y:   vertical response (n_bpms, n_kickers) in mm/A
+        offset_x:     orbit without kicks (mm)
+        offset_y:     orbit without kicks (mm)
+        noise:        rms of the noise added to each reading (mm)
+        seed:         seed of the noise generator
+
+    Currents are set by the simulated power converters; the bpm
+    simulator reads the orbit. Both can run in different threads.
+    '''
+    def __init__(self, kicker_names, response_x, response_y, *,
+                 offset_x=0.0, offset_y=0.0, noise=1e-3, seed=None):
+        response_x = np.asarray(response_x, dtype=np.float_)
+        response_y = np.asarray(response_y, dtype=np.float_)
+        kicker_names = list(kicker_names)
+        n_kickers = len(kicker_names)
+
+        for resp in (response_x, response_y):
+            if resp.ndim != 2 or resp.shape[1] != n_kickers:
+                txt = (
+                    f'response of shape {resp.shape} does not match'
+                    f' {n_kickers} kickers'
+                )
+                raise AssertionError(txt)
+        assert(response_x.shape == response_y.shape)
+
+        self.kicker_names = kicker_names
+        self._kicker_index = {name: cnt for cnt, name in enumerate(kicker_names)}
+        self.response_x = response_x
+        self.response_y = response_y
+        n_bpms = response_x.shape[0]
+        self.offset_x = np.broadcast_to(offset_x, (n_bpms,)).astype(np.float_)
+        self.offset_y = np.broadcast_to(offset_y, (n_bpms,)).astype(np.float_)
+        self.noise = float(noise)
+
+        self._currents = np.zeros(n_kickers)
+        self._rng = np.random.RandomState(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def forRing(cls, n_bpms, kicker_names, *, seed=None, **kws):
+        '''orbit of a ring with the response of :func:`ring_response`
+        '''
+        n_kickers = len(kicker_names)
+        resp_x = ring_response(n_bpms, n_kickers, tune=17.8, seed=seed)
+        if seed is not None:
+            seed = seed + 1
+        resp_y = ring_response(n_bpms, n_kickers, tune=6.7, seed=seed)
+        return cls(kicker_names, resp_x, resp_y, seed=seed, **kws)
+
+    @property
+    def n_bpms(self):
+        return self.response_x.shape[0]
+
+    def setCurrent(self, name, value):
+        with self._lock:
+            self._currents[self._kicker_index[name]] = value
+
+    def current(self, name):
+        with self._lock:
+            return self._currents[self._kicker_index[name]]
+
+    def idealOrbit(self):
+        '''orbit without noise
+
+        Returns:
+            x, y
+        '''
+        with self._lock:
+            currents = self._currents.copy()
+        x = self.offset_x + self.response_x.dot(currents)
+        y = self.offset_y + self.response_y.dot(currents)
+        return x, y
+
+    def orbit(self):
+        '''orbit as measured: with noise
+
+        Returns:
+            x, y, x_rms, y_rms
+        '''
+        x, y = self.idealOrbit()
+        n_bpms = self.n_bpms
+        with self._lock:
+            noise = self._rng.normal(scale=self.noise, size=(2, n_bpms))
+        x_rms = np.full(n_bpms, self.noise)
+        return x + noise[0], y + noise[1], x_rms, x_rms.copy()
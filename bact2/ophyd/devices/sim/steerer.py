@@ -0,0 +1,211 @@
+'''Simulated power converters and steerers
+
+The readback follows the setpoint with a limited slew rate. The set
+status finishes when the readback reached the setpoint and the settle
+time has passed. The readback is fed to a
+:class:`orbit.SimulatedOrbit`.
+'''
+from ophyd import Component as Cpt, Device, Kind, Signal
+from ophyd.areadetector.base import ad_group
+from ophyd.device import DynamicDeviceComponent as DDC
+from ophyd.status import DeviceStatus
+
+from ...utils.execute_async import default_scheduler
+from ..raw.steerers import SteererCollection, t_steerers
+from ..utils.settle_detector import AdaptiveSettle
+
+import functools
+import numpy as np
+import threading
+
+
+class LimitedSignal(Signal):
+    '''Signal with control limits
+    '''
+    def __init__(self, *args, limits=(-np.inf, np.inf), **kwargs):
+        super().__init__(*args, **kwargs)
+        self._limits = tuple(limits)
+
+    @property
+    def limits(self):
+        return self._limits
+
+
+class _MoveStatus(DeviceStatus):
+    '''Status of one move of a :class:`SimPowerConverter`
+
+    A failed status stops the device. Not so if the move was
+    superseded: that would stop the move which superseded it.
+    '''
+    def _handle_failure(self):
+        if self.device._status is self:
+            super()._handle_failure()
+
+
+class SimPowerConverter(Device):
+    '''Power converter ramping its readback to the setpoint
+
+    Args:
+        slew_rate:   change of the readback in A/s
+        settle_time: time waited after the setpoint is reached
+        tick:        interval of the readback updates
+        timeout:     of the set status
+    '''
+    setpoint = Cpt(LimitedSignal, name='set', value=0.0, limits=(-10.0, 10.0))
+    readback = Cpt(Signal, name='rdbk', value=0.0)
+
+    def __init__(self, *args, slew_rate=5.0, settle_time=0.0, tick=0.01,
+                 timeout=20, **kwargs):
+        super().__init__(*args, **kwargs)
+        assert(slew_rate > 0)
+        assert(tick > 0)
+        self.slew_rate = float(slew_rate)
+        self.settle_time = float(settle_time)
+        self.tick = float(tick)
+        self.timeout = timeout
+
+        self._orbit = None
+        self._kicker_name = None
+        self._lock = threading.Lock()
+        self._timer = None
+        self._status = None
+        #: incremented for each move: callbacks of earlier moves are stale
+        self._move_id = 0
+        self.setpoint.subscribe(self._onSetpoint, run=False)
+        self.readback.subscribe(self._onReadback, run=False)
+
+    def connectOrbit(self, orbit, kicker_name):
+        '''feed the readback to orbit as current of kicker_name
+        '''
+        self._orbit = orbit
+        self._kicker_name = kicker_name
+        orbit.setCurrent(kicker_name, self.readback.get())
+
+    def _onReadback(self, value=None, **kwargs):
+        if self._orbit is not None:
+            self._orbit.setCurrent(self._kicker_name, value)
+
+    def _newMove(self):
+        '''invalidate the callbacks of the current move
+
+        Called with the lock held.
+
+        Returns:
+            the id of the new move
+        '''
+        self._move_id += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        return self._move_id
+
+    def _onSetpoint(self, value=None, **kwargs):
+        with self._lock:
+            move_id = self._newMove()
+            self._timer = default_scheduler().callLater(
+                0, functools.partial(self._ramp, move_id))
+
+    def _ramp(self, move_id):
+        '''one step of the readback towards the setpoint
+        '''
+        with self._lock:
+            if move_id != self._move_id:
+                # superseded by a later move
+                return
+            target = self.setpoint.get()
+            current = self.readback.get()
+            step = self.slew_rate * self.tick
+            diff = target - current
+
+            if abs(diff) <= step:
+                self.readback.put(target)
+                self._timer = default_scheduler().callLater(
+                    self.settle_time, functools.partial(self._settled, move_id))
+                return
+            self.readback.put(current + np.sign(diff) * step)
+            self._timer = default_scheduler().callLater(
+                self.tick, functools.partial(self._ramp, move_id))
+
+    def _settled(self, move_id):
+        with self._lock:
+            if move_id != self._move_id:
+                return
+            self._timer = None
+            status, self._status = self._status, None
+        if status is not None and not status.done:
+            status.set_finished()
+
+    def set(self, value):
+        low, high = self.setpoint.limits
+        if not low <= value <= high:
+            txt = f'{self.name}: value {value} outside of limits {low, high}'
+            raise ValueError(txt)
+
+        status = _MoveStatus(self, timeout=self.timeout)
+        with self._lock:
+            previous, self._status = self._status, status
+            # the previous move must not finish this status
+            self._newMove()
+        if previous is not None and not previous.done:
+            previous.set_exception(RuntimeError(f'{self.name}: superseded'))
+        self.setpoint.put(value)
+        return status
+
+    def stop(self, success=False):
+        with self._lock:
+            self._newMove()
+
+
+class SimSteerer(SimPowerConverter):
+    '''Stand-in for :class:`bact2.ophyd.devices.raw.steerers.Steerer`
+    '''
+    #: reference value to store
+    rv = Cpt(Signal, name='ref_val', value=np.nan)
+
+    #: shall the component be set back
+    set_back = Cpt(Signal, name='set_bak', value=False, kind=Kind.config)
+
+    eps_rel = Cpt(Signal, name='eps_rel', value=2e-3)
+    eps_abs = Cpt(Signal, name='eps_abs', value=1e-2)
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('settle_time', .5)
+        super().__init__(*args, **kwargs)
+
+    def setToStoredValue(self):
+        if self.set_back.get():
+            self.setpoint.put(self.rv.get())
+
+    def stage(self):
+        self.rv.put(self.setpoint.get())
+        return super().stage()
+
+    def stop(self, success=False):
+        super().stop(success=success)
+        self.setToStoredValue()
+
+
+class SimAdaptiveSteerer(AdaptiveSettle, SimSteerer):
+    """Stand-in for :class:`bact2.ophyd.devices.raw.steerers.AdaptiveSteerer`
+    """
+
+
+class SimSteererCollection(SteererCollection):
+    '''Stand-in for :class:`bact2.ophyd.devices.raw.steerers.SteererCollection`
+
+    The kicker names of the orbit are the steerer names (upper case).
+    '''
+    steerers = DDC(
+        ad_group(SimSteerer, t_steerers, kind=Kind.normal, lazy=False),
+        doc='all steerers', default_read_attrs=(),
+    )
+
+    def connectOrbit(self, orbit):
+        for attr_name, steerer_name in t_steerers:
+            getattr(self.steerers, attr_name).connectOrbit(orbit, steerer_name)
+
+    def setSettleTime(self, settle_time):
+        '''settle time of all steerers; e.g. 0 for fast load tests
+        '''
+        for attr_name, unused in t_steerers:
+            getattr(self.steerers, attr_name).settle_time = settle_time
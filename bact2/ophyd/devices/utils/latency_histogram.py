@@ -0,0 +1,100 @@
+'''Histogram of latencies with logarithmic bins
+
+Used to aggregate the time spent in the different phases of a
+measurement. Adding a value only increments a counter in a
+preallocated array: no lock and no string formatting. It is intended
+to be filled by a single writer (e.g. the callbacks of one device).
+'''
+import numpy as np
+
+
+class LatencyHistogram:
+    '''Counts of latencies in logarithmically spaced bins
+
+    Args:
+        t_min:    lower edge of the first bin (s)
+        t_max:    upper edge of the last bin (s)
+        n_bins:   number of bins between t_min and t_max
+
+    Values below t_min or above t_max are counted in an under- or
+    overflow bin. Count, sum, minimum and maximum are kept exactly.
+    '''
+    def __init__(self, t_min=1e-4, t_max=100.0, n_bins=60):
+        assert(t_min > 0)
+        assert(t_max > t_min)
+        n_bins = int(n_bins)
+        assert(n_bins > 0)
+
+        self.edges = np.geomspace(t_min, t_max, n_bins + 1)
+        self._log_t_min = np.log(t_min)
+        self._scale = n_bins / (np.log(t_max) - self._log_t_min)
+        # underflow, bins, overflow
+        self.counts = np.zeros(n_bins + 2, dtype=np.int64)
+        self.reset()
+
+    def reset(self):
+        self.counts[:] = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def _bin(self, value):
+        if value <= 0:
+            return 0
+        idx = int((np.log(value) - self._log_t_min) * self._scale) + 1
+        return min(max(idx, 0), len(self.counts) - 1)
+
+    def add(self, value):
+        value = float(value)
+        self.counts[self._bin(value)] += 1
+        self.count += 1
+        self.total += value
+        if value < self.min:
+            self.min = value
+        if value > self.max:
+            self.max = value
+
+    @property
+    def mean(self):
+        if self.count == 0:
+            return np.nan
+        return self.total / self.count
+
+    def quantile(self, q):
+        '''estimate of the quantile q (0 <= q <= 1)
+
+        Interpolates geometrically within the bin; accuracy is limited
+        to the bin width
+        '''
+        assert(0 <= q <= 1)
+        if self.count == 0:
+            return np.nan
+
+        cumulative = np.cumsum(self.counts)
+        target = q * self.count
+        idx = int(np.searchsorted(cumulative, target, side='left'))
+        idx = min(idx, len(self.counts) - 1)
+        if idx == 0:
+            return self.min
+        if idx == len(self.counts) - 1:
+            return self.max
+
+        lower, upper = self.edges[idx - 1], self.edges[idx]
+        n_before = cumulative[idx - 1] if idx > 0 else 0
+        frac = (target - n_before) / self.counts[idx]
+        r = lower * (upper / lower) ** frac
+        return float(min(max(r, self.min), self.max))
+
+    def summary(self, quantiles=(.5, .9, .99)):
+        '''dictionary of count, mean, min, max and the quantiles
+        '''
+        r = {
+            'count': self.count,
+            'mean': self.mean,
+            'min': self.min if self.count else np.nan,
+            'max': self.max if self.count else np.nan,
+        }
+        for q in quantiles:
+            r[f'q{q * 100:g}'] = self.quantile(q)
+        return r
@@ -0,0 +1,137 @@
+'''Fixed size history of readings stored in numpy arrays
+
+Each field is stored in one preallocated array of shape
+(maxlen, ...). Appending writes one row; statistics over the last n
+readings are computed on (at most two) views of these arrays.
+'''
+import numpy as np
+
+
+class RingBuffer:
+    '''Keeps the last maxlen readings of a set of fields
+
+    Args:
+        maxlen: number of readings to keep
+
+    The arrays are allocated at the first :meth:`append`, using the
+    shape and type of the values given there.
+    '''
+    def __init__(self, maxlen):
+        maxlen = int(maxlen)
+        assert(maxlen > 0)
+        self.maxlen = maxlen
+        self._data = None
+        self._next = 0
+        self._len = 0
+
+    def __len__(self):
+        return self._len
+
+    @property
+    def fields(self):
+        if self._data is None:
+            return []
+        return list(self._data.keys())
+
+    def clear(self):
+        self._next = 0
+        self._len = 0
+
+    def _allocate(self, values):
+        data = {}
+        for name, val in values.items():
+            val = np.asarray(val)
+            data[name] = np.empty((self.maxlen,) + val.shape, dtype=val.dtype)
+        self._data = data
+
+    def append(self, **values):
+        '''Store one reading, overwriting the oldest one if full
+        '''
+        if self._data is None:
+            self._allocate(values)
+
+        if set(values) != set(self._data):
+            txt = (
+                f'Expected fields {sorted(self._data)}'
+                f' but got {sorted(values)}'
+            )
+            raise AssertionError(txt)
+
+        row = self._next
+        for name, val in values.items():
+            self._data[name][row] = val
+
+        self._next = (row + 1) % self.maxlen
+        self._len = min(self._len + 1, self.maxlen)
+
+    def _n(self, n):
+        if n is None or n <= 0 or n > self._len:
+            return self._len
+        return int(n)
+
+    def segments(self, n=None):
+        '''slices of the storage containing the last n readings
+
+        Returns:
+            one or two slices, the older readings first
+        '''
+        n = self._n(n)
+        start = self._next - n
+        if start >= 0:
+            return [slice(start, self._next)]
+        return [slice(self.maxlen + start, self.maxlen), slice(0, self._next)]
+
+    def views(self, name, n=None):
+        '''views of the storage for field name; see :meth:`segments`
+        '''
+        data = self._data[name]
+        return [data[sl] for sl in self.segments(n)]
+
+    def ordered(self, name, n=None):
+        '''last n readings of field name, the oldest first
+
+        A view of the storage if the readings are contiguous, else a
+        copy
+        '''
+        if self._data is None:
+            return np.empty((0,))
+        views = self.views(name, n)
+        if len(views) == 1:
+            return views[0]
+        return np.concatenate(views, axis=0)
+
+    def last(self, name):
+        '''the most recent reading of field name
+        '''
+        assert(self._len > 0)
+        return self._data[name][self._next - 1]
+
+    # ----------------------------------------------------------------------
+    # statistics along the readings axis
+    def _check(self, n):
+        n = self._n(n)
+        if n == 0:
+            raise AssertionError('No readings stored')
+        return n
+
+    def sum(self, name, n=None):
+        self._check(n)
+        return sum(v.sum(axis=0) for v in self.views(name, n))
+
+    def mean(self, name, n=None):
+        n = self._check(n)
+        return self.sum(name, n) / n
+
+    def std(self, name, n=None):
+        n = self._check(n)
+        mean = self.mean(name, n)
+        ssq = sum(((v - mean)**2).sum(axis=0) for v in self.views(name, n))
+        return np.sqrt(ssq / n)
+
+    def min(self, name, n=None):
+        self._check(n)
+        return np.minimum.reduce([v.min(axis=0) for v in self.views(name, n)])
+
+    def max(self, name, n=None):
+        self._check(n)
+        return np.maximum.reduce([v.max(axis=0) for v in self.views(name, n)])
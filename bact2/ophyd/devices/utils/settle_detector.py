@@ -0,0 +1,317 @@
+'''Detect that a readback settled instead of waiting a fixed time
+
+A move of a power converter is typically finished by waiting a fixed,
+conservative settle time once the readback reached the setpoint.
+:class:`SettleDetector` declares the readback settled as soon as
+
+    * it is within eps of the setpoint (see
+      :func:`bact2.math.utils.compare_value`) and
+    * it stayed within eps for a time window and its slope, fitted
+      over this window, is below a threshold.
+
+Readbacks are typically only sent when they change. Thus the window
+is also checked by a timer: a readback which does not change any more
+is settled when the window passed.
+
+:class:`SettleStatus` feeds the readback to the detector and finishes
+when it settled. :class:`AdaptiveSettle` uses it for the moves of a
+device and reports the time it took.
+'''
+from ophyd import Component as Cpt, Device, Kind, Signal
+from ophyd.status import AndStatus, Status
+
+from ...utils.execute_async import default_scheduler
+from ....math.utils import compare_value
+from .latency_histogram import LatencyHistogram
+
+import collections
+import logging
+import numpy as np
+import threading
+import time
+
+logger = logging.getLogger('bact2')
+
+
+class SettleDetector:
+    '''Decide if a readback settled at its setpoint
+
+    Args:
+        eps_abs:     absolute tolerance of the readback
+        eps_rel:     relative tolerance of the readback
+        slope_max:   maximum absolute slope of the readback (units/s)
+                     over the window
+        window:      time the readback has to be within tolerance (s)
+        max_samples: readbacks kept for the slope fit
+
+    Time stamps are given by the caller: one clock for all of them.
+    '''
+    def __init__(self, *, eps_abs=1e-2, eps_rel=2e-3, slope_max=1e-2,
+                 window=0.1, max_samples=256):
+        assert(slope_max > 0)
+        assert(window > 0)
+        self.eps_abs = float(eps_abs)
+        self.eps_rel = float(eps_rel)
+        self.slope_max = float(slope_max)
+        self.window = float(window)
+        self._samples = collections.deque(maxlen=int(max_samples))
+        self.start(np.nan, np.nan)
+
+    def start(self, target, timestamp):
+        '''a move to target started at timestamp
+        '''
+        self.target = target
+        self.t_start = timestamp
+        self.in_band_since = None
+        self.t_settled = None
+        self.slope = np.nan
+        self._samples.clear()
+
+    @property
+    def settled(self):
+        return self.t_settled is not None
+
+    @property
+    def due(self):
+        '''earliest time the readback can be settled; None if outside
+        of tolerance
+        '''
+        if self.in_band_since is None:
+            return None
+        return self.in_band_since + self.window
+
+    @property
+    def move_duration(self):
+        '''start of the move until settled
+        '''
+        if not self.settled:
+            return np.nan
+        return self.t_settled - self.t_start
+
+    @property
+    def settle_duration(self):
+        '''readback within tolerance until settled
+        '''
+        if not self.settled:
+            return np.nan
+        return self.t_settled - self.in_band_since
+
+    def inBand(self, value):
+        t_cmp = compare_value(value, self.target, eps_abs=self.eps_abs,
+                              eps_rel=self.eps_rel)
+        return t_cmp == 0
+
+    def update(self, value, timestamp):
+        '''new readback
+
+        Returns:
+            True if settled
+        '''
+        if self.settled:
+            return True
+
+        if not self.inBand(value):
+            self.in_band_since = None
+            self._samples.clear()
+            return False
+
+        if self.in_band_since is None:
+            self.in_band_since = timestamp
+        self._samples.append((timestamp, value))
+        return self.check(timestamp)
+
+    def _fitSlope(self, timestamp):
+        '''slope of the readbacks within the window
+
+        The last readback is held until timestamp.
+        '''
+        t_start = timestamp - self.window
+        samples = [(t, v) for t, v in self._samples if t >= t_start]
+        if len(samples) < len(self._samples):
+            # the readback valid at the start of the window
+            t_last, v_last = self._samples[-len(samples) - 1]
+            samples.insert(0, (t_start, v_last))
+        samples.append((timestamp, self._samples[-1][1]))
+
+        t, v = np.array(samples, dtype=np.float_).T
+        t = t - t.mean()
+        denominator = (t**2).sum()
+        if denominator == 0:
+            return 0.0
+        return (t * (v - v.mean())).sum() / denominator
+
+    def check(self, timestamp):
+        '''check if settled at timestamp
+
+        Returns:
+            True if settled
+        '''
+        if self.settled:
+            return True
+        due = self.due
+        if due is None or timestamp < due:
+            return False
+
+        self.slope = self._fitSlope(timestamp)
+        if abs(self.slope) > self.slope_max:
+            return False
+
+        self.t_settled = timestamp
+        return True
+
+
+class SettleStatus(Status):
+    '''Finished when the readback settled
+
+    Args:
+        readback:  the signal to watch
+        detector:  :class:`SettleDetector`; :meth:`SettleDetector.start`
+                   is called with target
+        target:    the setpoint
+        timeout:   of the status
+        scheduler: of the timer checking the window; default the
+                   shared scheduler
+        clock:     time stamps of the readbacks and the timer
+
+    The readback is subscribed until the status is done.
+    '''
+    def __init__(self, readback, detector, target, *, timeout=None,
+                 scheduler=None, clock=time.monotonic, **kwargs):
+        if scheduler is None:
+            scheduler = default_scheduler()
+        self.detector = detector
+        self._readback = readback
+        self._scheduler = scheduler
+        self._clock = clock
+        self._lock = threading.RLock()
+        self._timer = None
+        self._cid = None
+
+        super().__init__(timeout=timeout, **kwargs)
+
+        detector.start(target, clock())
+        self.add_callback(self._cleanup)
+        self._cid = readback.subscribe(self._onReadback, run=True)
+
+    def _onReadback(self, value=None, **kwargs):
+        with self._lock:
+            if self.done:
+                return
+            settled = self.detector.update(value, self._clock())
+            if not settled:
+                self._scheduleCheck()
+        if settled:
+            self._settled()
+
+    def _scheduleCheck(self):
+        '''check the window when it is due
+        '''
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        due = self.detector.due
+        if due is None:
+            return
+        delay = max(due - self._clock(), 0)
+        self._timer = self._scheduler.callLater(delay, self._onTimer)
+
+    def _onTimer(self):
+        with self._lock:
+            self._timer = None
+            if self.done:
+                return
+            settled = self.detector.check(self._clock())
+            if not settled:
+                # slope too large: check again a window later
+                self._timer = self._scheduler.callLater(
+                    self.detector.window, self._onTimer)
+        if settled:
+            self._settled()
+
+    def _settled(self):
+        try:
+            self.set_finished()
+        except Exception:
+            # e.g. timed out meanwhile
+            pass
+
+    def _cleanup(self, status):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            cid, self._cid = self._cid, None
+        if cid is not None:
+            self._readback.unsubscribe(cid)
+
+
+class AdaptiveSettle(Device):
+    '''A move finishes when the readback settled
+
+    Mix in before the device class, e.g.
+    `class AdaptiveSteerer(AdaptiveSettle, Steerer)`. The device
+    provides the signals `readback`, `eps_abs` and `eps_rel`. Its own
+    settle time is set to 0 by default.
+
+    The status returned by :meth:`set` combines the status of the
+    device with a :class:`SettleStatus`. The latter times out after
+    `settle_timeout` (keyword argument; default the `timeout` of the
+    device): a readback which never settles fails the move instead of
+    blocking it. The durations of the last
+    move are available as signals; all are collected in
+    :attr:`settle_histogram`.
+    '''
+    settle_window = Cpt(Signal, name='settle_window', value=0.1, kind=Kind.config)
+    settle_slope = Cpt(Signal, name='settle_slope', value=1e-2, kind=Kind.config)
+
+    #: readback within tolerance until settled
+    settle_duration = Cpt(Signal, name='settle_duration', value=np.nan)
+    #: move started until settled
+    move_duration = Cpt(Signal, name='move_duration', value=np.nan)
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('settle_time', 0)
+        self.settle_timeout = kwargs.pop('settle_timeout', None)
+        super().__init__(*args, **kwargs)
+        self.settle_histogram = LatencyHistogram(t_min=1e-3, t_max=100)
+        self.move_histogram = LatencyHistogram(t_min=1e-3, t_max=100)
+
+    def settleDetector(self):
+        return SettleDetector(
+            eps_abs=self.eps_abs.get(), eps_rel=self.eps_rel.get(),
+            slope_max=self.settle_slope.get(), window=self.settle_window.get())
+
+    def settleTimeout(self):
+        timeout = self.settle_timeout
+        if timeout is None:
+            timeout = getattr(self, 'timeout', None)
+        return timeout
+
+    def settleStatus(self, value):
+        status = SettleStatus(self.readback, self.settleDetector(), value,
+                              timeout=self.settleTimeout())
+
+        def report(status):
+            detector = status.detector
+            if not detector.settled:
+                return
+            self.settle_duration.put(detector.settle_duration)
+            self.move_duration.put(detector.move_duration)
+            self.settle_histogram.add(detector.settle_duration)
+            self.move_histogram.add(detector.move_duration)
+            self.log.debug(
+                '%s: settled after %.3f s (in tolerance for %.3f s)',
+                self.name, detector.move_duration, detector.settle_duration)
+
+        status.add_callback(report)
+        return status
+
+    def set(self, value, **kwargs):
+        # watch before moving: no readback is missed
+        st_settle = self.settleStatus(value)
+        try:
+            status = super().set(value, **kwargs)
+        except Exception:
+            st_settle.set_exception(RuntimeError(f'{self.name}: set failed'))
+            raise
+        return AndStatus(status, st_settle)
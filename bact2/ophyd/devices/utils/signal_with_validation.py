@@ -1,6 +1,4 @@
-import threading
 import queue
-import asyncio
 
 import time
 import sys
@@ -8,6 +6,7 @@ import functools
 
 from ophyd.status import DeviceStatus, SubscriptionStatus
 from bact2.ophyd.utils.status.ExpectedValueStatus import ExpectedValueStatus
+from bact2.ophyd.utils import execute_async
 
 import logging
 
@@ -26,8 +25,9 @@ class FlickerSignal:
     Implementation:
        * when triggered a call back is subscribed to the variable
        * this callback increments the instance variable n_triggered
-       * then a delay is entered (as separate thread or using
-         asyncio)
+       * then the check is scheduled after the validation time
+         (see :class:`bact2.ophyd.utils.execute_async.ExecuteAsynchronisly`);
+         a check still pending is cancelled
        * after the delay the value n_triggered is checked
        * if it is still the same the status object is marked as done
        * if n_triggered has increased, it is assumed that an other
@@ -48,7 +48,7 @@ class FlickerSignal:
 
         # Time to wait that new data arrives
         self.validation_time = validation_time #s
-        self.loop = asyncio.get_event_loop()
+        self._execute_async = execute_async.ExecuteAsynchronisly()
         # Used to find if data was resent
         self._n_triggered = 0
 
@@ -142,17 +142,11 @@ class FlickerSignal:
             nonlocal ref_cnt, book_keeping
             self.check_if_new_reading(ref_cnt, book_keeping = book_keeping)
 
-        if self.loop.is_running():
-            #log_debug("Executing using asyncio loop")
-            self.loop.call_later(self.validation_time, check_and_finish)
-
-        else:
-            #log_debug("Executing using thread")
-            def sleep_and_finish():
-                time.sleep(self.validation_time)
-                check_and_finish()
-
-            threading.Thread(target=sleep_and_finish, daemon=True).start()
+        # A new reading supersedes the check of the previous one
+        if book_keeping.timer is not None:
+            book_keeping.timer.cancel()
+        book_keeping.timer = self._execute_async.callLater(
+            self.validation_time, check_and_finish)
 
         log_debug("Finished delay signal status")
         return True
@@ -173,6 +167,7 @@ class FlickerSignal:
                 self.parent = parent
                 self.device_status = device_status
                 self.cid = None
+                self.timer = None
 
             def __call__(self, *args, **kwargs):
                 self.parent.delay_signal_status(*args, book_keeping = self, **kwargs)
@@ -186,6 +181,8 @@ class FlickerSignal:
         def unsubscribe():
             nonlocal cb
             self.signal.clear_sub(cb)
+            if book_keeping.timer is not None:
+                book_keeping.timer.cancel()
 
         device_status.add_callback(unsubscribe)
         self.signal.subscribe(cb,  run = run)
@@ -0,0 +1,45 @@
+'''Durations of the last measurement as ophyd signals
+
+The timing classes (e.g.
+:class:`bact2.ophyd.devices.raw.bpm_timing.AcquisitionTiming`) record
+the duration of each phase of a measurement in
+:class:`latency_histogram.LatencyHistogram` and keep the ones of the
+last measurement in their attribute `last`. :class:`TimingDevice`
+makes these readable, e.g. to add them to the detectors or to emit
+them as a stream of the run.
+'''
+from ophyd import Device
+from ophyd.status import DeviceStatus
+
+
+class TimingDevice(Device):
+    '''Durations of the last measurement as signals
+
+    Args:
+        timing: timing object providing `phases`, `last` and
+                `summary()`
+
+    Derived classes define a signal for each phase of the timing. The
+    signals are updated when the device is read.
+    '''
+    def __init__(self, *args, timing=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        assert(timing is not None)
+        self.timing = timing
+
+    def updateSignals(self):
+        last = self.timing.last
+        for name in self.timing.phases:
+            getattr(self, name).put(last[name])
+
+    def trigger(self):
+        status = DeviceStatus(self)
+        status.set_finished()
+        return status
+
+    def read(self):
+        self.updateSignals()
+        return super().read()
+
+    def summary(self):
+        return self.timing.summary()
@@ -1,21 +1,170 @@
 import asyncio
+import heapq
+import itertools
+import logging
 import threading
-import time 
-import datetime
+import time
+
+logger = logging.getLogger('bact2')
+
+
+class TimerHandle:
+    """A function scheduled by :class:`TimerScheduler`
+
+    Use :meth:`cancel` to stop it from being called.
+    """
+    __slots__ = ('when', 'func', '_cancelled')
+
+    def __init__(self, when, func):
+        self.when = when
+        self.func = func
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+        self.func = None
+
+    def cancelled(self):
+        return self._cancelled
+
+
+class TimerScheduler:
+    """Call functions later using a single thread
+
+    The timers are kept in a heap ordered by their due time. One
+    daemon thread sleeps until the next timer is due and calls it.
+    The thread is started when the first timer is scheduled.
+
+    The functions are called in the scheduler thread one after the
+    other: these should return quickly.
+    """
+    def __init__(self, name='bact2-timer'):
+        self.name = name
+        self._heap = []
+        self._counter = itertools.count()
+        self._condition = threading.Condition()
+        self._thread = None
+        self._stop = False
+
+    def _start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop = False
+        self._thread = threading.Thread(target=self._run, name=self.name,
+                                        daemon=True)
+        self._thread.start()
+
+    def callLater(self, delay, func):
+        """Call func after at minimum delay has expired
+
+        Returns:
+            :class:`TimerHandle`
+        """
+        delay = float(delay)
+        if delay < 0:
+            raise AssertionError(f'delay {delay} < 0')
+
+        handle = TimerHandle(time.monotonic() + delay, func)
+        with self._condition:
+            heapq.heappush(self._heap, (handle.when, next(self._counter), handle))
+            self._start()
+            # the new timer could be the next one due
+            self._condition.notify()
+        return handle
+
+    def __len__(self):
+        """number of pending timers (including cancelled ones)
+        """
+        with self._condition:
+            return len(self._heap)
+
+    def shutdown(self, wait=True):
+        """stop the thread. Pending timers are dropped
+        """
+        with self._condition:
+            self._stop = True
+            self._heap = []
+            self._condition.notify()
+            thread = self._thread
+        if wait and thread is not None and thread is not threading.current_thread():
+            thread.join()
+
+    def _next_due(self):
+        """pop the next due handle; None if stopped
+
+        Called with the condition acquired
+        """
+        while True:
+            if self._stop:
+                return None
+            heap = self._heap
+            # drop cancelled timers
+            while heap and heap[0][2].cancelled():
+                heapq.heappop(heap)
+            if not heap:
+                self._condition.wait()
+                continue
+
+            dt = heap[0][0] - time.monotonic()
+            if dt <= 0:
+                return heapq.heappop(heap)[2]
+            self._condition.wait(dt)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                handle = self._next_due()
+            if handle is None:
+                return
+            func = handle.func
+            if func is None:
+                # cancelled meanwhile
+                continue
+            try:
+                func()
+            except Exception as exc:
+                logger.error(f'{self.name}: scheduled function {func} failed: {exc}')
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def default_scheduler():
+    """The scheduler shared within this process
+    """
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = TimerScheduler()
+        return _scheduler
+
+
+def _running_loop():
+    try:
+        return asyncio.get_running_loop()
+    except RuntimeError:
+        return None
+
 
 class ExecuteAsynchronisly:
     """Execute function later or at a given time
 
-    Uses asyncio if the event loop is running. If it is not
-    running execute threading.Thread
+    Uses asyncio if called from within a running event loop. Otherwise
+    (e.g. from the callbacks of a control system library) the function
+    is handed to a :class:`TimerScheduler` (by default the one shared by
+    all instances). No thread is created per call.
 
-    Todo:
-        This code is a copy of bluesky examples. It should be
-        checked if if it would be sufficient to just use
-        :func:`asynio.call_later`
+    The returned handles can be used to cancel the call.
     """
-    def __init__(self):
-        self.loop = asyncio.get_event_loop()
+    def __init__(self, scheduler=None):
+        self._scheduler = scheduler
+
+    @property
+    def scheduler(self):
+        if self._scheduler is None:
+            self._scheduler = default_scheduler()
+        return self._scheduler
 
     def callLater(self, delay, func):
         """Call func after at minimum delay has expired
@@ -23,35 +172,24 @@ class ExecuteAsynchronisly:
         Args:
             delay : delay to wait in seconds
             func : function to evaluate
-        """
-        if self.loop.is_running():
-            self.loop.call_later(delay, func)
 
-        else:
-            def sleep_and_finish():
-                nonlocal func
-                time.sleep(delay)
-                func()
-
-            threading.Thread(target=sleep_and_finish, daemon=True).start()
+        Returns:
+            a handle with a method `cancel`
+        """
+        loop = _running_loop()
+        if loop is not None:
+            return loop.call_later(delay, func)
+        return self.scheduler.callLater(delay, func)
 
     def callAt(self, timestamp, func):
         """Call a function not earler than the given time stamp
 
-        This function should handle it over to a system function and not 
-        the other way round ....
-
+        Args:
+            timestamp : unix time stamp (as returned by :func:`time.time`)
+            func : function to evaluate
 
-        Todo:
-            What to do if the request timestamp has already passed?
+        If the time stamp has already passed the function is called as
+        soon as possible.
         """
-        raise NotImplementedError("Code below is not yet checked")
-        now = time.time()
-        delay = now - timestamp
-
-        if delay < 0:
-            fmt = "Time of execution {} (timestamp {}) already passed as now is {} (timestamp {})"
-            d_ts, d_now = [datetime.datetime.fromtimestamp(t) for t in (timestamp, now)]
-            raise AssertionError(fmt.fomat(timestamp, d_ts, now, d_now))
-
-        self.callLater(delay, func)
\ No newline at end of file
+        delay = max(timestamp - time.time(), 0.0)
+        return self.callLater(delay, func)
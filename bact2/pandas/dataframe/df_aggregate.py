@@ -3,10 +3,12 @@
 Main entry points:
    * :func:`df_with_vectors_mean`
    * :func:`df_with_vectors_aggregate`
+   * :func:`df_with_vectors_reduce`
 '''
 import numpy as np
 import pandas as pd
 import logging
+from .vector_array import VectorArray, to_vector_array
 
 logger = logging.getLogger('bact2')
 
@@ -287,6 +289,18 @@ def df_with_vectors_aggregate(df, group, grouped_df, func_for_vecs,
     }
     vector_aggregate_check_keywords(**kws)
 
+    ndf, missing_cols = _prepare_aggregated_frame(df, grouped_df)
+    for col in missing_cols:
+        _aggregate_column_by_group(df, group, ndf, col, kws)
+    return ndf
+
+
+def _prepare_aggregated_frame(df, grouped_df):
+    '''Frame for the aggregated data and the columns still to treat
+
+    Returns:
+        ndf, missing_cols
+    '''
     missing_cols = set(df.columns) - set(grouped_df.columns)
     logger.debug('Columns treated additionally {}'.format(missing_cols))
 
@@ -300,40 +314,272 @@ def df_with_vectors_aggregate(df, group, grouped_df, func_for_vecs,
     for col in grouped_df.columns:
         ndf.loc[:, col] = grouped_df.loc[:, col]
 
+    return ndf, missing_cols
+
+
+def _aggregate_column_by_group(df, group, ndf, col, kws):
+    '''Aggregate one column group by group and store it in ndf
+    '''
     # Special treatment for vector like frames
     for target_index, index in group.groups.items():
-        # vals = pd.Series(index = ndf.index, dtype=np.object_)
-        for col in missing_cols:
-            df_sel = df.loc[index, :]
-            t_data = df.loc[index, col]
-
-            def errmsg():
-                nonlocal col, t_data
-
-                values = np.asarray(t_data.values)
-                rv = values.ravel()
-                try:
-                    dtype = rv[0].dtype
-                except Exception:
-                    dtype = 'dtype could not be determined'
-                tup = (col, t_data.dtype, t_data.shape, dtype)
-                fmt = ('Vector conversion failed for column' +
-                       ' {} (type {}  shape {}) first element type {}')
-                txt = fmt.format(*tup)
-                return txt
-
-            kws['error_msg_f'] = errmsg
-            l_index = len(index)
-            elem = _vector_aggregate(t_data, column_name=col, l_index=l_index,
-                                     df=df_sel, **kws)
-            if elem is not None:
-                # Using index in the first column did not work for me
-                ndf.loc[:, col].at[target_index] = elem
-
-            #if elem is not None:
-            #    vals.at[target_index] = elem
-        #ndf.loc[:, col] = vals
-        #
+        df_sel = df.loc[index, :]
+        t_data = df.loc[index, col]
+
+        def errmsg():
+            nonlocal col, t_data
+
+            values = np.asarray(t_data.values)
+            rv = values.ravel()
+            try:
+                dtype = rv[0].dtype
+            except Exception:
+                dtype = 'dtype could not be determined'
+            tup = (col, t_data.dtype, t_data.shape, dtype)
+            fmt = ('Vector conversion failed for column' +
+                   ' {} (type {}  shape {}) first element type {}')
+            txt = fmt.format(*tup)
+            return txt
+
+        kws['error_msg_f'] = errmsg
+        l_index = len(index)
+        elem = _vector_aggregate(t_data, column_name=col, l_index=l_index,
+                                 df=df_sel, **kws)
+        if elem is not None:
+            # Using index in the first column did not work for me
+            ndf.loc[:, col].at[target_index] = elem
+
+
+# ---------------------------------------------------------------------------
+# Vectorised aggregation
+#
+# The functions below aggregate all groups at once: the rows are sorted
+# group by group, each column is stacked once into an ndarray and
+# reduced using the ufunc's reduceat method. Columns which can not be
+# stacked (e.g. strings) are handed over to :func:`_vector_aggregate`
+# group by group.
+class GroupSegments:
+    '''Rows of a grouped dataframe arranged as contiguous segments
+
+    Args:
+        group: a group object as returned by :meth:`df.groupby`
+
+    The segments follow the order of the groups (i.e. the index of
+    the aggregated dataframe). Within a segment the rows keep the order
+    they have in the original dataframe.
+    '''
+    def __init__(self, group):
+        codes = np.asarray(group.ngroup())
+        n_groups = group.ngroups
+
+        # rows with an undefined group key are not part of any group
+        rows = np.flatnonzero(codes >= 0)
+        codes = codes[rows]
+
+        self.order = rows[np.argsort(codes, kind='stable')]
+        self.counts = np.bincount(codes, minlength=n_groups)
+        self.starts = np.zeros(n_groups, dtype=np.int_)
+        np.cumsum(self.counts[:-1], out=self.starts[1:])
+
+        assert((self.counts > 0).all())
+
+    def __len__(self):
+        return len(self.counts)
+
+    def skip_first(self):
+        '''Segments without the first row of each group
+
+        Raises:
+            KnownVectorAggregationException if a group contains less
+            than two rows
+        '''
+        l = self.counts.min()
+        if l < 2:
+            txt = 'Can not skip first measurement if vector is of length {}'
+            raise KnownVectorAggregationException(txt.format(l))
+
+        keep = np.ones(len(self.order), dtype=np.bool_)
+        keep[self.starts] = False
+
+        r = object.__new__(GroupSegments)
+        r.order = self.order[keep]
+        r.counts = self.counts - 1
+        r.starts = self.starts - np.arange(len(self.starts))
+        return r
+
+
+def _stack_column(t_col):
+    '''Stack a column to a numeric array of shape (n_rows, ...)
+
+    Returns:
+        the stacked array or None if the column can not be represented
+        as a numeric array
+    '''
+    values = t_col.array
+    if isinstance(values, VectorArray):
+        return values.matrix
+
+    values = t_col.values
+    if values.dtype != np.object_:
+        if np.issubdtype(values.dtype, np.number):
+            return values
+        return None
+
+    if len(values) == 0:
+        return None
+
+    test_obj = values[0]
+    if type(test_obj) != np.ndarray:
+        return None
+    if not np.issubdtype(test_obj.dtype, np.number):
+        return None
+
+    try:
+        stacked = np.stack(values)
+    except ValueError:
+        # vectors of different length or mixed with scalars
+        return None
+    return stacked
+
+
+def _reduce_segments(stacked, segments, method):
+    '''Reduce the stacked rows segment by segment
+
+    Args:
+        stacked:  array of shape (n_rows, ...)
+        segments: a :class:`GroupSegments` instance
+        method:   one of 'mean', 'max', 'amax'
+
+    Returns:
+        an array of shape (n_groups, ...)
+    '''
+    data = np.take(stacked, segments.order, axis=0)
+    starts = segments.starts
+
+    if method == 'mean':
+        r = np.add.reduceat(data, starts, axis=0)
+        shape = (-1,) + (1,) * (r.ndim - 1)
+        return r / segments.counts.reshape(shape)
+    elif method == 'max':
+        return np.maximum.reduceat(data, starts, axis=0)
+    elif method == 'amax':
+        return np.maximum.reduceat(np.absolute(data), starts, axis=0)
+
+    raise AssertionError(f'Unknown reduction method {method}')
+
+
+def _reduce_segments_time_mean(values, segments):
+    '''Mean of datetime64 values for each segment
+
+    Uses the first value of each segment as reference as done by
+    :func:`time_vector_mean`
+    '''
+    values = np.asarray(values, dtype='datetime64[ns]')
+    data = np.take(values, segments.order)
+    ref = data[segments.starts]
+    dt = (data - np.repeat(ref, segments.counts)).astype(np.int64)
+    dt_sum = np.add.reduceat(dt, segments.starts)
+    dt_mean = (dt_sum / segments.counts).astype(np.int64)
+    return ref + dt_mean.astype('timedelta64[ns]')
+
+
+def _to_cells(result, vector_array=False):
+    '''Result of a segment reduction to the cells of a column
+
+    Rows are returned as vectors if the result is a matrix. These are
+    stored as :class:`VectorArray` if vector_array is True.
+    '''
+    if result.ndim == 1:
+        return result
+
+    if vector_array and result.ndim == 2:
+        return VectorArray(result)
+
+    cells = np.empty(len(result), dtype=np.object_)
+    for i, row in enumerate(result):
+        cells[i] = row
+    return cells
+
+
+#: fallback functions used by :func:`df_with_vectors_reduce` for
+#: columns which can not be stacked
+_reduce_fallback_funcs = {
+    'mean': vectors_mean,
+    'max': vectors_max,
+    'amax': vectors_amax,
+    'mean_skip_first': vectors_mean_skip_first,
+}
+
+
+def df_with_vectors_reduce(df, group, grouped_df, method, time_method=None):
+    '''Aggregate a data frame with its vectors for all groups at once
+
+    Vectorised variant of :func:`df_with_vectors_aggregate`. Each column
+    is stacked once and reduced over all groups.
+
+    Args:
+        df :          the original df
+        group :       a group object (used to index into df)
+        grouped_df:   the dataframe containing the already grouped values
+        method:       one of 'mean', 'max', 'amax', 'mean_skip_first'
+        time_method:  None or 'mean': aggregation of the np.datetime64
+                      columns. If None these are left empty
+
+    Returns:
+        a dataframe containing aggregation of the scalars and vectors
+
+    Columns which can not be stacked to a numeric array (e.g. strings or
+    vectors of different length) are treated group by group as done by
+    :func:`df_with_vectors_aggregate`.
+    '''
+    try:
+        func_for_vecs = _reduce_fallback_funcs[method]
+    except KeyError:
+        raise AssertionError(f'Unknown reduction method {method}')
+
+    assert(time_method in (None, 'mean'))
+    func_for_time = None
+    if time_method == 'mean':
+        func_for_time = time_series_mean
+
+    ndf, missing_cols = _prepare_aggregated_frame(df, grouped_df)
+    if len(missing_cols) == 0 or df.shape[0] == 0:
+        return ndf
+
+    segments = GroupSegments(group)
+    assert(len(segments) == ndf.shape[0])
+    if method == 'mean_skip_first':
+        vec_segments = segments.skip_first()
+        vec_method = 'mean'
+    else:
+        vec_segments = segments
+        vec_method = method
+
+    def error_msg_f_fake():
+        raise AssertionError('This function should not be called!')
+
+    kws = {
+        'func_for_vecs': func_for_vecs,
+        'func_for_time': func_for_time,
+        'error_msg_f': error_msg_f_fake,
+    }
+
+    for col in missing_cols:
+        t_col = df.loc[:, col]
+        stacked = _stack_column(t_col)
+        if stacked is not None:
+            result = _reduce_segments(stacked, vec_segments, vec_method)
+            vector_array = isinstance(t_col.array, VectorArray)
+            ndf[col] = _to_cells(result, vector_array=vector_array)
+            continue
+
+        if np.issubdtype(t_col.dtype, np.datetime64):
+            if time_method is not None:
+                ndf[col] = _reduce_segments_time_mean(t_col.values, segments)
+            continue
+
+        logger.debug(f'Column {col} aggregated group by group')
+        _aggregate_column_by_group(df, group, ndf, col, kws)
+
     return ndf
 
 
@@ -345,8 +591,7 @@ def df_with_vectors_mean(df, column_name):
     grp = df.groupby(column_name)
     tdf = grp.mean()
 
-    return df_with_vectors_aggregate(df, grp, tdf, vectors_mean,
-                                     func_for_time=time_series_mean)
+    return df_with_vectors_reduce(df, grp, tdf, 'mean', time_method='mean')
 
 def df_with_vectors_amax(df, column_name):
     '''
@@ -356,8 +601,7 @@ def df_with_vectors_amax(df, column_name):
     grp = df.groupby(column_name)
     tdf = grp.max()
 
-    return df_with_vectors_aggregate(df, grp, tdf, vectors_amax,
-                                     func_for_time=time_series_mean)
+    return df_with_vectors_reduce(df, grp, tdf, 'amax', time_method='mean')
 
 def df_with_vectors_max(df, column_name):
     '''
@@ -367,8 +611,7 @@ def df_with_vectors_max(df, column_name):
     grp = df.groupby(column_name)
     tdf = grp.max()
 
-    return df_with_vectors_aggregate(df, grp, tdf, vectors_max,
-                                     func_for_time=time_series_mean)
+    return df_with_vectors_reduce(df, grp, tdf, 'max', time_method='mean')
 
 
 def df_with_vectors_mean_skip_first(df, column_name='measurement'):
@@ -377,9 +620,9 @@ def df_with_vectors_mean_skip_first(df, column_name='measurement'):
     grp = df.groupby(by=column_name)
     tdf = grp.mean()
 
-    return df_with_vectors_aggregate(df, grp, tdf, vectors_mean_skip_first)
+    return df_with_vectors_reduce(df, grp, tdf, 'mean_skip_first')
 
-def df_vectors_convert(df, copy = True):
+def df_vectors_convert(df, copy = True, vector_array=False):
     '''Convert objects to vectors if possible
 
     JSON export e.g. exports objects as lists. These require to be
@@ -387,6 +630,16 @@ def df_vectors_convert(df, copy = True):
 
     Best practise: call :meth:`df.infer_objects` first
 
+    Args:
+        df:           the dataframe to convert
+        copy:         work on a copy of the dataframe
+        vector_array: store columns of vectors of equal length as
+                      :class:`VectorArray` i.e. as one matrix instead
+                      of one array per row
+
+    Returns:
+        the converted dataframe
+
     Todo:
         Check if array strings require further processing
     '''
@@ -412,6 +665,12 @@ def df_vectors_convert(df, copy = True):
         if test_d not in [np.float64, np.int64]:
             continue
 
+        if vector_array and test.ndim == 1:
+            converted = to_vector_array(t_col)
+            if converted is not None:
+                df[col] = pd.Series(converted, index=df.index)
+                continue
+
         df.loc[:, col] = df.loc[:, col].apply(np.array)
 
         # Array type known, lets convert it
@@ -0,0 +1,236 @@
+'''Columns of vectors stored as one contiguous block
+
+Beam position monitor data are vectors: one value per monitor for each
+reading. Stored as objects each row of a column is a separate
+:class:`numpy.ndarray` which has to be stacked again each time the
+data are processed.
+
+:class:`VectorArray` is a pandas extension array storing all rows of a
+column as one matrix of shape (n_rows, n_elements). Selections by
+:meth:`df.loc` or :meth:`df.groupby` slice this matrix.
+
+Main entry points:
+   * :func:`column_to_matrix`
+   * :func:`to_vector_array`
+'''
+import numbers
+
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import (ExtensionArray, ExtensionDtype,
+                                   ExtensionScalarOpsMixin,
+                                   register_extension_dtype, take)
+
+
+@register_extension_dtype
+class VectorDtype(ExtensionDtype):
+    '''Data type of a column containing vectors of equal length
+    '''
+    name = 'vector'
+    type = np.ndarray
+    kind = 'O'
+    na_value = np.nan
+    _is_numeric = False
+
+    def __init__(self, n_elements=None):
+        '''
+        Args:
+            n_elements: length of the vectors if known. Used to create
+                        empty arrays; not compared with other dtypes
+        '''
+        self.n_elements = n_elements
+
+    @classmethod
+    def construct_array_type(cls):
+        return VectorArray
+
+    @classmethod
+    def construct_from_string(cls, string):
+        if string == cls.name:
+            return cls()
+        raise TypeError(f"Cannot construct a '{cls.__name__}' from '{string}'")
+
+
+class VectorArray(ExtensionScalarOpsMixin, ExtensionArray):
+    '''Vectors of equal length stored as rows of a matrix
+
+    Args:
+        data: a matrix of shape (n_rows, n_elements)
+
+    Single elements are returned as vectors (views of a row of the
+    matrix), any other selection as :class:`VectorArray`.
+    '''
+    def __init__(self, data, copy=False):
+        data = np.array(data, copy=copy)
+        if data.ndim != 2:
+            txt = f'Vector array requires a matrix but got shape {data.shape}'
+            raise AssertionError(txt)
+        self._data = data
+
+    @property
+    def matrix(self):
+        '''The vectors as matrix of shape (n_rows, n_elements)
+        '''
+        return self._data
+
+    # ----------------------------------------------------------------------
+    # pandas extension array interface
+    @classmethod
+    def _from_sequence(cls, scalars, dtype=None, copy=False):
+        if isinstance(scalars, VectorArray):
+            return scalars.copy() if copy else scalars
+        vectors = [np.asarray(v) for v in scalars]
+        if not vectors:
+            n_elements = getattr(dtype, 'n_elements', None) or 0
+            return cls(np.empty((0, n_elements), dtype=np.float_))
+        return cls(np.stack(vectors))
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls._from_sequence(values)
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        return cls(np.concatenate([a._data for a in to_concat], axis=0))
+
+    @property
+    def dtype(self):
+        return VectorDtype(self._data.shape[1])
+
+    @property
+    def nbytes(self):
+        return self._data.nbytes
+
+    def __len__(self):
+        return self._data.shape[0]
+
+    def __getitem__(self, item):
+        if isinstance(item, numbers.Integral):
+            return self._data[item]
+        if isinstance(item, tuple) and len(item) == 1:
+            item = item[0]
+        try:
+            item = pd.api.indexers.check_array_indexer(self, item)
+        except (AttributeError, IndexError, TypeError):
+            pass
+        return type(self)(self._data[item])
+
+    def __setitem__(self, key, value):
+        if isinstance(value, VectorArray):
+            value = value._data
+        elif isinstance(value, (list, tuple)) or (
+                isinstance(value, np.ndarray) and value.dtype == np.object_):
+            value = np.stack([np.asarray(v) for v in value])
+        self._data[key] = value
+
+    def __array__(self, dtype=None):
+        if dtype is not None and np.dtype(dtype) != np.object_:
+            return np.asarray(self._data, dtype=dtype)
+        r = np.empty(len(self), dtype=np.object_)
+        for i, row in enumerate(self._data):
+            r[i] = row
+        return r
+
+    def __eq__(self, other):
+        other = _unbox(other)
+        return np.asarray(self._data == other).all(axis=-1)
+
+    def isna(self):
+        if not np.issubdtype(self._data.dtype, np.floating):
+            return np.zeros(len(self), dtype=np.bool_)
+        return np.isnan(self._data).all(axis=1)
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        data = self._data
+        if allow_fill:
+            if fill_value is None or fill_value is self.dtype.na_value:
+                fill_value = np.nan
+            if not np.issubdtype(data.dtype, np.floating):
+                data = data.astype(np.float_)
+        r = take(data, indices, allow_fill=allow_fill, fill_value=fill_value,
+                 axis=0)
+        return type(self)(r)
+
+    def copy(self):
+        return type(self)(self._data, copy=True)
+
+    def astype(self, dtype, copy=True):
+        if isinstance(dtype, VectorDtype) or dtype == VectorDtype.name:
+            return self.copy() if copy else self
+        return np.array(self, dtype=dtype)
+
+    def tolist(self):
+        return list(self._data)
+
+    @classmethod
+    def _create_arithmetic_method(cls, op):
+        '''Arithmetic on the complete matrix instead of element wise
+        '''
+        def arithmetic_method(self, other):
+            if isinstance(other, (pd.Series, pd.Index, pd.DataFrame)):
+                return NotImplemented
+            r = op(self._data, _unbox(other))
+            return cls(r)
+
+        arithmetic_method.__name__ = f'__{op.__name__}__'
+        return arithmetic_method
+
+
+VectorArray._add_arithmetic_ops()
+
+
+def _unbox(other):
+    '''Other operand as an array to combine with the matrix
+    '''
+    if isinstance(other, VectorArray):
+        return other._data
+    if isinstance(other, np.ndarray) and other.dtype == np.object_:
+        return np.stack([np.asarray(v) for v in other])
+    return other
+
+
+def is_vector_column(col):
+    '''True if the column is stored as :class:`VectorArray`
+    '''
+    return isinstance(getattr(col, 'array', None), VectorArray)
+
+
+def to_vector_array(values):
+    '''Stack a sequence of vectors to a :class:`VectorArray`
+
+    Returns:
+        None if the vectors are not of equal length or not numeric
+    '''
+    values = getattr(values, 'array', values)
+    if isinstance(values, VectorArray):
+        return values
+    values = list(values)
+    if len(values) == 0:
+        return None
+
+    test = np.asarray(values[0])
+    if test.ndim != 1 or not np.issubdtype(test.dtype, np.number):
+        return None
+
+    try:
+        mat = np.stack([np.asarray(v) for v in values])
+    except ValueError:
+        return None
+
+    if not np.issubdtype(mat.dtype, np.number):
+        return None
+    return VectorArray(mat)
+
+
+def column_to_matrix(col, dtype=np.float_):
+    '''Vectors of a column as matrix of shape (n_rows, n_elements)
+
+    For columns stored as :class:`VectorArray` the matrix is returned
+    without copying (if it is of the requested type). Object columns
+    are stacked.
+    '''
+    values = getattr(col, 'array', col)
+    if isinstance(values, VectorArray):
+        return np.asarray(values.matrix, dtype=dtype)
+    return np.array(np.asarray(col).tolist(), dtype)
+
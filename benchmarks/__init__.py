@@ -0,0 +1,11 @@
+'''Benchmarks of the measurement plans and the data processing
+
+The modules follow the conventions of airspeed velocity (asv):
+classes or functions with methods prefixed `time_`, `peakmem_` and
+`track_`. Run them with `asv run` or, without asv, with
+
+    python -m benchmarks.run_benchmarks
+
+The plan benchmarks run against the simulated devices of
+:mod:`bact2.ophyd.devices.sim`.
+'''
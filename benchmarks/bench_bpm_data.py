@@ -0,0 +1,49 @@
+'''Decoding and scaling of the packed bpm data
+'''
+from bact2.ophyd.devices.pp.bpm.bpm_packed_data import (
+    packed_data_names, packed_data_to_named_array, raw_to_scaled_data_channel,
+    PackedDataDecoder, ScaledDataConverter)
+from bact2.ophyd.devices.sim.bpm import pack_data
+
+import numpy as np
+
+
+class PackedDataDecoding:
+    '''one reading of the bpm waveform as sent by the IOC
+    '''
+    params = [128, 1024]
+    param_names = ['n_bpms']
+
+    def setup(self, n_bpms):
+        rng = np.random.RandomState(1)
+        mat = rng.uniform(-2**15, 2**15, size=(len(packed_data_names), n_bpms))
+        self.packed_data = pack_data(mat)
+        self.indices = np.arange(0, n_bpms, 2)
+        self.decoder = PackedDataDecoder(n_valid_items=n_bpms,
+                                         indices=self.indices)
+        scale = (2.0**15, 0.1, 1.0)
+        self.converter = ScaledDataConverter(scale, scale)
+        self.out = np.empty((4, len(self.indices)))
+        self.n_bpms = n_bpms
+
+    def time_packed_data_to_named_array(self, n_bpms):
+        packed_data_to_named_array(self.packed_data, n_valid_items=n_bpms,
+                                   indices=self.indices)
+
+    def time_named_array_and_scale(self, n_bpms):
+        '''the former path: named array, each channel scaled separately
+        '''
+        data = packed_data_to_named_array(self.packed_data,
+                                          n_valid_items=n_bpms,
+                                          indices=self.indices)
+        for name in ('x_pos_raw', 'y_pos_raw'):
+            raw_to_scaled_data_channel(data[name], 2.0**15, 0.1)
+        for name in ('x_rms_raw', 'y_rms_raw'):
+            raw_to_scaled_data_channel(data[name], 2.0**15, 0)
+
+    def time_decoder(self, n_bpms):
+        self.decoder.decode(self.packed_data)
+
+    def time_decoder_and_converter(self, n_bpms):
+        data = self.decoder.decode(self.packed_data)
+        self.converter.convert(data, out=self.out)
@@ -0,0 +1,59 @@
+'''Aggregation of measurement dataframes: vector means and bpm gains
+'''
+from bact2.pandas.dataframe import df_aggregate as dfg
+from bact2.applib.transverse_lib.bpm_data import calc_bpm_gains
+from bact2.bluesky.plans.loop_steerers import current_signs
+
+import numpy as np
+import pandas as pd
+
+
+def steerer_response_dataframe(n_steerers, n_bpms, num_readings=3, seed=1):
+    '''dataframe as produced by :func:`loop_steerers`
+
+    One row per bpm reading: the orbit is linear in the steerer
+    current plus noise.
+    '''
+    rng = np.random.RandomState(seed)
+    ds = np.linspace(0, 240, n_bpms)
+    rows = []
+    measurement = 0
+    for cnt in range(n_steerers):
+        name = f'hs{cnt}'
+        offset = rng.normal()
+        response = rng.normal(size=(2, n_bpms))
+        for d_current in 0.1 * current_signs:
+            for i in range(num_readings):
+                pos = response * d_current
+                pos = pos + rng.normal(scale=1e-3, size=pos.shape)
+                rows.append({
+                    'measurement': measurement,
+                    'sc_selected': name,
+                    'sc_sel_dev_setpoint': offset + d_current,
+                    'bk_dev_current_offset': offset,
+                    'bk_dev_dI': d_current,
+                    'bpm_waveform_x_pos': pos[0],
+                    'bpm_waveform_y_pos': pos[1],
+                    'bpm_waveform_ds': ds,
+                })
+            measurement += 1
+    return pd.DataFrame(rows)
+
+
+class DataFrameAggregation:
+    params = ([4, 32], [128])
+    param_names = ['n_steerers', 'n_bpms']
+
+    def setup(self, n_steerers, n_bpms):
+        self.df = steerer_response_dataframe(n_steerers, n_bpms)
+
+    def time_df_with_vectors_mean_skip_first(self, n_steerers, n_bpms):
+        dfg.df_with_vectors_mean_skip_first(self.df, column_name='measurement')
+
+    def time_calc_bpm_gains(self, n_steerers, n_bpms):
+        calc_bpm_gains(self.df, column_name='sc_selected',
+                       indep_column='bk_dev_dI')
+
+    def peakmem_calc_bpm_gains(self, n_steerers, n_bpms):
+        calc_bpm_gains(self.df, column_name='sc_selected',
+                       indep_column='bk_dev_dI')
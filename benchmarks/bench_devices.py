@@ -0,0 +1,23 @@
+'''Moves of the simulated power converters
+'''
+from bact2.ophyd.devices.sim import SimAdaptiveSteerer, SimSteerer
+
+
+class SteererMove:
+    '''fixed settle time (0.5 s) versus settle detection (window 50 ms)
+    '''
+    repeat = 5
+    params = [False, True]
+    param_names = ['adaptive']
+
+    def setup(self, adaptive):
+        if adaptive:
+            steerer = SimAdaptiveSteerer(name='hs', slew_rate=10, tick=0.01)
+            steerer.settle_window.put(0.05)
+        else:
+            steerer = SimSteerer(name='hs', slew_rate=10, tick=0.01)
+        self.steerer = steerer
+
+    def time_step_and_back(self, adaptive):
+        self.steerer.set(0.2).wait(10)
+        self.steerer.set(0.0).wait(10)
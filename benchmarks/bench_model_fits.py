@@ -0,0 +1,60 @@
+'''Fit of the ocelot model to the orbit response of a steerer
+
+Requires ocelot and the machine lattice; skipped otherwise.
+'''
+import numpy as np
+
+
+class ModelFits:
+    timeout = 600
+
+    def setup(self):
+        try:
+            from bact2.applib.transverse_lib import model_fits, reference_orbit
+            from ocelot.cpbd.elements import Hcor
+        except ImportError as exc:
+            raise NotImplementedError(f'model not available: {exc}')
+
+        self.model_fits = model_fits
+        self.model_cache_class = model_fits.ModelCache
+        self.magnet_name = next(
+            elem.id for elem in reference_orbit.ncell if isinstance(elem, Hcor)
+        )
+
+        op = model_fits.OrbitOffsetProcessor(
+            cell=reference_orbit.ncell, model_cache=self.newCache(),
+            linear_response=True, second_order=True)
+        op.reference_angle = 1e-4
+        self.orbit_processor = op
+
+        # measurement: the model orbit in mm
+        self.steerer_amplitude = np.array([0, 1, -1, 0, 1, -1, 0], np.float_)
+        ref = op.create_reference_data(magnet_name=self.magnet_name,
+                                       scales=self.steerer_amplitude)
+        self.bpm_data = reference_orbit.OrbitData(x=ref.x * 1000,
+                                                  y=ref.y * 1000, s=ref.s)
+
+    def newCache(self):
+        '''cache in memory only
+        '''
+        return self.model_cache_class(cache_dir=False)
+
+    def fit(self):
+        return self.model_fits.calculate_model_fits(
+            orbit_processor=self.orbit_processor, bpm_data=self.bpm_data,
+            magnet_name=self.magnet_name, coordinate='x',
+            steerer_amplitude=self.steerer_amplitude,
+            steps_to_execute=self.model_fits.StepsModelFit.fit_parabola)
+
+    def time_calculate_model_fits_cached(self):
+        '''models of the steerer taken from the cache
+        '''
+        self.fit()
+
+    def time_calculate_model_fits(self):
+        '''models computed
+        '''
+        op = self.orbit_processor
+        op.model_cache = self.newCache()
+        op._response_terms = {}
+        self.fit()
@@ -0,0 +1,289 @@
+'''End to end benchmarks: measurement plans against the simulated machine
+
+Each suite runs its plan once in `setup_cache` to derive the tracked
+figures (time per steerer or quadrupole, time per bpm reading, event
+document rate) and times the plan again in `time_plan`. `peakmem_plan`
+reports the peak memory.
+'''
+from bact2.ophyd.devices.raw.steerers import (
+    horizontal_steerer_names, vertical_steerer_names)
+from bact2.bluesky.plans.threaded_environement import run_environement
+from bact2.bluesky.plans import async_environement
+from bact2.bluesky.plans.loop_steerers_pipelined import loop_steerers_pipelined
+from bact2.bluesky.plans.vector_environement import VectorEnvironment
+
+from .sim_machine import (
+    SimulatedMachine, PlanStatistics, SteererEnvironment, logger,
+    quadrupole_names, steerer_response_plan, multiplexer_scan_plan,
+    random_agent, random_agent_async)
+
+import functools
+
+#: steerers measured: the first horizontal and vertical ones
+steerer_names = horizontal_steerer_names[:2] + vertical_steerer_names[:2]
+num_readings = 2
+bpm_rate = 50.0
+
+
+def _run(plan_factory):
+    machine = SimulatedMachine(bpm_rate=bpm_rate)
+    machine.start()
+    try:
+        stat = PlanStatistics().run(plan_factory(machine))
+    finally:
+        machine.stop()
+    return {
+        'wall_time': stat.wall_time,
+        'n_events': stat.n_events,
+        'event_rate': stat.event_rate,
+    }
+
+
+class _PlanSuite:
+    '''common setup: simulated machine running during the benchmark
+    '''
+    number = 1
+    repeat = 3
+    timeout = 300
+
+    #: number of units (steerers, quadrupoles, steps) measured by the plan
+    n_units = 1
+
+    def planFactory(self, machine):
+        raise NotImplementedError('implement in derived class')
+
+    def setup_cache(self):
+        return _run(self.planFactory)
+
+    def setup(self, *args):
+        self.machine = SimulatedMachine(bpm_rate=bpm_rate)
+        self.machine.start()
+
+    def teardown(self, *args):
+        self.machine.stop()
+
+    def time_plan(self, *args):
+        PlanStatistics().run(self.planFactory(self.machine))
+
+    def peakmem_plan(self, *args):
+        PlanStatistics().run(self.planFactory(self.machine))
+
+    def track_time_per_unit(self, stat):
+        return stat['wall_time'] / self.n_units
+    track_time_per_unit.unit = 's'
+
+    def track_time_per_event(self, stat):
+        '''each event is one trigger of the bpm
+        '''
+        return stat['wall_time'] / stat['n_events']
+    track_time_per_event.unit = 's'
+
+    def track_event_rate(self, stat):
+        return stat['event_rate']
+    track_event_rate.unit = 'events/s'
+
+
+class SteererResponse(_PlanSuite):
+    '''measurement loop of :func:`loop_steerers`: time per steerer
+    '''
+    n_units = len(steerer_names)
+
+    def planFactory(self, machine):
+        return steerer_response_plan(machine, steerer_names,
+                                     num_readings=num_readings)
+
+
+class LoopSteerers(_PlanSuite):
+    '''the full :func:`loop_steerers` including the scale search
+    '''
+    n_units = len(steerer_names)
+
+    def setup_cache(self):
+        self.checkAvailable()
+        return super().setup_cache()
+
+    def setup(self, *args):
+        self.checkAvailable()
+        super().setup(*args)
+
+    def checkAvailable(self):
+        try:
+            from bact2.ophyd.devices.utils import optimizers
+        except ImportError as exc:
+            raise NotImplementedError(f'root finder not available: {exc}')
+
+    def planFactory(self, machine):
+        from bact2.ophyd.devices.utils.optimizers import CautiousRootFinder
+        from bact2.bluesky.plans.loop_steerers import loop_steerers
+
+        col = machine.steerers
+        return loop_steerers(
+            [machine.bpm], col, num_readings=num_readings,
+            horizontal_steerer_names=horizontal_steerer_names[:2],
+            vertical_steerer_names=vertical_steerer_names[:2],
+            current_val_horizontal=0.1, current_val_vertical=0.1,
+            book_keeping_dev=machine.book_keeping,
+            root_finder=CautiousRootFinder(name='cr'), dr_target=0.05,
+            logger=logger)
+
+
+class LoopSteerersScaleSearch(_PlanSuite):
+    ''':func:`loop_steerers` searching the scale from the gains of the
+    model response (see :func:`steerer_scale_search_step`)
+    '''
+    n_units = len(steerer_names)
+
+    def planFactory(self, machine):
+        from bact2.bluesky.plans.loop_steerers import loop_steerers
+        from bact2.math.proportional_root import GainCache
+
+        orbit = machine.orbit
+        names = [name.lower() for name in orbit.kicker_names]
+        cache = GainCache.fromResponse(names, orbit.response_x, orbit.response_y)
+        col = machine.steerers
+        return loop_steerers(
+            [machine.bpm], col, num_readings=num_readings,
+            horizontal_steerer_names=horizontal_steerer_names[:2],
+            vertical_steerer_names=vertical_steerer_names[:2],
+            current_val_horizontal=0.1, current_val_vertical=0.1,
+            book_keeping_dev=machine.book_keeping,
+            scale_cache=cache, dr_target=0.05, logger=logger)
+
+
+class LoopSteerersPipelined(_PlanSuite):
+    ''':func:`loop_steerers_pipelined` with steerers settling 50 ms
+
+    Hysteresis loop and setting back the previous steerer made one
+    after the other or overlapping.
+    '''
+    n_units = len(steerer_names)
+    params = [False, True]
+    param_names = ['overlap']
+
+    def setup_cache(self):
+        return {overlap: _run(functools.partial(self.planFactory,
+                                                overlap=overlap))
+                for overlap in self.params}
+
+    def track_time_per_unit(self, stat, overlap):
+        return super().track_time_per_unit(stat[overlap])
+    track_time_per_unit.unit = 's'
+
+    def track_time_per_event(self, stat, overlap):
+        return super().track_time_per_event(stat[overlap])
+    track_time_per_event.unit = 's'
+
+    def track_event_rate(self, stat, overlap):
+        return super().track_event_rate(stat[overlap])
+    track_event_rate.unit = 'events/s'
+
+    def time_plan(self, stat, overlap):
+        PlanStatistics().run(self.planFactory(self.machine, overlap=overlap))
+
+    def peakmem_plan(self, stat, overlap):
+        PlanStatistics().run(self.planFactory(self.machine, overlap=overlap))
+
+    def planFactory(self, machine, overlap=True):
+        machine.steerers.setSettleTime(0.05)
+        return loop_steerers_pipelined(
+            [machine.bpm], machine.steerers, num_readings=num_readings,
+            horizontal_steerer_names=steerer_names[:2],
+            vertical_steerer_names=steerer_names[2:],
+            current_val_horizontal=0.1, current_val_vertical=0.1,
+            current_steps=[0, 1, -1], book_keeping_dev=machine.book_keeping,
+            overlap=overlap, logger=logger)
+
+
+class MultiplexerScan(_PlanSuite):
+    '''quadrupole scan using the multiplexer: time per quadrupole
+    '''
+    n_units = len(quadrupole_names)
+
+    def planFactory(self, machine):
+        return multiplexer_scan_plan(machine, quadrupole_names,
+                                     num_readings=num_readings)
+
+
+class EnvironmentSteps(_PlanSuite):
+    ''':func:`run_environement` driven by an agent: time per step
+    '''
+    n_steps = 10
+    n_units = n_steps
+
+    def planFactory(self, machine):
+        col = machine.steerers.steerers
+        motors = [getattr(col, name) for name in steerer_names]
+        env = SteererEnvironment(detectors=[machine.bpm] + motors,
+                                 motors=motors, state_motors=motors)
+        agent = functools.partial(random_agent, env, self.n_steps)
+        return run_environement(env, agent)
+
+
+class EnvironmentStepsPipelined(_PlanSuite):
+    ''':func:`run_environement` with the steps submitted ahead: time per
+    step
+    '''
+    n_steps = 10
+    n_units = n_steps
+    max_in_flight = 4
+
+    def planFactory(self, machine):
+        col = machine.steerers.steerers
+        motors = [getattr(col, name) for name in steerer_names]
+        env = SteererEnvironment(detectors=[machine.bpm] + motors,
+                                 motors=motors, state_motors=motors)
+        agent = functools.partial(random_agent, env, self.n_steps,
+                                  pipelined=True)
+        return run_environement(env, agent, max_in_flight=self.max_in_flight)
+
+
+class EnvironmentStepsAsync(_PlanSuite):
+    ''':func:`async_environement.run_environement`: the agent runs on the
+    loop of the run engine. Time per step
+    '''
+    n_steps = 10
+    n_units = n_steps
+
+    def planFactory(self, machine):
+        col = machine.steerers.steerers
+        motors = [getattr(col, name) for name in steerer_names]
+        env = SteererEnvironment(detectors=[machine.bpm] + motors,
+                                 motors=motors, state_motors=motors)
+        agent = functools.partial(random_agent_async, env, self.n_steps)
+        return async_environement.run_environement(env, agent)
+
+
+class VectorEnvironmentSteps(_PlanSuite):
+    '''one environment per steerer, stepped by :class:`VectorEnvironment`:
+    time per environment step
+    '''
+    n_steps = 10
+    n_units = n_steps * len(steerer_names)
+
+    def planFactory(self, machine):
+        col = machine.steerers.steerers
+        envs = []
+        for name in steerer_names:
+            motor = getattr(col, name)
+            envs.append(SteererEnvironment(detectors=[machine.bpm, motor],
+                                           motors=[motor],
+                                           state_motors=[motor]))
+        venv = VectorEnvironment(envs)
+        agent = functools.partial(random_agent, venv, self.n_steps)
+        return run_environement(venv, agent)
+
+
+class BPMTrigger:
+    '''trigger of the bpm waveform: wait for the next update of the IOC
+    '''
+    repeat = 10
+
+    def setup(self):
+        self.machine = SimulatedMachine(bpm_rate=bpm_rate)
+        self.machine.start()
+
+    def teardown(self):
+        self.machine.stop()
+
+    def time_trigger(self):
+        self.machine.bpm.waveform.trigger().wait(5)
@@ -0,0 +1,120 @@
+'''Run the benchmarks without asv
+
+    python -m benchmarks.run_benchmarks [pattern]
+
+Follows the asv conventions used in this directory: `params`,
+`setup_cache`, `setup`, `teardown`, `time_*`, `peakmem_*` and
+`track_*`. A setup raising NotImplementedError skips the benchmark.
+Only a single timing is taken per repeat; use asv for statistics.
+'''
+import importlib
+import itertools
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+prefixes = ('time_', 'peakmem_', 'track_')
+
+
+def benchmark_modules():
+    path = os.path.dirname(os.path.abspath(__file__))
+    for filename in sorted(os.listdir(path)):
+        if filename.startswith('bench_') and filename.endswith('.py'):
+            yield importlib.import_module(f'{__package__}.{filename[:-3]}')
+
+
+def benchmark_classes(module):
+    for name in dir(module):
+        obj = getattr(module, name)
+        if name.startswith('_') or not isinstance(obj, type):
+            continue
+        if obj.__module__ != module.__name__:
+            continue
+        if any(attr.startswith(prefixes) for attr in dir(obj)):
+            yield obj
+
+
+def parameter_sets(cls):
+    params = getattr(cls, 'params', None)
+    if params is None:
+        return [()]
+    if not params or not isinstance(params[0], (list, tuple)):
+        params = [params]
+    return list(itertools.product(*params))
+
+
+def measure(method, args, repeat):
+    name = method.__name__
+    if name.startswith('track_'):
+        return method(*args), getattr(method, 'unit', '')
+    if name.startswith('peakmem_'):
+        tracemalloc.start()
+        try:
+            method(*args)
+            unused, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+        return peak, 'bytes'
+
+    timings = []
+    for i in range(repeat):
+        t_start = time.perf_counter()
+        method(*args)
+        timings.append(time.perf_counter() - t_start)
+    return min(timings), 's'
+
+
+def run_class(cls, pattern=None, out=sys.stdout):
+    obj = cls()
+    methods = [name for name in sorted(dir(cls)) if name.startswith(prefixes)]
+    if pattern is not None:
+        methods = [name for name in methods
+                   if re.search(pattern, f'{cls.__name__}.{name}')]
+    if not methods:
+        return
+
+    cache = ()
+    if hasattr(obj, 'setup_cache'):
+        try:
+            cache = (obj.setup_cache(),)
+        except NotImplementedError as exc:
+            out.write(f'{cls.__name__}: skipped ({exc})\n')
+            return
+
+    repeat = getattr(cls, 'repeat', 3)
+    if isinstance(repeat, tuple):
+        repeat = repeat[-1]
+
+    for param in parameter_sets(cls):
+        args = cache + tuple(param)
+        try:
+            if hasattr(obj, 'setup'):
+                obj.setup(*args)
+        except NotImplementedError as exc:
+            label = f'{cls.__name__}{list(param) if param else ""}'
+            out.write(f'{label}: skipped ({exc})\n')
+            continue
+        try:
+            for name in methods:
+                value, unit = measure(getattr(obj, name), args, repeat)
+                label = f'{cls.__name__}.{name}{list(param) if param else ""}'
+                out.write(f'{label:70s} {value:12.6g} {unit}\n')
+                out.flush()
+        finally:
+            if hasattr(obj, 'teardown'):
+                obj.teardown(*args)
+
+
+def main(argv=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    pattern = argv[0] if argv else None
+    for module in benchmark_modules():
+        for cls in benchmark_classes(module):
+            run_class(cls, pattern=pattern)
+
+
+if __name__ == '__main__':
+    main()
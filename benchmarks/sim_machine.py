@@ -0,0 +1,210 @@
+'''Simulated machine and plans shared by the plan benchmarks
+'''
+from bluesky import RunEngine, plan_stubs as bps, preprocessors as bpp
+
+from bact2.ophyd.devices.sim import (
+    BPMIOCSimulator, SimBPMStorageRing, SimMultiplexer,
+    SimSteererCollection, SimulatedOrbit)
+from bact2.ophyd.devices.raw.steerers import (
+    all_steerers, horizontal_steerer_names, vertical_steerer_names)
+from bact2.ophyd.devices.utils.book_keeping_dev import Bookkeeping
+from bact2.bluesky.plans.environement import Environment
+from bact2.bluesky.plans.loop_steerers import step_steerer, current_signs
+
+import logging
+import numpy as np
+import time
+
+logger = logging.getLogger('bact2')
+
+#: quadrupoles switched by the simulated multiplexer
+quadrupole_names = ['Q1M1D1R', 'Q1M2D1R', 'Q2M1D1R', 'Q2M2D1R']
+
+
+class SimulatedMachine:
+    '''Beam position monitors, steerers and multiplexer on one orbit
+
+    Args:
+        bpm_rate: updates of the beam position monitors per second
+        seed:     seed of the orbit and the bpm simulator
+
+    The power converters ramp fast and do not settle so that the time
+    is spent in the plans and in the bpm acquisition.
+    '''
+    def __init__(self, bpm_rate=50.0, seed=1):
+        self.bpm = SimBPMStorageRing(name='bpm')
+        waveform = self.bpm.waveform
+        n_bpms = len(waveform.indices.get())
+
+        kicker_names = list(all_steerers) + quadrupole_names
+        self.orbit = SimulatedOrbit.forRing(n_bpms, kicker_names, seed=seed,
+                                            noise=1e-4)
+
+        self.steerers = SimSteererCollection(name='sc')
+        self.steerers.connectOrbit(self.orbit)
+        self.steerers.setSettleTime(0.0)
+        for name in horizontal_steerer_names + vertical_steerer_names:
+            steerer = getattr(self.steerers.steerers, name)
+            steerer.slew_rate = 1000.0
+            steerer.tick = 1e-3
+
+        self.mux = SimMultiplexer(name='mux', quadrupole_names=quadrupole_names)
+        selector = self.mux.selector
+        selector.switch_time = 0.01
+        selector.validation_time = 0.02
+        pc = self.mux.power_converter
+        pc.settle_time = 0.0
+        pc.slew_rate = 1000.0
+        pc.tick = 1e-3
+        self.mux.connectOrbit(self.orbit)
+
+        self.book_keeping = Bookkeeping(name='bk_dev')
+        self.ioc = BPMIOCSimulator(waveform, self.orbit, rate=bpm_rate,
+                                   seed=seed)
+
+    def start(self):
+        self.ioc.start()
+
+    def stop(self):
+        self.ioc.stop()
+
+
+def steerer_response_plan(machine, steerer_names, num_readings=2,
+                          current=0.1):
+    '''the measurement loop of :func:`loop_steerers` without the scale search
+
+    Each steerer is selected and stepped through
+    :data:`loop_steerers.current_signs` using :func:`step_steerer`.
+    '''
+    col = machine.steerers
+    bk = machine.book_keeping
+    detectors = [machine.bpm, col.selected, bk]
+    currents = current * current_signs
+
+    @bpp.stage_decorator(detectors)
+    @bpp.run_decorator(md={'plan_name': 'steerer_response_benchmark'})
+    def _run():
+        for name in steerer_names:
+            yield from bps.mv(col, name)
+            yield from step_steerer(col.sel.dev, currents, detectors,
+                                    num_readings, book_keeping_dev=bk,
+                                    logger=logger)
+
+    return (yield from _run())
+
+
+def multiplexer_scan_plan(machine, quadrupoles, currents=(0.0, 1.0, -1.0, 0.0),
+                          num_readings=2):
+    '''select each quadrupole and step the multiplexer power converter
+
+    The steps of the beam based alignment measurement
+    (see `examples/switch_multiplexer.py`)
+    '''
+    mux = machine.mux
+    detectors = [machine.bpm, mux]
+
+    @bpp.stage_decorator(detectors)
+    @bpp.run_decorator(md={'plan_name': 'multiplexer_scan_benchmark'})
+    def _run():
+        for name in quadrupoles:
+            yield from bps.mv(mux.selector, name)
+            for current in currents:
+                yield from bps.mv(mux.power_converter, current)
+                for i in range(num_readings):
+                    yield from bps.trigger_and_read(detectors)
+            yield from bps.mv(mux.power_converter, 0.0)
+
+    return (yield from _run())
+
+
+class SteererEnvironment(Environment):
+    '''environment: the steerer currents are the actions, the orbit the state
+    '''
+    def storeInitialState(self, dic):
+        self.state_to_reset_to = [
+            dic[motor.setpoint.name]['value'] for motor in self.state_motors
+        ]
+
+    def getStateToResetTo(self):
+        assert(self.state_to_reset_to is not None)
+        return self.state_to_reset_to
+
+    def computeState(self, dic):
+        x = dic['bpm_waveform_x_pos']['value']
+        y = dic['bpm_waveform_y_pos']['value']
+        return np.concatenate([x, y])
+
+    def computeRewardTerminal(self, dic):
+        state = self.computeState(dic)
+        reward = - np.sqrt((state**2).mean())
+        return reward, False
+
+
+def _random_actions(env, n_steps, amplitude, seed):
+    rng = np.random.RandomState(seed)
+    envs = getattr(env, 'envs', None)
+    if envs is None:
+        shape = (len(env.motors),)
+    else:
+        # vector environment: one action vector per environment
+        shape = (len(envs), len(envs[0].motors))
+    for i in range(n_steps):
+        yield rng.uniform(-amplitude, amplitude, size=shape)
+
+
+def random_agent(env, n_steps, amplitude=0.1, seed=1, pipelined=False):
+    '''agent stepping the environment with random actions
+
+    If pipelined, all steps are submitted ahead (see
+    :meth:`Environment.steps`)
+    '''
+    env.setup()
+    env.reset()
+    actions = _random_actions(env, n_steps, amplitude, seed)
+    if pipelined:
+        env.steps(list(actions))
+    else:
+        for action in actions:
+            env.step(action)
+    env.done()
+
+
+async def random_agent_async(env, n_steps, amplitude=0.1, seed=1):
+    ''':func:`random_agent` as coroutine
+    '''
+    await env.setupAsync()
+    await env.resetAsync()
+    for action in _random_actions(env, n_steps, amplitude, seed):
+        await env.stepAsync(action)
+    env.done()
+
+
+class PlanStatistics:
+    '''documents and wall time of a plan run by a RunEngine
+    '''
+    def __init__(self):
+        self.counts = {}
+        self.wall_time = np.nan
+
+    def __call__(self, name, doc):
+        self.counts[name] = self.counts.get(name, 0) + 1
+
+    @property
+    def n_events(self):
+        return self.counts.get('event', 0)
+
+    @property
+    def event_rate(self):
+        '''events per second
+        '''
+        return self.n_events / self.wall_time
+
+    def run(self, plan):
+        '''run plan in a new RunEngine
+        '''
+        RE = RunEngine({})
+        RE.subscribe(self)
+        t_start = time.perf_counter()
+        RE(plan)
+        self.wall_time = time.perf_counter() - t_start
+        return self
@@ -1,7 +1,7 @@
 # -*- coding: utf-8 -*-
 
 from setuptools import setup, find_packages
-packages = find_packages()
+packages = find_packages(exclude=["benchmarks"])
 desc ="""Commissioning tools for accelerators
 
 This tool consists of a library which provides:
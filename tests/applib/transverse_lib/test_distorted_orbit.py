@@ -0,0 +1,68 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bact2.applib.transverse_lib import distorted_orbit, distorted_orbit_process
+
+
+class TestResponseMatrix(unittest.TestCase):
+
+    def createTwiss(self, n=200):
+        s = np.linspace(0, 240, n)
+        mux = np.linspace(0, 2 * np.pi * 17.84, n)
+        muy = np.linspace(0, 2 * np.pi * 6.73, n)
+        df = pd.DataFrame(
+            {
+                'id': [f'E{i}' for i in range(n)],
+                's': s,
+                'beta_x': 10 + 5 * np.sin(s / 7.),
+                'mux': mux,
+                'beta_y': 12 + 4 * np.cos(s / 5.),
+                'muy': muy,
+            }
+        )
+        return df
+
+    def test0_Matrix(self):
+        '''Same as orbit distortion for each kicker
+        '''
+        df = self.createTwiss()
+        machine = distorted_orbit_process.machine_info(df, columns=['beta_x', 'mux'])
+        kickers = [3, 50, 121]
+        beta_k = machine.beta[kickers]
+        mu_k = machine.mu[kickers]
+
+        f = distorted_orbit.closed_orbit_response_matrix
+        r = f(machine.beta, machine.mu, tune=machine.Q, beta_k=beta_k, mu_k=mu_k)
+        r_chunked = f(machine.beta, machine.mu, tune=machine.Q, beta_k=beta_k,
+                      mu_k=mu_k, chunk_size=7)
+        self.assertEqual(r.shape, (len(df), len(kickers)))
+        self.assertTrue((r == r_chunked).all())
+
+        for col, (b, m) in enumerate(zip(beta_k, mu_k)):
+            ref = distorted_orbit.closed_orbit_distortion(
+                machine.beta, machine.mu, tune=machine.Q, beta_i=b,
+                theta_i=1, mu_i=m)
+            np.testing.assert_allclose(r[:, col], ref, rtol=1e-12)
+
+    def test1_Twiss(self):
+        df = self.createTwiss()
+        names = ['E50', 'E3']
+        bpm_s = df.s.values[[10, 20, 30]]
+        r = distorted_orbit_process.response_matrix(df, names, bpm_s)
+        self.assertEqual(r.x.shape, (3, 2))
+        self.assertEqual(r.y.shape, (3, 2))
+
+        machine = distorted_orbit_process.machine_info(df, columns=['beta_y', 'muy'])
+        ref = distorted_orbit.closed_orbit_distortion(
+            machine.beta, machine.mu, tune=machine.Q, beta_i=machine.beta[3],
+            theta_i=1, mu_i=machine.mu[3])
+        np.testing.assert_allclose(r.y[:, 1], ref[[10, 20, 30]], rtol=1e-12)
+
+        with self.assertRaises(AssertionError):
+            distorted_orbit_process.response_matrix(df, ['unknown'], bpm_s)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,263 @@
+'''Incremental lattice initialisation without ocelot
+
+The modules of ocelot used by
+:mod:`bact2.applib.transverse_lib.reference_orbit` are replaced by a
+minimal stand-in: a lattice is a sequence of elements, the orbit at
+each bpm is the sum of the quadrupole offsets. It counts how often
+transfer maps and response matrices are computed.
+'''
+import importlib
+import sys
+import tempfile
+import types
+import unittest
+from unittest import mock
+
+import numpy as np
+
+from bact2.applib.transverse_lib.model_cache import ModelCache
+
+
+class _Calls:
+    '''computations made by the stand-in
+    '''
+    lattice_sizes = []
+    response_matrices = 0
+    corrections = 0
+
+    @classmethod
+    def reset(cls):
+        cls.lattice_sizes = []
+        cls.response_matrices = 0
+        cls.corrections = 0
+
+
+class Element:
+    def __init__(self, eid=None, l=0, angle=0, k1=0, **kwargs):
+        self.id = eid
+        self.l = l
+        self.angle = angle
+        self.k1 = k1
+        self.dx = 0.0
+        self.dy = 0.0
+        self.s = 0.0
+
+
+class Hcor(Element):
+    pass
+
+
+class Vcor(Element):
+    pass
+
+
+class XYQuadrupole(Element):
+    pass
+
+
+class Monitor(Element):
+    pass
+
+
+class MagneticLattice:
+    def __init__(self, sequence, method=None):
+        self.sequence = list(sequence)
+        _Calls.lattice_sizes.append(len(self.sequence))
+
+
+class NewOrbit:
+    def __init__(self, lat):
+        self.lat = lat
+        seq = lat.sequence
+        self.hcors = [e for e in seq if isinstance(e, Hcor)]
+        self.vcors = [e for e in seq if isinstance(e, Vcor)]
+        self.bpms = [e for e in seq if isinstance(e, Monitor)]
+        self.response_matrix = None
+
+    def correction(self, **kwargs):
+        assert(self.response_matrix is not None)
+        _Calls.corrections += 1
+
+
+def _orbit(lat):
+    quads = [e for e in lat.sequence if isinstance(e, XYQuadrupole)]
+    return (sum(q.dx * q.k1 for q in quads),
+            sum(q.dy * q.k1 for q in quads))
+
+
+def lattice_track(lat, particle0):
+    x, y = _orbit(lat)
+    return [types.SimpleNamespace(s=float(cnt), x=x, y=y)
+            for cnt in range(len(lat.sequence))]
+
+
+class RingRM:
+    def __init__(self, lattice=None, hcors=None, vcors=None, bpms=None):
+        self.lat = lattice
+        self.bpms = bpms
+        self.particle0 = None
+
+    def read_virtual_orbit(self, p_init=None, write2bpms=False):
+        x, y = _orbit(self.lat)
+        n = len(self.bpms)
+        return np.full(n, x), np.full(n, y)
+
+
+class ResponseMatrix:
+    def __init__(self, method=None):
+        self.method = method
+
+    def calculate(self):
+        _Calls.response_matrices += 1
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    for key, val in attrs.items():
+        setattr(mod, key, val)
+    return mod
+
+
+def _fake_modules():
+    dummy = object
+    cell = [
+        Monitor(eid='BPM1'), Hcor(eid='HS1'), XYQuadrupole(eid='Q1', k1=2.0),
+        Monitor(eid='BPM2'), Vcor(eid='VS1'), XYQuadrupole(eid='Q2', k1=-1.5),
+        Monitor(eid='BPM3'),
+    ]
+    for cnt, element in enumerate(cell):
+        element.s = float(cnt)
+    cpbd = 'ocelot.cpbd'
+    return {
+        'ocelot': _module('ocelot'),
+        cpbd: _module(cpbd),
+        f'{cpbd}.magnetic_lattice': _module(
+            f'{cpbd}.magnetic_lattice', MagneticLattice=MagneticLattice),
+        f'{cpbd}.elements': _module(
+            f'{cpbd}.elements', Hcor=Hcor, Vcor=Vcor,
+            XYQuadrupole=XYQuadrupole),
+        f'{cpbd}.optics': _module(
+            f'{cpbd}.optics', twiss=None, Navigator=dummy, MethodTM=dummy,
+            TransferMap=dummy, SecondTM=dummy),
+        f'{cpbd}.orbit_correction': _module(
+            f'{cpbd}.orbit_correction', NewOrbit=NewOrbit,
+            lattice_track=lattice_track),
+        f'{cpbd}.response_matrix': _module(
+            f'{cpbd}.response_matrix', RingRM=RingRM,
+            ResponseMatrix=ResponseMatrix),
+        f'{cpbd}.track': _module(f'{cpbd}.track', track=None),
+        f'{cpbd}.match': _module(f'{cpbd}.match', closed_orbit=None),
+        f'{cpbd}.beam': _module(
+            f'{cpbd}.beam', ParticleArray=dummy, Particle=dummy, Beam=dummy,
+            Twiss=dummy),
+        'bessy_updated': _module('bessy_updated', cell=cell),
+    }
+
+
+#: modules importing reference_orbit: imported again with the stand-in
+_dependent_modules = (
+    'bact2.applib.transverse_lib.reference_orbit',
+    'bact2.applib.transverse_lib.model_fits',
+    'bact2.applib.bba.model_fits',
+)
+
+
+class TestIncrementalQuadrupole(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls._patch = mock.patch.dict(sys.modules)
+        cls._patch.start()
+        # imports within the packages set these attributes
+        cls._package_attrs = []
+        for name in _dependent_modules:
+            package_name, attr = name.rsplit('.', 1)
+            package = importlib.import_module(package_name)
+            cls._package_attrs.append(
+                (package, attr, getattr(package, attr, None)))
+            sys.modules.pop(name, None)
+        sys.modules.update(_fake_modules())
+
+        cls.reference_orbit = importlib.import_module(_dependent_modules[0])
+        cls.bba_model_fits = importlib.import_module(_dependent_modules[2])
+
+    @classmethod
+    def tearDownClass(cls):
+        cls._patch.stop()
+        for package, attr, value in cls._package_attrs:
+            if value is None:
+                delattr(package, attr)
+            else:
+                setattr(package, attr, value)
+
+    def setUp(self):
+        _Calls.reset()
+        self.orbit = self.reference_orbit.OrbitCalculator()
+        self.n_elements = len(self.orbit.cell)
+        _Calls.reset()
+
+    def test0_Full(self):
+        '''full initialisation: whole lattice and response matrix
+        '''
+        od = self.orbit.orbitCalculatorForChangedQuadrupole(
+            name='Q1', rk1=.05, dx=1e-4)
+        self.assertEqual(_Calls.lattice_sizes, [self.n_elements])
+        self.assertEqual(_Calls.response_matrices, 1)
+        self.assertEqual(_Calls.corrections, 1)
+        np.testing.assert_allclose(od.orbitData().bpm.x, 2.1e-4)
+
+    def test1_Incremental(self):
+        '''only the changed quadrupole's map; its own response matrix
+        '''
+        f = self.orbit.orbitCalculatorForChangedQuadrupole
+        od = f(name='Q1', rk1=.05, dx=1e-4, incremental=True)
+        self.assertEqual(_Calls.lattice_sizes, [1])
+        self.assertEqual(_Calls.response_matrices, 1)
+        self.assertIsNot(od.orb.response_matrix, self.orbit.orb.response_matrix)
+        np.testing.assert_allclose(od.orbitData().bpm.x, 2.1e-4)
+        # the reference lattice is not changed
+        np.testing.assert_allclose(self.orbit.orbitData().bpm.x, 0)
+
+    def test2_ReuseResponse(self):
+        f = self.orbit.orbitCalculatorForChangedQuadrupole
+        od = f(name='Q1', rk1=.05, dx=1e-4, incremental=True,
+               reuse_response_matrix=True)
+        self.assertEqual(_Calls.lattice_sizes, [1])
+        self.assertEqual(_Calls.response_matrices, 0)
+        self.assertEqual(_Calls.corrections, 1)
+        self.assertIs(od.orb.response_matrix, self.orbit.orb.response_matrix)
+
+    def test3_NoCorrection(self):
+        '''no correction: no response matrix required
+        '''
+        f = self.orbit.orbitCalculatorForChangedQuadrupole
+        od = f(name='Q1', rk1=.05, dy=1e-4, correct_orbit=False)
+        self.assertEqual(_Calls.response_matrices, 0)
+        self.assertEqual(_Calls.corrections, 0)
+        self.assertIsNone(od.orb.response_matrix)
+        np.testing.assert_allclose(od.orbitData().bpm.y, 2.1e-4)
+
+        # derived from a lattice without response matrix: computed
+        od2 = od.orbitCalculatorForChangedQuadrupole(
+            name='Q2', dx=1e-4, incremental=True, reuse_response_matrix=True)
+        self.assertEqual(_Calls.response_matrices, 1)
+        self.assertIsNotNone(od2.orb.response_matrix)
+
+    def test4_BBAModel(self):
+        '''quadrupole models of the bba fits are derived incrementally
+        '''
+        with tempfile.TemporaryDirectory() as dir_name:
+            cache = ModelCache(cache_dir=dir_name)
+            processor = self.bba_model_fits.OrbitOffsetProcessor(
+                model_cache=cache)
+            _Calls.reset()
+            for scale in (.01, .02):
+                offset = processor.compute_reference_model(
+                    magnet_name='Q1', scale=scale, dx=1e-4, dy=0)
+        self.assertEqual(_Calls.lattice_sizes, [1, 1])
+        self.assertEqual(_Calls.response_matrices, 0)
+        np.testing.assert_allclose(offset.bpm.x, 2.04e-4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,86 @@
+import io
+import json
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bact2.applib.transverse_lib import json_stream
+from bact2.pandas.dataframe.vector_array import column_to_matrix, is_vector_column
+
+
+class TestJSONStream(unittest.TestCase):
+
+    def createDF(self):
+        n_rows = 9
+        mat = np.arange(n_rows * 4).reshape(n_rows, 4) / 7.0
+        df = pd.DataFrame(
+            {
+                'sc_selected': ['hs1p1d1r'] * 3 + ['hs2p2d3r'] * 3 + ['vs1p1d1r'] * 3,
+                'current': np.linspace(-1, 1, n_rows),
+                'count': np.arange(n_rows),
+                'pos': [list(row) for row in mat],
+                'names': [['a', 'b']] * n_rows,
+            }
+        )
+        df.loc[4, 'current'] = None
+        return df, mat
+
+    def checkTable(self, df, mat):
+        self.assertTrue(is_vector_column(df.pos))
+        # pandas writes 10 significant digits by default
+        np.testing.assert_allclose(column_to_matrix(df.pos), mat, rtol=1e-9)
+        self.assertEqual(df['count'].dtype, np.int64)
+        self.assertTrue(np.isnan(df.current.iat[4]))
+        self.assertEqual(df.names.iat[0], ['a', 'b'])
+
+    def test0_Columns(self):
+        '''default layout of pandas to_json, parsed with small blocks
+        '''
+        df, mat = self.createDF()
+        txt = df.to_json()
+        for block_size in (5, 13, 2**20):
+            r = json_stream.read_json_columns(io.StringIO(txt),
+                                              block_size=block_size)
+            self.checkTable(r, mat)
+            self.assertTrue((r.index == df.index).all())
+
+    def test1_Lines(self):
+        '''json lines split up in chunks of one device
+        '''
+        df, mat = self.createDF()
+        txt = df.to_json(orient='records', lines=True)
+        chunks = list(json_stream.iter_json_lines_chunks(io.StringIO(txt),
+                                                         'sc_selected'))
+        self.assertEqual(len(chunks), 3)
+        for chunk in chunks:
+            self.assertEqual(len(set(chunk.sc_selected)), 1)
+        r = pd.concat(chunks)
+        self.checkTable(r, mat)
+
+    def test2_Promotion(self):
+        '''storage follows the values found later on
+        '''
+        builder = json_stream.ColumnBuilder()
+        for v in [1, 2, 3.5]:
+            builder.append(v)
+        self.assertEqual(builder.finish().dtype, np.float_)
+
+        builder = json_stream.ColumnBuilder()
+        for v in [[1, 2], [1, 2, 3]]:
+            builder.append(v)
+        r = builder.finish()
+        self.assertEqual(r.dtype, np.object_)
+        self.assertTrue((r[1] == [1, 2, 3]).all())
+
+    def test3_NumberSplitAtBlockBorder(self):
+        txt = json.dumps({'a': {'0': 12345.678, '1': -1e-5}})
+        for block_size in range(1, len(txt)):
+            r = json_stream.read_json_columns(io.StringIO(txt),
+                                              block_size=block_size)
+            self.assertEqual(r.a.iat[0], 12345.678)
+            self.assertEqual(r.a.iat[1], -1e-5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,56 @@
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bact2.applib.transverse_lib.kicker_index import KickerIndex
+
+
+def _positions(rows):
+    if isinstance(rows, slice):
+        return list(range(rows.start, rows.stop))
+    return list(rows)
+
+
+class TestKickerIndex(unittest.TestCase):
+
+    def createDF(self):
+        df = pd.DataFrame(
+            {
+                'sc_selected': ['vs1'] * 4 + ['hs1'] * 4 + ['vs1'] * 2,
+                'measurement': [0, 0, 1, 1, 2, 2, 2, 3, 4, 4],
+                'val': np.arange(10),
+            }
+        )
+        return df
+
+    def test0_Select(self):
+        df = self.createDF()
+        index = KickerIndex.from_dataframe(df, 'sc_selected')
+        self.assertEqual(index.names, ['vs1', 'hs1'])
+        self.assertEqual(index.rows('hs1'), slice(4, 8))
+
+        for name in index.names:
+            ref = df.loc[df.sc_selected == name]
+            pd.testing.assert_frame_equal(index.select(df, name), ref)
+
+    def test1_Concat(self):
+        df = self.createDF()
+        index = KickerIndex.from_dataframe(df, 'sc_selected')
+        both = pd.concat([df, df], ignore_index=True)
+        index = KickerIndex.concat([index, index], [len(df), len(df)])
+
+        ref = KickerIndex.from_dataframe(both, 'sc_selected')
+        for name in ref.names:
+            self.assertEqual(_positions(index.rows(name)),
+                             _positions(ref.rows(name)))
+            pd.testing.assert_frame_equal(index.select(both, name),
+                                          ref.select(both, name))
+
+        index = KickerIndex.from_dict(index.to_dict())
+        pd.testing.assert_frame_equal(index.select(both, 'vs1'),
+                                      ref.select(both, 'vs1'))
+
+
+if __name__ == '__main__':
+    unittest.main()
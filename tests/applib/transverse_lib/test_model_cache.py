@@ -0,0 +1,60 @@
+import tempfile
+import unittest
+
+import numpy as np
+
+from bact2.applib.transverse_lib.model_cache import (ModelCache, lattice_hash,
+                                                     make_key)
+
+
+class _Element:
+    def __init__(self, eid, angle):
+        self.id = eid
+        self.angle = angle
+        self.transfer_map = object()
+
+
+class TestModelCache(unittest.TestCase):
+
+    def test0_Key(self):
+        self.assertEqual(make_key('kick', 'HS1', 1e-6),
+                         make_key('kick', 'HS1', np.float64(1e-6)))
+        self.assertNotEqual(make_key('kick', 'HS1', 1e-6),
+                            make_key('kick', 'HS1', 1e-6 * (1 + 1e-15)))
+
+        lattice = [_Element('HS1', 0.0), _Element('HS2', 0.0)]
+        ref = lattice_hash(lattice)
+        self.assertEqual(ref, lattice_hash(lattice))
+        lattice[1].angle = 1e-3
+        self.assertNotEqual(ref, lattice_hash(lattice))
+
+    def test1_Memory(self):
+        cache = ModelCache(cache_dir=False, maxsize=2)
+        for i in range(3):
+            cache.put(make_key(i), {'x': np.arange(i + 1)})
+
+        # least recently used evicted
+        self.assertIsNone(cache.get(make_key(0)))
+        self.assertTrue((cache.get(make_key(2))['x'] == [0, 1, 2]).all())
+
+    def test2_Disk(self):
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return {'x': np.linspace(0, 1, 5), 'y': np.zeros(5)}
+
+        with tempfile.TemporaryDirectory() as dir_name:
+            key = make_key('kick', 'HS1', 1e-6)
+            ModelCache(cache_dir=dir_name).get_or_compute(key, compute)
+
+            # new instance: e.g. another process
+            cache = ModelCache(cache_dir=dir_name)
+            r = cache.get_or_compute(key, compute)
+            self.assertEqual(len(calls), 1)
+            self.assertEqual(cache.disk_hits, 1)
+            self.assertTrue((r['x'] == np.linspace(0, 1, 5)).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
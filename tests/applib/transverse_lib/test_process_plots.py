@@ -0,0 +1,184 @@
+import multiprocessing
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import numpy as np
+import pandas as pd
+
+from bact2.applib.transverse_lib import process_plots, processed_store
+from bact2.applib.transverse_lib.plots_makefile import (kicker_names_of,
+                                                        plot_targets)
+
+try:
+    from bact2.applib.transverse_lib import plots_driver, process_model_fits
+except ImportError:
+    # the model fits require ocelot
+    plots_driver = None
+    process_model_fits = None
+
+
+kicker_names = ['hs1p1d1r', 'vs1p1d1r']
+
+
+class _Processed:
+    '''Mimics the interface of the processed data
+    '''
+    def __init__(self, df):
+        self.dataframe = df
+        self.processed_dataframe = df
+
+
+def write_small_store(dir_name):
+    n_rows = 6
+    df = pd.DataFrame(
+        {
+            'sc_selected': kicker_names * (n_rows // 2),
+            'measurement': np.arange(n_rows) // 2,
+            'dI': np.linspace(-1, 1, n_rows),
+        }
+    )
+    df = df.set_index('measurement', drop=False)
+    store_dir = os.path.join(dir_name, 'store')
+    processed_store.write_store(store_dir, _Processed(df), 'sc_selected')
+    return store_dir
+
+
+class _Recorder:
+    '''Stands in for the plot functions: records its calls
+    '''
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, df, *args, **kwargs):
+        self.calls.append((df, args, kwargs))
+
+
+class TestProcessPlots(unittest.TestCase):
+
+    def test0_KickerNameFromTarget(self):
+        for kind, name, file_name in plot_targets(kicker_names):
+            path = os.path.join('plots', file_name)
+            self.assertEqual(process_plots.kicker_name_from_target(path), name)
+
+    def test0a_KickerNamesOfOldPickles(self):
+        '''in the order measured: file names do not change between runs
+        '''
+        names = ['vs3', 'hs1', 'vs3', 'hs2', 'hs1']
+        df = pd.DataFrame({'sc_selected': names, 'dI': np.zeros(len(names))})
+        # no kicker index
+        r = kicker_names_of(_Processed(df), 'sc_selected')
+        self.assertEqual(r, ['vs3', 'hs1', 'hs2'])
+
+    def test1_ProcessTarget(self):
+        '''plots of the kicker selected from the store
+        '''
+        with tempfile.TemporaryDirectory() as dir_name:
+            store_dir = write_small_store(dir_name)
+            target = os.path.join(dir_name, 'pltm_002_vs1p1d1r_main_y.pdf')
+            name = process_plots.kicker_name_from_target(target)
+            df = processed_store.load_kicker(store_dir, name, 'sc_selected')
+
+            func = _Recorder()
+            process_plots.process_target(df, target, process_kicker_func=func)
+
+        self.assertEqual(len(func.calls), 1)
+        t_df, args, kwargs = func.calls[0]
+        self.assertEqual(set(t_df.sc_selected), {'vs1p1d1r'})
+        self.assertEqual(len(t_df), 3)
+        self.assertEqual(kwargs, {'plot_dir': dir_name,
+                                  'target_file_name': os.path.basename(target)})
+
+
+def _touch_plot(df, plot_dir=None, target_file_name=None):
+    open(os.path.join(plot_dir, target_file_name), 'w').close()
+
+
+def _touch_fit(df, kicker_name, savename=None, **kwargs):
+    open(savename, 'w').close()
+
+
+@unittest.skipIf(process_model_fits is None, 'model fits not available')
+class TestProcessModelFits(unittest.TestCase):
+
+    def test0_ParseTargetName(self):
+        f = process_model_fits.parse_target_name
+        self.assertEqual(f('plots/pltfit_001_hs1p1d1r_1d_x.pdf'),
+                         ('hs1p1d1r', 'x', False))
+        self.assertEqual(f('pltfit_002_vs1p1d1r_2d_y.pdf'),
+                         ('vs1p1d1r', 'y', True))
+        self.assertRaises(AssertionError, f, 'pltfit_002_vs1p1d1r_3d_y.pdf')
+
+    def test1_ProcessTarget(self):
+        '''both coordinates are fitted; the main one to the target
+        '''
+        with tempfile.TemporaryDirectory() as dir_name:
+            store_dir = write_small_store(dir_name)
+            df = processed_store.load_kicker(store_dir, 'hs1p1d1r',
+                                             'sc_selected')
+            target = os.path.join(dir_name, 'pltfit_001_hs1p1d1r_2d_x.pdf')
+
+            func = _Recorder()
+            process_model_fits.process_target(df, target, process_func=func)
+
+        self.assertEqual(len(func.calls), 2)
+        for (t_df, args, kwargs), coordinate in zip(func.calls, 'xy'):
+            self.assertEqual(set(t_df.sc_selected), {'hs1p1d1r'})
+            self.assertEqual(args, ('hs1p1d1r',))
+            self.assertEqual(kwargs['coordinate'], coordinate)
+            self.assertTrue(kwargs['last_2D'])
+        self.assertEqual(func.calls[0][2]['savename'], target)
+        self.assertEqual(
+            func.calls[1][2]['savename'],
+            os.path.join(dir_name, 'pltfit_001_hs1p1d1r_2d_y.pdf'))
+
+
+@unittest.skipIf(plots_driver is None, 'model fits not available')
+class TestPlotsDriver(unittest.TestCase):
+
+    def test0_BuildPlots(self):
+        '''all targets in process; failures are reported
+        '''
+        agnostic = _Recorder()
+
+        def fit(df, kicker_name, **kwargs):
+            raise ValueError('fit failed')
+
+        targets = plot_targets(kicker_names)
+        with tempfile.TemporaryDirectory() as dir_name:
+            store = processed_store.load(write_small_store(dir_name))
+            failed = plots_driver.build_plots(
+                store, dir_name, targets, process_kicker_func=agnostic,
+                process_fit_func=fit, jobs=1)
+
+        fit_targets = [os.path.join(dir_name, file_name)
+                       for kind, name, file_name in targets
+                       if kind != 'agnostic']
+        self.assertEqual(failed, fit_targets)
+        self.assertEqual(len(agnostic.calls), len(kicker_names))
+
+    def test1_SpawnedWorkers(self):
+        '''workers which do not share the memory get the data too
+        '''
+        spawn = multiprocessing.get_context('spawn')
+
+        def get_context(method=None):
+            return spawn
+
+        targets = plot_targets(kicker_names)
+        with tempfile.TemporaryDirectory() as dir_name:
+            store = processed_store.load(write_small_store(dir_name))
+            with mock.patch.object(plots_driver.multiprocessing,
+                                   'get_context', get_context):
+                failed = plots_driver.build_plots(
+                    store, dir_name, targets, process_kicker_func=_touch_plot,
+                    process_fit_func=_touch_fit, jobs=2)
+            self.assertEqual(failed, [])
+            for kind, name, file_name in targets:
+                path = os.path.join(dir_name, file_name)
+                self.assertTrue(os.path.exists(path), path)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from bact2.applib.transverse_lib import processed_store
+from bact2.pandas.dataframe.vector_array import (VectorArray, column_to_matrix,
+                                                 is_vector_column)
+
+
+class _Processed:
+    '''Mimics the interface of the processed data
+    '''
+    def __init__(self, dataframe, processed_dataframe):
+        self.dataframe = dataframe
+        self.processed_dataframe = processed_dataframe
+
+
+class TestColumnStore(unittest.TestCase):
+
+    def createProcessed(self):
+        n_rows = 8
+        mat = np.arange(n_rows * 3, dtype=np.float_).reshape(n_rows, 3)
+        df = pd.DataFrame(
+            {
+                'sc_selected': ['hs1p1d1r', 'vs1p1d1r'] * (n_rows // 2),
+                'measurement': np.arange(n_rows) // 2,
+                'dI': np.linspace(-1, 1, n_rows),
+                'pos': VectorArray(mat),
+                'info': [{'cnt': i} for i in range(n_rows)],
+            }
+        )
+        pdf = df.set_index('measurement', drop=False)
+        return _Processed(df, pdf), mat
+
+    def test0_RoundTrip(self):
+        processed, mat = self.createProcessed()
+        with tempfile.TemporaryDirectory() as dir_name:
+            store_dir = os.path.join(dir_name, 'store')
+            processed_store.write_store(store_dir, processed, 'sc_selected')
+
+            store = processed_store.load(store_dir)
+            self.assertEqual(store.kickers, ['hs1p1d1r', 'vs1p1d1r'])
+
+            df = store.processed_dataframe.sort_index(kind='stable')
+            ref = processed.processed_dataframe.sort_index(kind='stable')
+            pd.testing.assert_frame_equal(df, ref)
+
+    def test1_LoadKicker(self):
+        processed, mat = self.createProcessed()
+        with tempfile.TemporaryDirectory() as dir_name:
+            store_dir = os.path.join(dir_name, 'store')
+            processed_store.write_store(store_dir, processed, 'sc_selected')
+
+            index_name = os.path.join(store_dir,
+                                      processed_store.store_index_name)
+            df = processed_store.load_kicker(index_name, 'vs1p1d1r',
+                                             'sc_selected')
+            self.assertTrue(is_vector_column(df.pos))
+            self.assertTrue((column_to_matrix(df.pos) == mat[1::2]).all())
+            self.assertTrue((df.sc_selected == 'vs1p1d1r').all())
+            self.assertEqual(df.loc[:, 'info'].iat[0], {'cnt': 1})
+
+    def test2_FailedWrite(self):
+        '''no index if a chunk fails; blocks of an old store are removed
+        '''
+        processed, mat = self.createProcessed()
+
+        def chunks():
+            yield processed
+            raise ValueError('conversion failed')
+
+        with tempfile.TemporaryDirectory() as dir_name:
+            store_dir = os.path.join(dir_name, 'store')
+            # an older store with more blocks
+            processed_store.write_store(store_dir, [processed, processed],
+                                        'sc_selected')
+            self.assertTrue(os.path.isdir(os.path.join(store_dir, 'b0003')))
+
+            index_name = os.path.join(store_dir,
+                                      processed_store.store_index_name)
+            with self.assertRaises(ValueError):
+                processed_store.write_store(store_dir, chunks(), 'sc_selected')
+            self.assertFalse(os.path.exists(index_name))
+            self.assertFalse(os.path.exists(os.path.join(store_dir, 'b0003')))
+
+            processed_store.write_store(store_dir, processed, 'sc_selected')
+            store = processed_store.load(store_dir)
+            self.assertEqual(len(store.processed_dataframe), 8)
+            self.assertEqual(sorted(os.listdir(store_dir)),
+                             ['b0000', 'b0001', 'index.json'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import unittest
+
+import numpy as np
+
+try:
+    from bact2.applib.transverse_lib import reference_orbit
+except ImportError:
+    # requires ocelot and the BESSY II lattice
+    reference_orbit = None
+
+
+@unittest.skipIf(reference_orbit is None, 'ocelot lattice not available')
+class TestIncrementalLattice(unittest.TestCase):
+    '''Incremental initialisation gives the orbit of the full one
+    '''
+
+    @classmethod
+    def setUpClass(cls):
+        cls.orbit = reference_orbit.OrbitCalculator()
+
+    def elementName(self, element_type):
+        for element in self.orbit.cell:
+            if isinstance(element, element_type):
+                return element.id
+        raise AssertionError(f'no element of type {element_type}')
+
+    def assertSameOrbit(self, full, incremental):
+        r_full = full.orbitData()
+        r_incremental = incremental.orbitData()
+        for name in ('x', 'y'):
+            np.testing.assert_allclose(getattr(r_incremental.bpm, name),
+                                       getattr(r_full.bpm, name),
+                                       rtol=1e-6, atol=1e-12)
+
+    def test0_Steerer(self):
+        from ocelot.cpbd.elements import Hcor
+        name = self.elementName(Hcor)
+
+        f = self.orbit.orbitCalculatorForChangedMagnet
+        full = f(name=name, angle=1e-4)
+        incremental = f(name=name, angle=1e-4, incremental=True)
+        self.assertIs(incremental.orb.response_matrix,
+                      self.orbit.orb.response_matrix)
+        self.assertSameOrbit(full, incremental)
+
+    def test1_Quadrupole(self):
+        from ocelot.cpbd.elements import XYQuadrupole
+        name = self.elementName(XYQuadrupole)
+
+        f = self.orbit.orbitCalculatorForChangedQuadrupole
+        full = f(name=name, rk1=0.05, dx=1e-4)
+        incremental = f(name=name, rk1=0.05, dx=1e-4, incremental=True)
+        # quadrupole changes the response: not reused
+        self.assertIsNot(incremental.orb.response_matrix,
+                         self.orbit.orb.response_matrix)
+        self.assertSameOrbit(full, incremental)
+
+
+if __name__ == '__main__':
+    unittest.main()
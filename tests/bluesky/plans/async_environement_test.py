@@ -0,0 +1,128 @@
+from bluesky import RunEngine
+from bact2.bluesky.plans.environement import Environment
+from bact2.bluesky.plans.async_environement import (
+    run_environement, run_environements)
+from bact2.ophyd.devices.sim import (
+    BPMIOCSimulator, SimBPMStorageRing, SimSteerer, SimulatedOrbit)
+import asyncio
+import numpy as np
+import unittest
+
+
+class OrbitEnvironment(Environment):
+    '''steerer current as action, its bpm reading as state
+    '''
+    def __init__(self, *args, bpm_index=0, **kws):
+        super().__init__(*args, **kws)
+        self.bpm_index = bpm_index
+
+    def storeInitialState(self, dic):
+        self.state_to_reset_to = [
+            dic[m.setpoint.name]['value'] for m in self.state_motors
+        ]
+
+    def getStateToResetTo(self):
+        return self.state_to_reset_to
+
+    def computeState(self, dic):
+        x = dic['bpm_waveform_x_pos']['value'][self.bpm_index]
+        current = dic[self.motors[0].setpoint.name]['value']
+        return np.array([x, current])
+
+    def computeRewardTerminal(self, dic):
+        x, current = self.computeState(dic)
+        return -abs(x), False
+
+
+class TestAsyncEnvironment(unittest.TestCase):
+
+    def setUp(self):
+        self.bpm = SimBPMStorageRing(name='bpm')
+        n_bpms = len(self.bpm.waveform.indices.get())
+        self.orbit = SimulatedOrbit.forRing(n_bpms, ['HS1', 'HS2'], seed=1,
+                                            noise=1e-5)
+        self.envs = []
+        for cnt, name in enumerate(('HS1', 'HS2')):
+            steerer = SimSteerer(name=name.lower(), slew_rate=1000, tick=1e-3,
+                                 settle_time=0)
+            steerer.connectOrbit(self.orbit, name)
+            env = OrbitEnvironment(detectors=[self.bpm, steerer],
+                                   motors=[steerer], state_motors=[steerer],
+                                   bpm_index=cnt)
+            self.envs.append(env)
+
+        self.ioc = BPMIOCSimulator(self.bpm.waveform, self.orbit, rate=100)
+        self.ioc.start()
+        self.RE = RunEngine({})
+        self.docs = []
+        self.RE.subscribe(lambda name, doc: self.docs.append(name))
+
+    def tearDown(self):
+        self.ioc.stop()
+
+    def test0_Coroutine(self):
+        env = self.envs[0]
+        loops = []
+
+        async def agent():
+            loops.append(asyncio.get_running_loop())
+            await env.setupAsync()
+            await env.resetAsync()
+            for action in (.1, .2):
+                state, reward, done, info = await env.stepAsync(action)
+            env.done()
+            return state
+
+        state = self.RE(run_environement(env, agent))
+        # run on the loop of the run engine
+        self.assertIs(loops[0], self.RE.loop)
+        self.assertEqual(self.docs.count('event'), 4)
+        self.assertAlmostEqual(self.orbit.current('HS1'), .2)
+
+    def test1_Shared(self):
+        '''two agents stepping their environments on one loop
+        '''
+        def make_agent(env, actions):
+            async def agent():
+                await env.setupAsync()
+                for action in actions:
+                    await env.stepAsync(action)
+                env.done()
+                return len(actions)
+            return agent
+
+        agents = [make_agent(self.envs[0], [.1, .2, .3]),
+                  make_agent(self.envs[1], [-.1])]
+        self.RE(run_environements(self.envs, agents))
+        self.assertEqual(self.docs.count('event'), 6)
+        self.assertAlmostEqual(self.orbit.current('HS1'), .3)
+        self.assertAlmostEqual(self.orbit.current('HS2'), -.1)
+
+    def test2_Thread(self):
+        '''an agent which is not a coroutine uses the blocking methods
+        '''
+        env = self.envs[0]
+
+        def agent():
+            env.setup()
+            env.step(.1)
+            env.done()
+
+        self.RE(run_environement(env, agent))
+        self.assertEqual(self.docs.count('event'), 2)
+        self.assertAlmostEqual(self.orbit.current('HS1'), .1)
+
+    def test3_AgentFails(self):
+        env = self.envs[0]
+
+        async def agent():
+            await env.setupAsync()
+            raise ValueError('agent failed')
+
+        with self.assertRaises(ValueError):
+            self.RE(run_environement(env, agent))
+        self.assertEqual(self.docs.count('stop'), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,77 @@
+from bluesky import RunEngine, plan_stubs as bps, preprocessors as bpp
+from ophyd.sim import SynAxis
+from bact2.bluesky.plans.command_timing import CommandTiming
+from bact2.bluesky.plans.environement import Environment
+from bact2.bluesky.plans.async_environement import run_environement
+import time
+import unittest
+
+
+class AxisEnvironment(Environment):
+    def storeInitialState(self, dic):
+        pass
+
+    def computeState(self, dic):
+        return dic['axis']['value']
+
+    def computeRewardTerminal(self, dic):
+        return 0, False
+
+
+class TestCommandTiming(unittest.TestCase):
+
+    def setUp(self):
+        self.axis = SynAxis(name='axis', delay=0.05)
+        self.RE = RunEngine({})
+
+    def test0_Phases(self):
+        timing = CommandTiming()
+        axis = self.axis
+
+        def cmd():
+            yield from bps.mv(axis, 1)
+            r = (yield from bps.trigger_and_read([axis]))
+            return r
+
+        for i in range(2):
+            timed_cmd, record = timing.wrap(cmd)
+            self.RE(bpp.run_wrapper(timed_cmd()))
+            timing.received(record)
+            time.sleep(0.02)
+
+        # no think time before the first command
+        self.assertEqual(timing.histograms['think'].count, 1)
+        self.assertGreaterEqual(timing.last['think'], 0.02)
+        self.assertGreaterEqual(timing.last['move'], 0.05)
+        self.assertLess(timing.last['measure'], timing.last['move'])
+        self.assertAlmostEqual(timing.last['execute'],
+                               timing.last['move'] + timing.last['measure'])
+
+        summary = timing.summary()
+        self.assertEqual(summary['counts']['received'], 2)
+        self.assertEqual(summary['move']['count'], 2)
+        self.assertAlmostEqual(sum(summary['shares'].values()), 1)
+
+    def test1_Stream(self):
+        env = AxisEnvironment(detectors=[self.axis], motors=[self.axis],
+                              state_motors=[self.axis],
+                              timing_stream_name='timing')
+
+        async def agent():
+            await env.setupAsync()
+            for action in (.1, .2):
+                await env.stepAsync(action)
+            env.done()
+
+        docs = []
+        self.RE(run_environement(env, agent),
+                lambda name, doc: docs.append((name, doc)))
+
+        streams = [doc['name'] for name, doc in docs if name == 'descriptor']
+        self.assertEqual(sorted(streams), ['primary', 'timing'])
+        self.assertEqual(env.timing.n_received, 3)
+        self.assertEqual(env.timing.histograms['execute'].count, 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+from bluesky import RunEngine, plan_stubs as bps
+from bact2.bluesky.plans.executor import execute_plan_stub
+from bact2.bluesky.plans.threaded_environement import setup_threaded_executor
+import functools
+import threading
+import unittest
+
+
+class TestSubmitFuture(unittest.TestCase):
+
+    def setUp(self):
+        self.executor = setup_threaded_executor(max_in_flight=3)
+        self.futures = []
+        self.in_flight = []
+
+    def command(self, val, fail=False):
+        self.in_flight.append(len([f for f in self.futures if not f.done()]))
+        yield from bps.sleep(0.01)
+        if fail:
+            raise ValueError(f'command {val} failed')
+        return val
+
+    def run_agent(self, cmds):
+        def agent():
+            try:
+                for cmd in cmds:
+                    self.futures.append(self.executor.submitFuture(cmd))
+                for fut in self.futures:
+                    try:
+                        fut.result(2)
+                    except ValueError:
+                        pass
+            finally:
+                self.executor.stopCommandExecution()
+
+        thread = threading.Thread(target=agent)
+        thread.start()
+        try:
+            RunEngine({})(execute_plan_stub(self.executor))
+        finally:
+            thread.join()
+
+    def test0_InOrder(self):
+        cmds = [functools.partial(self.command, i) for i in range(6)]
+        self.run_agent(cmds)
+        self.assertEqual([f.result() for f in self.futures], list(range(6)))
+        self.assertLessEqual(max(self.in_flight), 3)
+        # the next command was submitted before the previous one finished
+        self.assertGreater(max(self.in_flight), 1)
+
+    def test1_Failure(self):
+        '''commands submitted after the failing one are not executed
+        '''
+        cmds = [functools.partial(self.command, 0),
+                functools.partial(self.command, 1, fail=True),
+                functools.partial(self.command, 2)]
+        self.run_agent(cmds)
+        self.assertEqual(self.futures[0].result(), 0)
+        self.assertIsInstance(self.futures[1].exception(), ValueError)
+        self.assertIsNotNone(self.futures[2].exception())
+        self.assertEqual(len(self.in_flight), 2)
+
+    def test2_FailureFullWindow(self):
+        '''submitting into a full window after a failure raises the
+        original error; no command is left pending
+        '''
+        self.executor = setup_threaded_executor(max_in_flight=2)
+        errors = []
+
+        def agent():
+            try:
+                for i in range(8):
+                    cmd = functools.partial(self.command, i, fail=(i == 0))
+                    self.futures.append(self.executor.submitFuture(cmd))
+            except Exception as exc:
+                errors.append(exc)
+            finally:
+                self.executor.stopCommandExecution()
+
+        thread = threading.Thread(target=agent)
+        thread.start()
+        try:
+            RunEngine({})(execute_plan_stub(self.executor))
+        finally:
+            thread.join(5)
+        self.assertFalse(thread.is_alive())
+
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], ValueError)
+        self.assertTrue(self.executor.state.is_failed)
+        for fut in self.futures:
+            self.assertIsInstance(fut.exception(0), ValueError)
+
+
+if __name__ == '__main__':
+    unittest.main()
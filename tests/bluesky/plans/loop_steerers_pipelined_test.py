@@ -0,0 +1,107 @@
+from bluesky import RunEngine
+from bact2.bluesky.plans.loop_steerers_pipelined import loop_steerers_pipelined
+from bact2.ophyd.devices.sim import (
+    BPMIOCSimulator, SimBPMStorageRing, SimSteererCollection, SimulatedOrbit)
+from bact2.ophyd.devices.raw.steerers import (
+    all_steerers, horizontal_steerer_names, vertical_steerer_names)
+from bact2.ophyd.devices.utils.book_keeping_dev import Bookkeeping
+import numpy as np
+import time
+import unittest
+
+
+class TestLoopSteerersPipelined(unittest.TestCase):
+
+    def setUp(self):
+        self.bpm = SimBPMStorageRing(name='bpm')
+        n_bpms = len(self.bpm.waveform.indices.get())
+        self.orbit = SimulatedOrbit.forRing(n_bpms, all_steerers, seed=1,
+                                            noise=1e-5)
+        self.col = SimSteererCollection(name='sc')
+        self.col.connectOrbit(self.orbit)
+        self.col.setSettleTime(0.0)
+
+        self.names = horizontal_steerer_names[:2] + vertical_steerer_names[:1]
+        self.offsets = {}
+        for cnt, name in enumerate(self.names):
+            steerer = getattr(self.col.steerers, name)
+            steerer.slew_rate = 1000.0
+            steerer.tick = 1e-3
+            offset = 0.1 * (cnt + 1)
+            steerer.set(offset).wait(2)
+            self.offsets[name] = offset
+
+        self.ioc = BPMIOCSimulator(self.bpm.waveform, self.orbit, rate=100)
+        self.ioc.start()
+
+    def tearDown(self):
+        self.ioc.stop()
+
+    def run_plan(self, **kws):
+        docs = []
+        moves = []
+        for name in self.names:
+            steerer = getattr(self.col.steerers, name)
+            steerer.setpoint.subscribe(
+                lambda value=None, obj=None, **kw: moves.append(
+                    (obj.name, value, time.monotonic())),
+                run=False)
+
+        RE = RunEngine({})
+        RE.subscribe(lambda name, doc: docs.append((name, doc)))
+        RE(loop_steerers_pipelined(
+            [self.bpm], self.col, num_readings=2,
+            horizontal_steerer_names=self.names[:2],
+            vertical_steerer_names=self.names[2:],
+            current_val_horizontal=0.05, current_val_vertical=0.02,
+            current_steps=[0, 1, -1], scale_factors={self.names[0]: 2},
+            n_hysteresis_loops=1, book_keeping_dev=Bookkeeping(name='bk_dev'),
+            **kws))
+        return docs, moves
+
+    def checkRun(self, docs, moves):
+        events = [doc for name, doc in docs if name == 'event']
+        # reference orbit and 3 steps, 2 readings each
+        self.assertEqual(len(events), len(self.names) * 4 * 2)
+
+        for name, offset in self.offsets.items():
+            steerer = getattr(self.col.steerers, name)
+            self.assertAlmostEqual(steerer.readback.get(), offset)
+
+        # hysteresis loop of the first (scaled) steerer
+        first = getattr(self.col.steerers, self.names[0])
+        offset = self.offsets[self.names[0]]
+        t_moves = [val for name, val, t in moves if name == first.setpoint.name]
+        np.testing.assert_allclose(t_moves[:3],
+                                   [offset + .1, offset - .1, offset])
+
+    def timeToNextSteerer(self, moves):
+        '''time from setting back the vertical steerer to the first
+        move of the next one
+
+        The vertical steerers are measured first.
+        '''
+        vertical = getattr(self.col.steerers, self.names[2]).setpoint.name
+        following = getattr(self.col.steerers, self.names[0]).setpoint.name
+        names = [name for name, val, t in moves]
+        last_vertical = len(names) - 1 - names[::-1].index(vertical)
+        self.assertEqual(names[last_vertical + 1], following)
+        return moves[last_vertical + 1][2] - moves[last_vertical][2]
+
+    def test0_Overlap(self):
+        '''the hysteresis loop starts while the previous steerer settles
+        '''
+        getattr(self.col.steerers, self.names[2]).settle_time = 0.5
+        docs, moves = self.run_plan()
+        self.checkRun(docs, moves)
+        self.assertLess(self.timeToNextSteerer(moves), 0.4)
+
+    def test1_Serial(self):
+        getattr(self.col.steerers, self.names[2]).settle_time = 0.5
+        docs, moves = self.run_plan(overlap=False)
+        self.checkRun(docs, moves)
+        self.assertGreaterEqual(self.timeToNextSteerer(moves), 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
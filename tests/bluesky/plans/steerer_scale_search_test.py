@@ -0,0 +1,129 @@
+from bluesky import RunEngine, plan_stubs as bps
+from bact2.bluesky.plans.loop_steerers import (
+    loop_steerers, steerer_scale_search_step, steerer_setpoint_limits)
+from bact2.math.proportional_root import GainCache
+from bact2.ophyd.devices.sim import (
+    BPMIOCSimulator, SimBPMStorageRing, SimSteererCollection, SimulatedOrbit)
+from bact2.ophyd.devices.raw.steerers import (
+    all_steerers, horizontal_steerer_names, vertical_steerer_names)
+from bact2.ophyd.devices.utils.book_keeping_dev import Bookkeeping
+import logging
+import unittest
+
+
+class TestSteererScaleSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.bpm = SimBPMStorageRing(name='bpm')
+        n_bpms = len(self.bpm.waveform.indices.get())
+        self.orbit = SimulatedOrbit.forRing(n_bpms, all_steerers, seed=1,
+                                            noise=1e-5)
+        self.col = SimSteererCollection(name='sc')
+        self.col.connectOrbit(self.orbit)
+        self.col.setSettleTime(0.0)
+
+        self.names = horizontal_steerer_names[:1] + vertical_steerer_names[:1]
+        for name in self.names:
+            steerer = getattr(self.col.steerers, name)
+            steerer.slew_rate = 1000.0
+            steerer.tick = 1e-3
+
+        self.ioc = BPMIOCSimulator(self.bpm.waveform, self.orbit, rate=100)
+        self.ioc.start()
+
+    def tearDown(self):
+        self.ioc.stop()
+
+    def run_plan(self, cache, dr_target):
+        bk_dev = Bookkeeping(name='bk_dev')
+        modes = []
+        scales = []
+
+        def cb(name, doc):
+            if name != 'event':
+                return
+            data = doc['data']
+            modes.append(data['bk_dev_mode'])
+            if data['bk_dev_mode'] == 'store_data':
+                scale = data['bk_dev_scale_factor']
+                if scale not in scales:
+                    scales.append(scale)
+
+        RE = RunEngine({})
+        RE(loop_steerers([self.bpm], self.col, num_readings=2,
+                         horizontal_steerer_names=self.names[:1],
+                         vertical_steerer_names=self.names[1:],
+                         current_val_horizontal=.05, current_val_vertical=.05,
+                         book_keeping_dev=bk_dev, scale_cache=cache,
+                         dr_target=dr_target, logger=logging.getLogger('bact2')),
+           cb)
+        return modes, scales
+
+    def test0_ModelGain(self):
+        '''gain of the model: one evaluation per steerer
+        '''
+        # the collection addresses the steerers by lower case names
+        names = [name.lower() for name in all_steerers]
+        cache = GainCache.fromResponse(names, self.orbit.response_x,
+                                       self.orbit.response_y)
+        dr_target = 0.05
+        modes, scales = self.run_plan(cache, dr_target)
+
+        # one evaluation of 2 readings per steerer
+        self.assertEqual(modes.count('searching_scale'), 2 * 2)
+
+        # vertical steerers first
+        for name, scale in zip(self.names[::-1], scales):
+            gain = cache.model_gains[name]
+            self.assertAlmostEqual(cache.measured_gains[name], gain,
+                                   delta=.1 * gain)
+            self.assertAlmostEqual(scale, dr_target / gain / .05)
+
+    def test1_MeasuredGain(self):
+        '''no model: the gain found in the first run is reused
+        '''
+        cache = GainCache()
+        modes, scales = self.run_plan(cache, 0.05)
+        self.assertLessEqual(modes.count('searching_scale'), 2 * 2 * 3)
+        self.assertEqual(sorted(cache.measured_gains), sorted(self.names))
+
+        modes, scales = self.run_plan(cache, 0.05)
+        self.assertEqual(modes.count('searching_scale'), 2 * 2)
+
+    def test2_LimitsOfSelectedSteerer(self):
+        '''searched through the collection: limited to the steerer's limits
+        '''
+        name = self.names[0]
+        steerer = getattr(self.col.steerers, name)
+        low, high = steerer.setpoint.limits
+        # far too small: the predicted current is beyond the limits
+        cache = GainCache({name: 1e-6})
+        setpoints = []
+        steerer.setpoint.subscribe(
+            lambda value=None, **kws: setpoints.append(value), run=False)
+
+        results = []
+
+        def plan():
+            yield from bps.open_run()
+            yield from bps.mv(self.col, name)
+            proxy = self.col.sel.dev
+            self.assertEqual(tuple(steerer_setpoint_limits(proxy)),
+                             (low, high))
+            r = yield from steerer_scale_search_step(
+                proxy, .05, [self.bpm], 1, dr_target=0.05, current_offset=0.0,
+                book_keeping_dev=Bookkeeping(name='bk_dev'), scale_cache=cache,
+                steerer_name=name, logger=logging.getLogger('bact2'))
+            results.append(r)
+            yield from bps.close_run()
+
+        RunEngine({})(plan())
+
+        self.assertEqual(max(setpoints), high)
+        root, total_scale = results[0]
+        self.assertIsInstance(root, float)
+        self.assertAlmostEqual(total_scale, root / .05)
+
+
+if __name__ == '__main__':
+    unittest.main()
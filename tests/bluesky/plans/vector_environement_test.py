@@ -0,0 +1,105 @@
+from bluesky import RunEngine
+from bact2.bluesky.plans.environement import Environment
+from bact2.bluesky.plans.threaded_environement import run_environement
+from bact2.bluesky.plans.vector_environement import VectorEnvironment
+from bact2.ophyd.devices.sim import (
+    BPMIOCSimulator, SimBPMStorageRing, SimSteerer, SimulatedOrbit)
+import numpy as np
+import unittest
+
+
+class OrbitEnvironment(Environment):
+    '''steerer current as action, its bpm reading as state
+    '''
+    def __init__(self, *args, bpm_index=0, **kws):
+        super().__init__(*args, **kws)
+        self.bpm_index = bpm_index
+
+    def storeInitialState(self, dic):
+        self.state_to_reset_to = [
+            dic[m.setpoint.name]['value'] for m in self.state_motors
+        ]
+
+    def getStateToResetTo(self):
+        return self.state_to_reset_to
+
+    def computeState(self, dic):
+        x = dic['bpm_waveform_x_pos']['value'][self.bpm_index]
+        current = dic[self.motors[0].setpoint.name]['value']
+        return np.array([x, current])
+
+    def computeRewardTerminal(self, dic):
+        x, current = self.computeState(dic)
+        return -abs(x), current > 0.15
+
+
+class TestVectorEnvironment(unittest.TestCase):
+
+    def setUp(self):
+        self.bpm = SimBPMStorageRing(name='bpm')
+        n_bpms = len(self.bpm.waveform.indices.get())
+        self.orbit = SimulatedOrbit.forRing(n_bpms, ['HS1', 'HS2'], seed=1,
+                                            noise=1e-5)
+        self.steerers = []
+        for name in ('HS1', 'HS2'):
+            steerer = SimSteerer(name=name.lower(), slew_rate=1000, tick=1e-3,
+                                 settle_time=0)
+            steerer.connectOrbit(self.orbit, name)
+            self.steerers.append(steerer)
+
+        self.ioc = BPMIOCSimulator(self.bpm.waveform, self.orbit, rate=100)
+        self.ioc.start()
+
+    def tearDown(self):
+        self.ioc.stop()
+
+    def test0_Step(self):
+        envs = [
+            OrbitEnvironment(detectors=[self.bpm, steerer], motors=[steerer],
+                             state_motors=[steerer], bpm_index=cnt)
+            for cnt, steerer in enumerate(self.steerers)
+        ]
+        venv = VectorEnvironment(envs)
+        # the bpm is read only once
+        self.assertEqual(len(venv.detectors), 3)
+
+        result = {}
+
+        def agent():
+            venv.setup()
+            result['reset'] = venv.reset()
+            self.assertRaises(AssertionError, venv.flattenActions, [[.1]])
+            steps = []
+            for action in ([.1, -.1], [.2, .05]):
+                steps.append(venv.step([[a] for a in action]))
+            result['steps'] = steps
+            venv.done()
+
+        docs = []
+        RE = RunEngine({})
+        RE.subscribe(lambda name, doc: docs.append(name))
+        RE(run_environement(venv, agent))
+
+        # setup, reset and two steps: one reading each
+        self.assertEqual(docs.count('event'), 4)
+        self.assertEqual(result['reset'].shape, (2, 2))
+
+        states, rewards, dones, infos = result['steps'][-1]
+        self.assertEqual(states.shape, (2, 2))
+        np.testing.assert_allclose(states[:, 1], [.2, .05])
+        np.testing.assert_array_equal(dones, [True, False])
+        self.assertEqual(len(infos), 2)
+        self.assertEqual(self.orbit.current('HS1'), .2)
+
+    def test1_SharedMotors(self):
+        steerer = self.steerers[0]
+        envs = [
+            OrbitEnvironment(detectors=[self.bpm], motors=[steerer],
+                             state_motors=[steerer])
+            for i in range(2)
+        ]
+        self.assertRaises(AssertionError, VectorEnvironment, envs)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,63 @@
+from bact2.math.proportional_root import (
+    GainCache, fit_gain, proportional_root_search)
+import numpy as np
+import unittest
+
+
+def run_search(func, *args, **kws):
+    search = proportional_root_search(*args, **kws)
+    x = next(search)
+    try:
+        while True:
+            x = search.send(func(x))
+    except StopIteration as stop:
+        return stop.value
+
+
+class TestProportionalRoot(unittest.TestCase):
+
+    def test0_KnownGain(self):
+        '''exact prior: one evaluation
+        '''
+        r = run_search(lambda x: 2.0 * abs(x), 1.0, .1, gain=2.0)
+        self.assertTrue(r.converged)
+        self.assertEqual(r.n_evaluations, 1)
+        self.assertAlmostEqual(r.root, .5)
+
+    def test1_WrongGain(self):
+        '''prior 30 % off: the refit gain finds the root
+        '''
+        r = run_search(lambda x: 2.0 * abs(x), 1.0, .1, gain=1.4, eps_rel=.01)
+        self.assertTrue(r.converged)
+        self.assertEqual(r.n_evaluations, 2)
+        self.assertAlmostEqual(r.gain, 2.0)
+
+    def test2_Cautious(self):
+        '''no prior and a small start: steps limited by max_ratio
+        '''
+        r = run_search(lambda x: abs(x), 10.0, -.1, max_ratio=5,
+                       max_evaluations=2)
+        self.assertFalse(r.converged)
+        np.testing.assert_allclose(r.x, [-.1, -.5])
+        # predicted from the fitted gain
+        self.assertAlmostEqual(r.root, -2.5)
+
+    def test3_Limit(self):
+        r = run_search(lambda x: abs(x), 10.0, 1.0, gain=1.0, x_max=3,
+                       max_evaluations=1)
+        self.assertEqual(r.x, [3])
+
+    def test4_Cache(self):
+        resp_x = np.array([[1.0, 0.0], [-2.0, 0.5]])
+        resp_y = np.array([[0.0, 0.0], [0.0, 1.2]])
+        cache = GainCache.fromResponse(['a', 'b'], resp_x, resp_y)
+        self.assertAlmostEqual(cache.gain('a'), 2.0)
+        self.assertAlmostEqual(cache.gain('b'), 1.3)
+        self.assertIsNone(cache.gain('c'))
+        cache.update('a', 3.0)
+        self.assertEqual(cache.gain('a'), 3.0)
+        self.assertAlmostEqual(fit_gain([1, -2], [2, 4]), 2.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
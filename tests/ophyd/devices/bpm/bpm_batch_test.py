@@ -0,0 +1,88 @@
+from bact2.ophyd.devices.pp.bpm.bpm_batch import (
+    BPMWaveformBatch, ReadingBatch)
+from bact2.ophyd.devices.pp.bpm.bpm_packed_data import (
+    PackedDataDecoder, ScaledDataConverter)
+from bact2.ophyd.devices.sim import BPMIOCSimulator, SimulatedOrbit
+from ophyd import Component as Cpt, Kind, Signal
+import numpy as np
+import unittest
+
+
+class TestReadingBatch(unittest.TestCase):
+
+    n_valid = 10
+
+    def createPackedData(self, n_columns=16, seed=0):
+        rng = np.random.RandomState(seed)
+        data = rng.normal(size=8 * n_columns)
+        unused = np.zeros(8 * n_columns)
+        return np.concatenate([data, unused])
+
+    def test0_Collect(self):
+        n_readings = 4
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid, n_buffers=2)
+        converter = ScaledDataConverter((2.0, 0.5, 1.0), (1.0, 0.0, 4.0))
+        batch = ReadingBatch(n_readings, converter)
+
+        xs = []
+        for cnt in range(n_readings):
+            data = decoder.decode(self.createPackedData(seed=cnt))
+            xs.append(data.x / 2.0 - 0.5)
+            complete = batch.add(data, timestamp=10.0 + cnt, counter=cnt + 1)
+            self.assertEqual(complete, cnt == n_readings - 1)
+
+        self.assertTrue(batch.complete)
+        self.assertRaises(AssertionError, batch.add, data, 20.0, 10)
+
+        xs = np.array(xs)
+        # decoder buffers were reused: batch holds copies
+        np.testing.assert_allclose(batch.stacked('x'), xs)
+        np.testing.assert_allclose(batch.mean('x'), xs.mean(axis=0))
+        np.testing.assert_allclose(batch.std('x'), xs.std(axis=0))
+        self.assertTrue((batch.stacked('counter') == [1, 2, 3, 4]).all())
+        self.assertEqual(batch.stacked('x').shape, (n_readings, 16))
+
+
+class SimBPMWaveformBatch(BPMWaveformBatch):
+    packed_data = Cpt(Signal, name='packed_data', value=[])
+    counter = Cpt(Signal, name='counter', value=0)
+    ready = Cpt(Signal, name='ready', value=1)
+
+
+class TestBPMWaveformBatch(unittest.TestCase):
+
+    def setUp(self):
+        self.waveform = SimBPMWaveformBatch(name='bpm_waveform')
+        n_bpms = len(self.waveform.indices.get())
+        orbit = SimulatedOrbit.forRing(n_bpms, ['HS1'], seed=1)
+        self.ioc = BPMIOCSimulator(self.waveform, orbit, early_probability=1,
+                                   duplicate_probability=1)
+
+    def test0_SkipEarlyAndDuplicates(self):
+        n_readings = 3
+        self.waveform.n_readings.put(n_readings)
+        status = self.waveform.trigger()
+        for cnt in range(n_readings):
+            self.assertFalse(status.done)
+            self.ioc.update()
+        status.wait(1)
+
+        counters = self.waveform.batch_counter.get()
+        self.assertEqual(list(counters), [1, 2, 3])
+
+    def test1_ModeAppliedOnStage(self):
+        waveform = self.waveform
+        waveform.summary_only.put(True)
+        waveform.trigger()
+        self.assertEqual(waveform.batch_x.kind, Kind.normal)
+
+        waveform.stage()
+        try:
+            self.assertEqual(waveform.batch_x.kind, Kind.omitted)
+            self.assertNotIn('bpm_waveform_batch_x', waveform.read())
+        finally:
+            waveform.unstage()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+from bact2.ophyd.devices.pp.bpm.bpm import BPMChannel
+from bact2.ophyd.devices.pp.bpm.bpm_history import BPMHistory
+from bact2.ophyd.devices.pp.bpm.bpm_packed_data import ScaledDataConverter
+from bact2.ophyd.devices.utils.ring_buffer import RingBuffer
+from ophyd import Component as Cpt, Device
+import numpy as np
+import unittest
+
+
+class TestRingBuffer(unittest.TestCase):
+
+    def test0_Wrap(self):
+        buf = RingBuffer(4)
+        data = np.arange(7 * 3, dtype=np.float_).reshape(7, 3)
+        for cnt, row in enumerate(data):
+            buf.append(t=cnt, x=row)
+
+        self.assertEqual(len(buf), 4)
+        self.assertTrue((buf.ordered('x') == data[-4:]).all())
+        self.assertTrue((buf.ordered('t', 2) == [5, 6]).all())
+        self.assertTrue((buf.last('x') == data[-1]).all())
+
+        for n in (None, 1, 3):
+            ref = data[-(n or 4):]
+            np.testing.assert_allclose(buf.mean('x', n), ref.mean(axis=0))
+            np.testing.assert_allclose(buf.std('x', n), ref.std(axis=0))
+            self.assertTrue((buf.min('x', n) == ref.min(axis=0)).all())
+            self.assertTrue((buf.max('x', n) == ref.max(axis=0)).all())
+
+
+class _Waveform(Device):
+    SUB_DECODED = 'decoded'
+
+    x = Cpt(BPMChannel, 'x')
+    y = Cpt(BPMChannel, 'y')
+
+    def scaleData(self, data, out=None):
+        converter = ScaledDataConverter(self.x.channelScale(),
+                                        self.y.channelScale())
+        return converter.convert(data, out=out)
+
+    def emit(self, data, timestamp):
+        self._run_subs(sub_type=self.SUB_DECODED, data=data,
+                       timestamp=timestamp)
+
+
+class TestBPMHistory(unittest.TestCase):
+
+    def test0_Record(self):
+        waveform = _Waveform(name='wf')
+        waveform.x.bit_gain.put(1.0)
+        waveform.y.bit_gain.put(1.0)
+        waveform.x.gain.put(2.0)
+        waveform.y.offset.put(1.0)
+
+        hist = BPMHistory(name='hist', waveform=waveform)
+        hist.max_readings.put(3)
+        hist.stage()
+
+        n_bpm = 5
+        for cnt in range(5):
+            raw = np.full(n_bpm, float(cnt))
+            data = {'x_pos_raw': raw, 'y_pos_raw': raw, 'x_rms_raw': raw,
+                    'y_rms_raw': raw, 'stat': np.zeros(n_bpm, np.int_)}
+            waveform.emit(data, timestamp=cnt)
+
+        hist.trigger()
+        hist.unstage()
+        self.assertEqual(hist.n_readings.get(), 3)
+        np.testing.assert_allclose(hist.x_mean.get(), np.full(n_bpm, 3 / 2.))
+        np.testing.assert_allclose(hist.y_max.get(), np.full(n_bpm, 4 - 1.))
+        self.assertTrue((hist.buffer.ordered('time') == [2, 3, 4]).all())
+
+        # not recording any more
+        waveform.emit(data, timestamp=10)
+        self.assertEqual(len(hist.buffer), 3)
+
+
+if __name__ == '__main__':
+    unittest.main()
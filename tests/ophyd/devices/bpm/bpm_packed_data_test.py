@@ -0,0 +1,144 @@
+from bact2.ophyd.devices.pp.bpm.bpm_packed_data import (
+    PackedDataDecoder, ScaledDataConverter, packed_data_names,
+    packed_data_to_named_array, raw_to_scaled_data,
+    raw_to_scaled_data_channel)
+from bact2.ophyd.devices.utils import process_vector
+import numpy as np
+import unittest
+
+
+class TestPackedDataDecoder(unittest.TestCase):
+
+    n_valid = 10
+
+    def createPackedData(self, n_columns=16, seed=0):
+        rng = np.random.RandomState(seed)
+        data = rng.normal(size=8 * n_columns)
+        unused = np.zeros(8 * n_columns)
+        unused[:self.n_valid] = rng.normal(size=self.n_valid)
+        return np.concatenate([data, unused])
+
+    def test0_SameAsNamedArray(self):
+        indices = np.array([3, 0, 7, 8, 15])
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid, indices=indices)
+
+        for seed in range(3):
+            packed = self.createPackedData(seed=seed)
+            ref = packed_data_to_named_array(packed, n_valid_items=self.n_valid,
+                                             indices=indices)
+            data = decoder.decode(packed)
+            for name in packed_data_names:
+                self.assertTrue((data[name] == ref[name]).all())
+            self.assertTrue((data.x == ref['x_pos_raw']).all())
+
+    def test1_Buffers(self):
+        '''buffers are reused in turn
+        '''
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid, n_buffers=2)
+        d1 = decoder.decode(self.createPackedData(seed=1))
+        x1 = d1.x.copy()
+        d2 = decoder.decode(self.createPackedData(seed=2))
+        self.assertFalse(d1.matrix is d2.matrix)
+        self.assertTrue((d1.x == x1).all())
+
+        d3 = decoder.decode(self.createPackedData(seed=3))
+        self.assertTrue(d3.matrix is d1.matrix)
+
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid, n_buffers=None)
+        d1 = decoder.decode(self.createPackedData(seed=1))
+        d2 = decoder.decode(self.createPackedData(seed=2))
+        d3 = decoder.decode(self.createPackedData(seed=3))
+        self.assertFalse(d3.matrix is d1.matrix)
+
+    def test2_Invalid(self):
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid)
+        packed = self.createPackedData()
+        packed[-1] = 1
+        with self.assertRaises(process_vector.Bact2ValueError):
+            decoder.decode(packed)
+
+        decoder = PackedDataDecoder(n_valid_items=self.n_valid, indices=[16])
+        with self.assertRaises(process_vector.Bact2AssertionError):
+            decoder.decode(self.createPackedData())
+
+
+class TestScaledDataConverter(unittest.TestCase):
+
+    n_bpms = 6
+
+    def createScales(self):
+        rng = np.random.RandomState(42)
+        x_gain = rng.uniform(.5, 2, size=self.n_bpms)
+        y_gain = rng.uniform(.5, 2, size=self.n_bpms)
+        x_offset = rng.normal(size=self.n_bpms)
+        y_offset = rng.normal(size=self.n_bpms)
+        return x_gain, x_offset, y_gain, y_offset
+
+    def test0_SameAsChannel(self):
+        x_gain, x_offset, y_gain, y_offset = self.createScales()
+        bit_gain = 3.0
+        converter = ScaledDataConverter((x_gain, x_offset, bit_gain),
+                                        (y_gain, y_offset, bit_gain))
+
+        rng = np.random.RandomState(1)
+        n_readings = 5
+        mat = rng.normal(size=(n_readings, 8, self.n_bpms))
+        scaled = converter.convert_matrix(mat)
+
+        conv = raw_to_scaled_data_channel
+        for cnt in range(n_readings):
+            raw = dict(zip(packed_data_names, mat[cnt]))
+            ref = {
+                'x_pos': conv(raw['x_pos_raw'], x_gain, x_offset, bit_gain),
+                'y_pos': conv(raw['y_pos_raw'], y_gain, y_offset, bit_gain),
+                'x_rms': conv(raw['x_rms_raw'], x_gain, 0.0, bit_gain),
+                'y_rms': conv(raw['y_rms_raw'], y_gain, 0.0, bit_gain),
+            }
+            for name, val in ref.items():
+                np.testing.assert_allclose(scaled[name][cnt], val)
+
+        # named stacked input and preallocated output
+        out = np.empty_like(scaled.matrix)
+        named = {name: mat[:, cnt] for cnt, name in enumerate(packed_data_names)}
+        r = converter.convert(named, out=out)
+        self.assertTrue(r.matrix is out)
+        np.testing.assert_allclose(out, scaled.matrix)
+
+    def test2_IntegerInput(self):
+        '''the IOC delivers integer waveforms
+        '''
+        x_gain, x_offset, y_gain, y_offset = self.createScales()
+        converter = ScaledDataConverter((x_gain, x_offset, 1.0),
+                                        (y_gain, y_offset, 1.0))
+        mat = np.arange(8 * self.n_bpms).reshape(8, self.n_bpms)
+        scaled = converter.convert_matrix(mat)
+        ref = converter.convert_matrix(mat.astype(np.float_))
+        np.testing.assert_allclose(scaled.matrix, ref.matrix)
+
+        out = np.empty_like(ref.matrix)
+        r = converter.convert_matrix(mat, out=out)
+        self.assertTrue(r.matrix is out)
+
+    def test1_RecordArray(self):
+        '''y is scaled with the y parameters
+        '''
+        x_gain, x_offset, y_gain, y_offset = self.createScales()
+        names = ['x_scale', 'x_offset', 'y_scale', 'y_offset']
+        params = np.core.records.fromarrays(
+            [x_gain, x_offset, y_gain, y_offset], names=names)
+
+        rng = np.random.RandomState(2)
+        mat = rng.normal(size=(8, self.n_bpms))
+        a_array = packed_data_to_named_array(
+            np.concatenate([mat.ravel(), np.zeros(mat.size)]),
+            n_valid_items=self.n_bpms)
+        r = raw_to_scaled_data(a_array, params)
+
+        ref = raw_to_scaled_data_channel(a_array['y_pos_raw'], y_gain, y_offset)
+        np.testing.assert_allclose(r['y_pos'], ref)
+        ref = raw_to_scaled_data_channel(a_array['x_rms_raw'], x_gain, 0.0)
+        np.testing.assert_allclose(r['x_rms'], ref)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+from bact2.ophyd.devices.raw.bpm_state_engine import BPMMeasurementStates
+from bact2.ophyd.devices.raw.bpm_timing import BPMAcquisitionTiming
+from bact2.ophyd.devices.utils.latency_histogram import LatencyHistogram
+from ophyd import Component as Cpt, Device, Signal
+import numpy as np
+import time
+import unittest
+
+
+class TestLatencyHistogram(unittest.TestCase):
+
+    def test0_Summary(self):
+        hist = LatencyHistogram(t_min=1e-3, t_max=10, n_bins=80)
+        rng = np.random.RandomState(1)
+        values = rng.lognormal(mean=np.log(.05), sigma=.5, size=2000)
+        for val in values:
+            hist.add(val)
+
+        r = hist.summary()
+        self.assertEqual(r['count'], len(values))
+        self.assertAlmostEqual(r['mean'], values.mean())
+        self.assertEqual(r['max'], values.max())
+        # bins are about 12 % wide
+        self.assertAlmostEqual(r['q50'] / np.median(values), 1, delta=.15)
+        self.assertAlmostEqual(r['q90'] / np.quantile(values, .9), 1, delta=.15)
+
+        hist.add(1e-6)
+        hist.add(1e3)
+        self.assertEqual(hist.counts[0], 1)
+        self.assertEqual(hist.counts[-1], 1)
+
+
+class _PackedData(Device):
+    packed_data = Cpt(Signal, name='packed_data', value=0)
+    counter = Cpt(Signal, name='counter', value=0)
+    ready = Cpt(Signal, name='ready', value=1)
+
+
+class TestStateEngineTiming(unittest.TestCase):
+
+    def test0_Measurement(self):
+        parent = _PackedData(name='bpm_waveform')
+        engine = BPMMeasurementStates(parent=parent)
+        timing_dev = BPMAcquisitionTiming(name='bpm_timing',
+                                          timing=engine.timing)
+
+        status = engine.watch_and_take_data(timeout=3, validation_time=.05)
+        parent.ready.put(0)
+        time.sleep(.02)
+        parent.ready.put(1)
+        parent.packed_data.put(1)
+        # superseded validation: restarts the check
+        parent.packed_data.put(2)
+        status.wait(3)
+        self.assertTrue(status.success)
+
+        timing = engine.timing
+        self.assertEqual(timing.n_finished, 1)
+        self.assertEqual(timing.last_validation_restarts, 2)
+        self.assertGreaterEqual(timing.last['wait_ready'], 0)
+        self.assertGreaterEqual(timing.last['validate'], .045)
+        self.assertGreaterEqual(timing.last['total'], .065)
+
+        r = timing_dev.read()
+        self.assertEqual(r['bpm_timing_total']['value'], timing.last['total'])
+        self.assertEqual(timing_dev.summary()['total']['count'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+from bact2.ophyd.devices.utils.settle_detector import SettleDetector
+from bact2.ophyd.devices.sim import SimAdaptiveSteerer
+from ophyd.utils.errors import StatusTimeoutError
+import numpy as np
+import unittest
+
+
+class TestSettleDetector(unittest.TestCase):
+
+    def setUp(self):
+        self.detector = SettleDetector(eps_abs=1e-2, eps_rel=1e-3,
+                                       slope_max=0.05, window=0.1)
+        self.detector.start(1.0, 0.0)
+
+    def test0_Ramp(self):
+        '''settled a window after the readback stopped changing
+        '''
+        det = self.detector
+        for t in np.arange(0, .3, .01):
+            self.assertFalse(det.update(min(t * 5, 1.0), t))
+        # no further readbacks: the timer checks
+        self.assertFalse(det.check(det.in_band_since + .05))
+        self.assertTrue(det.check(det.due))
+        self.assertAlmostEqual(det.settle_duration, 0.1)
+        self.assertAlmostEqual(det.move_duration, det.due)
+
+    def test1_Drift(self):
+        '''within tolerance but drifting: not settled
+        '''
+        det = self.detector
+        for t in np.arange(0, .2, .01):
+            self.assertFalse(det.update(0.995 + 0.08 * t, t))
+        self.assertFalse(det.check(0.2))
+        self.assertGreater(det.slope, det.slope_max)
+
+    def test2_Noise(self):
+        '''noise within tolerance does not prevent settling
+        '''
+        det = self.detector
+        rng = np.random.RandomState(1)
+        for t in np.arange(0, .2, .005):
+            settled = det.update(1.0 + rng.normal(scale=2e-3), t)
+        self.assertTrue(settled)
+        self.assertLess(det.move_duration, 0.11)
+
+    def test3_LeavesTolerance(self):
+        det = self.detector
+        det.update(1.0, 0.0)
+        det.update(1.1, 0.05)
+        self.assertIsNone(det.due)
+        det.update(1.0, 0.08)
+        self.assertAlmostEqual(det.due, 0.18)
+
+
+class TestAdaptiveSettle(unittest.TestCase):
+
+    def test0_Move(self):
+        steerer = SimAdaptiveSteerer(name='hs', slew_rate=10, tick=0.01)
+        steerer.settle_window.put(0.05)
+        steerer.set(0.5).wait(5)
+        self.assertEqual(steerer.readback.get(), 0.5)
+        self.assertGreaterEqual(steerer.settle_duration.get(), 0.05)
+        self.assertLess(steerer.move_duration.get(), 0.5)
+        self.assertEqual(steerer.move_histogram.count, 1)
+
+    def test1_OutOfTolerance(self):
+        '''readback never within tolerance: times out with the device
+        '''
+        steerer = SimAdaptiveSteerer(name='hs', timeout=0.2)
+        self.assertEqual(steerer.settleTimeout(), 0.2)
+        status = steerer.settleStatus(0.5)
+        self.assertRaises(StatusTimeoutError, status.wait, 2)
+        self.assertFalse(status.success)
+        self.assertEqual(steerer.move_histogram.count, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+from bact2.ophyd.devices.sim import (
+    BPMIOCSimulator, SimBPMWaveform, SimMultiplexer, SimSteerer,
+    SimulatedOrbit)
+import numpy as np
+import time
+import unittest
+
+
+class TestSimulatedMachine(unittest.TestCase):
+
+    def setUp(self):
+        self.waveform = SimBPMWaveform(name='bpm_waveform')
+        n_bpms = len(self.waveform.indices.get())
+        self.kickers = ['HS1', 'Q1']
+        self.orbit = SimulatedOrbit.forRing(n_bpms, self.kickers, seed=1,
+                                            noise=1e-5)
+
+    def test0_BPMTrigger(self):
+        '''packed data of the simulator decode to the orbit
+        '''
+        ioc = BPMIOCSimulator(self.waveform, self.orbit, duplicate_probability=1)
+        status = self.waveform.trigger()
+        ioc.update()
+        status.wait(1)
+
+        x, y = self.orbit.idealOrbit()
+        np.testing.assert_allclose(self.waveform.x.pos.get(), x, atol=1e-4)
+        np.testing.assert_allclose(self.waveform.y.pos.get(), y, atol=1e-4)
+        self.assertEqual(self.waveform.counter.get(), 1)
+
+    def test1_SteererResponse(self):
+        steerer = SimSteerer(name='hs1', slew_rate=100, tick=1e-3,
+                             settle_time=0)
+        steerer.connectOrbit(self.orbit, 'HS1')
+        x0, unused = self.orbit.idealOrbit()
+
+        steerer.set(0.5).wait(2)
+        self.assertEqual(steerer.readback.get(), 0.5)
+        x1, unused = self.orbit.idealOrbit()
+        np.testing.assert_allclose(x1 - x0, self.orbit.response_x[:, 0] * 0.5)
+
+        self.assertRaises(ValueError, steerer.set, 100)
+
+    def test1a_SupersededMove(self):
+        '''a new move supersedes the running one: only its status
+        finishes, when its setpoint is reached
+        '''
+        steerer = SimSteerer(name='hs1', slew_rate=20, tick=1e-3,
+                             settle_time=0.01)
+        for cnt in range(5):
+            first = steerer.set(1.0)
+            time.sleep(0.01 * cnt)
+            second = steerer.set(-0.2 * cnt)
+            readbacks = []
+            second.add_callback(
+                lambda status: readbacks.append(steerer.readback.get()))
+            second.wait(2)
+
+            self.assertRaises(RuntimeError, first.wait, 1)
+            self.assertEqual(readbacks, [-0.2 * cnt])
+
+        # stopped: no ramp continues
+        steerer.set(1.0)
+        time.sleep(0.01)
+        steerer.stop()
+        readback = steerer.readback.get()
+        time.sleep(0.02)
+        self.assertEqual(steerer.readback.get(), readback)
+
+    def test2_Multiplexer(self):
+        mux = SimMultiplexer(name='mux', quadrupole_names=['Q1'])
+        mux.selector.switch_time = 0
+        mux.selector.validation_time = 0
+        mux.power_converter.settle_time = 0
+        mux.connectOrbit(self.orbit)
+
+        changes = []
+        mux.selector.readback.subscribe(
+            lambda value=None, **kws: changes.append(value), run=False)
+        mux.selector.set('Q1').wait(2)
+        self.assertEqual(changes, ['Mux OFF', 'Q1'])
+
+        mux.power_converter.set(0.2).wait(2)
+        self.assertEqual(self.orbit.current('Q1'), 0.2)
+        self.assertRaises(AssertionError, mux.selector.set, 'Q1')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,83 @@
+from bact2.ophyd.utils.execute_async import ExecuteAsynchronisly, TimerScheduler
+import asyncio
+import threading
+import time
+import unittest
+
+
+class TestTimerScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.scheduler = TimerScheduler(name='test-timer')
+
+    def tearDown(self):
+        self.scheduler.shutdown()
+
+    def test0_Order(self):
+        '''called in order of due time, all in one thread
+        '''
+        called = []
+        done = threading.Event()
+
+        def make(tag):
+            def f():
+                called.append((tag, threading.current_thread().name))
+                if len(called) == 3:
+                    done.set()
+            return f
+
+        for tag, delay in (('c', .06), ('a', .02), ('b', .04)):
+            self.scheduler.callLater(delay, make(tag))
+
+        self.assertTrue(done.wait(2))
+        self.assertEqual([tag for tag, unused in called], ['a', 'b', 'c'])
+        self.assertEqual(set(name for unused, name in called), {'test-timer'})
+
+    def test1_Cancel(self):
+        called = []
+        done = threading.Event()
+        handle = self.scheduler.callLater(.01, lambda: called.append('cancelled'))
+        self.scheduler.callLater(.03, done.set)
+        handle.cancel()
+
+        self.assertTrue(handle.cancelled())
+        self.assertTrue(done.wait(2))
+        self.assertEqual(called, [])
+
+    def test2_NoThreadPerCall(self):
+        n_threads = threading.active_count()
+        done = threading.Event()
+        for i in range(50):
+            self.scheduler.callLater(.01, lambda: None)
+        self.scheduler.callLater(.02, done.set)
+        self.assertLessEqual(threading.active_count(), n_threads + 1)
+        self.assertTrue(done.wait(2))
+
+
+class TestExecuteAsynchronisly(unittest.TestCase):
+
+    def test0_UsesRunningLoop(self):
+        execute = ExecuteAsynchronisly(scheduler=TimerScheduler())
+
+        async def main():
+            fut = asyncio.get_running_loop().create_future()
+            handle = execute.callLater(.01, lambda: fut.set_result(True))
+            self.assertIsInstance(handle, asyncio.TimerHandle)
+            return await asyncio.wait_for(fut, 2)
+
+        self.assertTrue(asyncio.run(main()))
+        self.assertEqual(len(execute.scheduler), 0)
+
+    def test1_CallAt(self):
+        scheduler = TimerScheduler()
+        execute = ExecuteAsynchronisly(scheduler=scheduler)
+        done = threading.Event()
+        start = time.time()
+        execute.callAt(start + .02, done.set)
+        self.assertTrue(done.wait(2))
+        self.assertGreaterEqual(time.time() - start, .015)
+        scheduler.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -4,6 +4,7 @@ import datetime
 import unittest
 
 from bact2.pandas.dataframe.df_aggregate import df_with_vectors_mean
+from bact2.pandas.dataframe import df_aggregate as dfg
 
 
 class TestAggregationNoOP(unittest.TestCase):
@@ -153,6 +154,97 @@ class TestAggregation(unittest.TestCase):
             self.assertFalse(np.isfinite(r.at[i, 'names']))
 
 
+class TestVectorisedAggregation(unittest.TestCase):
+    '''Check the vectorised aggregation against group by group processing
+    '''
+
+    def createDF(self):
+        n_rows = 23
+        n_elements = 5
+        rng = np.random.RandomState(1211)
+
+        # unsorted group keys and groups of different length
+        sel = rng.randint(0, 6, size=n_rows)
+        sel[:12] = np.arange(12)[::-1] % 6
+
+        vecs = list(rng.normal(size=(n_rows, n_elements)))
+        df = pd.DataFrame(
+            {
+                'sel': sel,
+                'data': rng.normal(size=n_rows),
+                'counts': rng.randint(-5, 5, size=n_rows),
+                'vecs': vecs,
+            }
+        )
+        return df
+
+    def addIntVectors(self, df):
+        n_rows, n_elements = len(df.index), 5
+        df.loc[:, 'ivecs'] = [np.arange(n_elements) * (i - 11)
+                              for i in range(n_rows)]
+        return df
+
+    def checkFrames(self, r, ref):
+        self.assertEqual(set(r.columns), set(ref.columns))
+        self.assertTrue((r.index == ref.index).all())
+        for col in ref.columns:
+            for i in ref.index:
+                a = np.asarray(r.at[i, col], dtype=np.float_)
+                b = np.asarray(ref.at[i, col], dtype=np.float_)
+                np.testing.assert_allclose(a, b, rtol=1e-12)
+
+    def checkMethod(self, method, func_for_vecs, agg='mean', df=None):
+        if df is None:
+            df = self.createDF()
+        grp = df.groupby('sel')
+        # Only vectors to treat
+        tdf = getattr(grp[['data']], agg)()
+
+        r = dfg.df_with_vectors_reduce(df, grp, tdf, method)
+        ref = dfg.df_with_vectors_aggregate(df, grp, tdf, func_for_vecs)
+        self.checkFrames(r, ref)
+
+    def test0_Mean(self):
+        self.checkMethod('mean', dfg.vectors_mean)
+
+    def test1_Max(self):
+        df = self.addIntVectors(self.createDF())
+        self.checkMethod('max', dfg.vectors_max, agg='max', df=df)
+
+    def test2_AbsMax(self):
+        df = self.addIntVectors(self.createDF())
+        self.checkMethod('amax', dfg.vectors_amax, agg='max', df=df)
+
+    def test3_MeanSkipFirst(self):
+        df = self.createDF()
+        df.loc[:, 'time'] = np.arange(len(df.index))
+        grp = df.groupby('sel')
+        tdf = grp[['data', 'time']].mean()
+
+        r = dfg.df_with_vectors_reduce(df, grp, tdf, 'mean_skip_first')
+        ref = dfg.df_with_vectors_aggregate(df, grp, tdf,
+                                            dfg.vectors_mean_skip_first)
+        self.checkFrames(r, ref)
+
+    def test4_MeanSkipFirstSingleReading(self):
+        '''Groups with a single reading can not skip the first one
+        '''
+        df = self.createDF()
+        df.loc[:, 'sel'] = np.arange(len(df.index))
+        with self.assertRaises(dfg.KnownVectorAggregationException):
+            dfg.df_with_vectors_mean_skip_first(df, column_name='sel')
+
+    def test5_TimeMean(self):
+        df = self.createDF()
+        t0 = np.datetime64('2020-01-07T10:00:00')
+        df.loc[:, 'time'] = t0 + np.arange(len(df.index)) * np.timedelta64(1, 's')
+        r = dfg.df_with_vectors_mean(df, 'sel')
+
+        for key, index in df.groupby('sel').groups.items():
+            ref = dfg.time_vector_mean(df.loc[index, 'time'].values)
+            self.assertEqual(pd.Timestamp(r.at[key, 'time']), pd.Timestamp(ref))
+
+
 if __name__ == '__main__':
     import logging
     logging.basicConfig(level=logging.INFO)
@@ -0,0 +1,97 @@
+import pandas as pd
+import numpy as np
+import unittest
+
+from bact2.pandas.dataframe.vector_array import (VectorArray, column_to_matrix,
+                                                 is_vector_column)
+from bact2.pandas.dataframe.df_aggregate import df_vectors_convert
+
+
+class TestVectorArray(unittest.TestCase):
+
+    def createDF(self):
+        n_rows = 6
+        mat = np.arange(n_rows * 4, dtype=np.float_).reshape(n_rows, 4)
+        df = pd.DataFrame(
+            {
+                'sel': np.arange(n_rows) % 2,
+                'vecs': [list(row) for row in mat],
+                'names': [['a', 'b']] * n_rows,
+            }
+        )
+        return df, mat
+
+    def test0_Convert(self):
+        '''Vectors of equal length are stored as one matrix
+        '''
+        df, mat = self.createDF()
+        df = df_vectors_convert(df.infer_objects(), vector_array=True)
+
+        self.assertTrue(is_vector_column(df.vecs))
+        self.assertFalse(is_vector_column(df.names))
+        m = column_to_matrix(df.vecs)
+        self.assertTrue((m == mat).all())
+        self.assertTrue(m is df.vecs.array.matrix)
+
+    def test1_Select(self):
+        '''Selections slice the matrix
+        '''
+        df, mat = self.createDF()
+        df = df_vectors_convert(df, vector_array=True)
+
+        sel = df.loc[df.sel == 1, 'vecs']
+        self.assertTrue(is_vector_column(sel))
+        self.assertTrue((column_to_matrix(sel) == mat[1::2]).all())
+
+        grp = df.groupby('sel')
+        sel = grp.get_group(0).vecs
+        self.assertTrue((column_to_matrix(sel) == mat[::2]).all())
+
+        row = df.vecs.iat[3]
+        self.assertTrue((row == mat[3]).all())
+
+    def test2_Arithmetic(self):
+        df, mat = self.createDF()
+        df = df_vectors_convert(df, vector_array=True)
+
+        diff = df.vecs - df.vecs * 2
+        self.assertTrue(is_vector_column(diff))
+        self.assertTrue((column_to_matrix(diff) == -mat).all())
+
+        # mixing with object columns
+        obj = pd.Series([row for row in np.ones(mat.shape)], dtype=np.object_)
+        diff = df.vecs - obj
+        self.assertTrue((column_to_matrix(diff) == mat - 1).all())
+
+    def test3_ObjectColumn(self):
+        '''Object columns are stacked
+        '''
+        df, mat = self.createDF()
+        df = df_vectors_convert(df)
+        self.assertFalse(is_vector_column(df.vecs))
+        self.assertTrue((column_to_matrix(df.vecs) == mat).all())
+
+    def test4_Concat(self):
+        a = pd.Series(VectorArray(np.zeros((2, 3))))
+        b = pd.Series(VectorArray(np.ones((3, 3))))
+        c = pd.concat([a, b], ignore_index=True)
+        self.assertTrue(is_vector_column(c))
+        self.assertEqual(column_to_matrix(c).shape, (5, 3))
+
+    def test5_Empty(self):
+        '''Empty arrays keep the vector length if the dtype knows it
+        '''
+        a = VectorArray(np.zeros((2, 3)))
+        r = VectorArray._from_sequence([], dtype=a.dtype)
+        self.assertEqual(r.matrix.shape, (0, 3))
+        self.assertEqual(r.dtype, a.dtype)
+
+        r = VectorArray._from_sequence([])
+        self.assertEqual(r.matrix.shape, (0, 0))
+        s = pd.Series([], dtype='vector')
+        self.assertTrue(is_vector_column(s))
+        self.assertEqual(len(s), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()